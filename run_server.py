@@ -28,6 +28,66 @@ if __name__ == "__main__":
     parser.add_argument('--no_single_model', '-nsm',
                         action='store_true',
                         help='Set this if every connection should instantiate its own model. Only relevant for custom model, passed using -trt or -fw.')
+    parser.add_argument('--batch_inference', '-bi',
+                        action='store_true',
+                        help='Transcribe the audio of all connections with batched model calls. '
+                             'Only relevant for faster_whisper in single model mode.')
+    parser.add_argument('--max_batch_size',
+                        type=int,
+                        default=8,
+                        help='Maximum number of connections per batched model call.')
+    parser.add_argument('--min_new_audio',
+                        type=float,
+                        default=0.25,
+                        help='Seconds of new audio a connection has to send before it is transcribed again.')
+    parser.add_argument('--target_latency',
+                        type=float,
+                        default=None,
+                        help='Targeted delay in seconds of partial results. If set, every connection paces its '
+                             'transcription on the measured inference time instead of --min_new_audio.')
+    parser.add_argument('--max_update_rate',
+                        type=float,
+                        default=None,
+                        help='Maximum number of partial results per second sent to each connection. Completed '
+                             'segments are always sent.')
+    parser.add_argument('--stage_timings',
+                        action='store_true',
+                        help='Time the VAD, feature extraction, encoder, decoding and word timestamps of every '
+                             'transcription, and log the totals of each connection when it closes. '
+                             'Only relevant for faster_whisper.')
+    parser.add_argument('--local_agreement',
+                        action='store_true',
+                        help='Commit words once two consecutive transcriptions agree on them, and only transcribe '
+                             'the audio after the committed words again. Only relevant for faster_whisper.')
+    parser.add_argument('--num_workers',
+                        type=int,
+                        default=None,
+                        help='Number of inference calls which can run concurrently on each shared model. '
+                             'Defaults to 1 in single model mode, and to the maximum number of clients '
+                             'otherwise. Only relevant for faster_whisper.')
+    parser.add_argument('--replicate_model',
+                        action='store_true',
+                        help='Load --num_workers replicas of the shared model instead of one model with '
+                             '--num_workers CTranslate2 workers. Only relevant in single model mode.')
+    parser.add_argument('--preload_models',
+                        type=lambda models: [model for model in models.split(',') if model],
+                        default=None,
+                        help='Comma-separated model sizes or paths, e.g. "small,medium", to load and warm up at '
+                             'startup for the clients asking for them. Only relevant for faster_whisper without '
+                             'single model mode.')
+    parser.add_argument('--max_model_memory',
+                        type=float,
+                        default=None,
+                        help='Memory budget in GB of the models shared by connections asking for the same model. '
+                             'Unused models are unloaded above it. Only relevant without single model mode.')
+    parser.add_argument('--async_mode',
+                        action='store_true',
+                        help='Serve all connections from one asyncio event loop, running model inference '
+                             'on a shared pool of threads instead of two threads per connection.')
+    parser.add_argument('--max_inference_workers',
+                        type=int,
+                        default=4,
+                        help='Number of model inference threads. Only relevant with --async_mode.')
     args = parser.parse_args()
 
     if args.backend == "tensorrt":
@@ -37,8 +97,14 @@ if __name__ == "__main__":
     if "OMP_NUM_THREADS" not in os.environ:
         os.environ["OMP_NUM_THREADS"] = str(args.omp_num_threads)
 
-    from whisper_live.server import TranscriptionServer
-    server = TranscriptionServer()
+    kwargs = {}
+    if args.async_mode:
+        from whisper_live.async_server import AsyncTranscriptionServer
+        server = AsyncTranscriptionServer()
+        kwargs["max_inference_workers"] = args.max_inference_workers
+    else:
+        from whisper_live.server import TranscriptionServer
+        server = TranscriptionServer()
     server.run(
         "0.0.0.0",
         port=args.port,
@@ -47,4 +113,16 @@ if __name__ == "__main__":
         whisper_tensorrt_path=args.trt_model_path,
         trt_multilingual=args.trt_multilingual,
         single_model=not args.no_single_model,
+        batch_inference=args.batch_inference,
+        max_batch_size=args.max_batch_size,
+        min_new_audio=args.min_new_audio,
+        num_workers=args.num_workers,
+        replicate_model=args.replicate_model,
+        max_model_memory=args.max_model_memory,
+        local_agreement=args.local_agreement,
+        target_latency=args.target_latency,
+        max_update_rate=args.max_update_rate,
+        stage_timings=args.stage_timings,
+        preload_models=args.preload_models,
+        **kwargs
     )
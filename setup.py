@@ -56,5 +56,8 @@ setup(
         "kaldialign",
         "soundfile",
     ],
+    entry_points={
+        "console_scripts": ["whisper-live-transcribe=whisper_live.offline:main"],
+    },
     python_requires=">=3.8"
 )
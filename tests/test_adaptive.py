@@ -0,0 +1,47 @@
+import unittest
+
+from whisper_live.adaptive import AdaptiveScheduler
+
+
+class TestAdaptiveScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = AdaptiveScheduler(target_latency=1.0, smoothing=1.0)
+
+    def test_defaults_before_first_pass(self):
+        self.assertEqual(self.scheduler.get_min_new_audio(0.25), 0.25)
+        self.assertEqual(self.scheduler.get_max_window(), 25.0)
+
+    def test_fast_passes_update_often(self):
+        self.scheduler.update(0.05, 5.0)
+        self.assertAlmostEqual(self.scheduler.get_min_new_audio(0.25), 0.95)
+        self.scheduler.update(0.95, 5.0)
+        self.assertAlmostEqual(self.scheduler.get_min_new_audio(0.25), 0.95)
+        self.assertEqual(self.scheduler.get_max_window(), 25.0)
+
+    def test_interval_is_bounded(self):
+        self.scheduler.update(0.99, 5.0)
+        self.assertEqual(self.scheduler.get_min_new_audio(0.25), 0.99)
+        self.scheduler = AdaptiveScheduler(target_latency=0.2, smoothing=1.0)
+        self.scheduler.update(0.15, 5.0)
+        self.assertEqual(self.scheduler.get_min_new_audio(0.25), 0.15)
+        self.scheduler.update(0.01, 5.0)
+        self.assertEqual(self.scheduler.get_min_new_audio(0.25), 0.19)
+
+    def test_slow_passes_back_off(self):
+        self.scheduler.update(2.0, 10.0)
+        self.assertEqual(self.scheduler.get_min_new_audio(0.25), 2.0)
+        self.assertEqual(self.scheduler.get_max_window(), 12.5)
+        self.scheduler.update(10.0, 10.0)
+        self.assertEqual(self.scheduler.get_min_new_audio(0.25), 5.0)
+        self.assertEqual(self.scheduler.get_max_window(), 10.0)
+
+    def test_pass_time_is_smoothed(self):
+        scheduler = AdaptiveScheduler(target_latency=1.0, smoothing=0.5)
+        scheduler.update(0.2, 5.0)
+        scheduler.update(0.6, 5.0)
+        self.assertAlmostEqual(scheduler.inference_time, 0.4)
+        self.assertAlmostEqual(scheduler.get_real_time_factor(), 0.08)
+
+
+if __name__ == "__main__":
+    unittest.main()
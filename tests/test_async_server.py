@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from whisper_live.async_server import AsyncTranscriptionServer, AsyncWebSocket
+from whisper_live.server import ServeClientBase
+
+
+class FakeConnection:
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncWebSocket(unittest.IsolatedAsyncioTestCase):
+    async def test_messages_from_threads_are_sent_in_order(self):
+        connection = FakeConnection()
+        websocket = AsyncWebSocket(connection, asyncio.get_running_loop())
+
+        thread = threading.Thread(target=lambda: [websocket.send(str(i)) for i in range(5)])
+        thread.start()
+        thread.join()
+        websocket.close()
+        await websocket.sender
+
+        self.assertEqual(connection.sent, ["0", "1", "2", "3", "4"])
+        self.assertTrue(connection.closed)
+
+    async def test_session_results_are_rate_limited(self):
+        connection = FakeConnection()
+        websocket = AsyncWebSocket(connection, asyncio.get_running_loop())
+        client = ServeClientBase("test_client", websocket, start_thread=False, max_update_rate=2)
+        self.assertIs(client.send_queue, websocket.send_queue)
+
+        client.send_message("0", final=False)
+        await asyncio.sleep(0.05)
+        client.send_message("1", final=False)
+        client.send_message("2", final=False)
+        await asyncio.sleep(0.05)
+        self.assertEqual(connection.sent, ["0"])
+
+        # the last partial replaced the previous one, and is sent on close without waiting for the rate limit
+        client.cleanup()
+        await websocket.sender
+        self.assertEqual(connection.sent, ["0", "2"])
+        self.assertEqual(client.send_queue.get_metrics()["messages_coalesced"], 1)
+
+
+class TestTranscriptionScheduling(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = AsyncTranscriptionServer()
+        self.server.loop = asyncio.get_running_loop()
+        self.server.executor = None
+        self.done = asyncio.Event()
+        self.client = mock.MagicMock(exit=False, min_audio_duration=1.0, pending_audio_timeout=0.05)
+        self.client.process_audio_chunk.side_effect = lambda: self.server.loop.call_soon_threadsafe(self.done.set)
+
+    async def test_client_with_new_audio_is_transcribed(self):
+        self.client.has_audio_to_process.side_effect = [True, False]
+        self.client.get_pending_duration.return_value = 0.0
+        self.server.schedule_transcription(self.client)
+        await asyncio.wait_for(self.done.wait(), timeout=5)
+        self.assertEqual(self.client.process_audio_chunk.call_count, 1)
+
+    async def test_pending_chunk_is_retried_after_timeout(self):
+        self.client.has_audio_to_process.return_value = False
+        self.client.get_pending_duration.return_value = 2.0
+        self.server.schedule_transcription(self.client)
+        self.assertIn(self.client, self.server.retry_timers)
+        await asyncio.wait_for(self.done.wait(), timeout=5)
+        self.client.exit = True
+
+    async def test_idle_client_is_not_transcribed(self):
+        self.client.has_audio_to_process.return_value = False
+        self.client.get_pending_duration.return_value = 0.0
+        self.server.schedule_transcription(self.client)
+        self.assertNotIn(self.client, self.server.transcriptions)
+        self.assertNotIn(self.client, self.server.retry_timers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+import numpy as np
+
+from whisper_live.audio_format import decode_audio, encode_audio, get_supported_formats
+
+
+class TestAudioFormat(unittest.TestCase):
+    def setUp(self):
+        t = np.arange(4096) / 16000
+        self.audio = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+    def test_round_trip(self):
+        for audio_format in get_supported_formats():
+            decoded = decode_audio(encode_audio(self.audio, audio_format), audio_format)
+            self.assertEqual(decoded.dtype, np.float32)
+            np.testing.assert_allclose(decoded, self.audio, atol=1 / 32768)
+
+    def test_compact_formats_are_smaller(self):
+        sizes = {audio_format: len(encode_audio(self.audio, audio_format)) for audio_format in get_supported_formats()}
+        self.assertEqual(sizes["float32"], 4 * len(self.audio))
+        self.assertEqual(sizes["int16"], 2 * len(self.audio))
+        self.assertLess(sizes["flac"], sizes["int16"])
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            encode_audio(self.audio, "opus")
+        with self.assertRaises(ValueError):
+            decode_audio(b"", "opus")
+
+
+if __name__ == "__main__":
+    unittest.main()
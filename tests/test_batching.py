@@ -0,0 +1,106 @@
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from whisper_live.batching import (
+    BatchScheduler,
+    TranscriptionBatchScheduler,
+    TranscriptionRequest,
+    VoiceActivityBatchScheduler,
+    VoiceActivityRequest,
+)
+from whisper_live.model_pool import ModelPool
+
+
+class EchoBatchScheduler(BatchScheduler):
+    def __init__(self, **kwargs):
+        self.batches = []
+        super().__init__(**kwargs)
+
+    def process_batch(self, requests):
+        self.batches.append(list(requests))
+        if "fail" in requests:
+            raise RuntimeError("batch failed")
+        return [request * 2 for request in requests]
+
+
+class TestBatchScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = EchoBatchScheduler(max_batch_size=4, batch_timeout=0.2)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_results_are_routed_back(self):
+        futures = [self.scheduler.submit(i) for i in range(3)]
+        self.assertEqual([future.result(timeout=5) for future in futures], [0, 2, 4])
+
+    def test_requests_from_many_threads_are_batched(self):
+        results = {}
+
+        def worker(i):
+            results[i] = self.scheduler.submit(i).result(timeout=5)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, {i: i * 2 for i in range(4)})
+        self.assertEqual(len(self.scheduler.batches), 1)
+        self.assertEqual(sorted(self.scheduler.batches[0]), [0, 1, 2, 3])
+
+    def test_max_batch_size(self):
+        futures = [self.scheduler.submit(i) for i in range(6)]
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual([len(batch) for batch in self.scheduler.batches], [4, 2])
+
+    def test_exception_is_propagated(self):
+        future = self.scheduler.submit("fail")
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+        self.assertEqual(self.scheduler.submit(1).result(timeout=5), 2)
+
+
+class TestTranscriptionBatchScheduler(unittest.TestCase):
+    def test_process_batch(self):
+        transcriber = mock.MagicMock()
+        transcriber.transcribe_batch.return_value = [("segments_1", "info_1"), ("segments_2", "info_2")]
+        scheduler = TranscriptionBatchScheduler(ModelPool([transcriber]), max_batch_size=2)
+        requests = [
+            TranscriptionRequest(np.zeros(16000, dtype=np.float32), "en", "transcribe", None, True, {"threshold": 0.5}),
+            TranscriptionRequest(np.zeros(8000, dtype=np.float32), None, "translate", "prompt", False, None),
+        ]
+
+        results = scheduler.process_batch(requests)
+        scheduler.stop()
+
+        self.assertEqual(results, [("segments_1", "info_1"), ("segments_2", "info_2")])
+        kwargs = transcriber.transcribe_batch.call_args.kwargs
+        self.assertEqual(kwargs["language"], ["en", None])
+        self.assertEqual(kwargs["task"], ["transcribe", "translate"])
+        self.assertEqual(kwargs["initial_prompt"], [None, "prompt"])
+        self.assertEqual(kwargs["vad_filter"], [True, False])
+        self.assertEqual(kwargs["vad_parameters"], [{"threshold": 0.5}, None])
+
+
+class TestVoiceActivityBatchScheduler(unittest.TestCase):
+    def test_frames_are_grouped_by_length(self):
+        detector = mock.MagicMock()
+        detector.forward_batch.side_effect = lambda slots, frames: np.array([slot / 10 for slot in slots])
+        scheduler = VoiceActivityBatchScheduler(detector)
+        requests = [
+            VoiceActivityRequest(0, np.zeros(4096, dtype=np.float32)),
+            VoiceActivityRequest(1, np.zeros(512, dtype=np.float32)),
+            VoiceActivityRequest(2, np.zeros(4096, dtype=np.float32)),
+        ]
+
+        results = scheduler.process_batch(requests)
+        scheduler.stop()
+
+        self.assertEqual(results, [0.0, 0.1, 0.2])
+        self.assertEqual([call.args[0] for call in detector.forward_batch.call_args_list], [[0, 2], [1]])
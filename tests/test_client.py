@@ -1,8 +1,10 @@
 import json
 import os
+import numpy as np
 import scipy
 import websocket
 import copy
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from whisper_live.client import Client, TranscriptionClient, TranscriptionTeeClient
@@ -48,7 +50,10 @@ class TestClientCallbacks(BaseTestCase):
             "language": self.client.language,
             "task": self.client.task,
             "model": self.client.model,
-            "use_vad": True
+            "use_vad": True,
+            "audio_format": "float32",
+            "protocol_version": 2,
+            "message_encoding": "json"
         })
         self.client.on_open(self.mock_ws_app)
         self.mock_ws_app.send.assert_called_with(expected_message)
@@ -62,6 +67,7 @@ class TestClientCallbacks(BaseTestCase):
             }
         )
         self.client.on_message(self.mock_ws_app, message)
+        self.assertEqual(self.client.audio_format, "float32")
 
         message = json.dumps({
             "uid": self.client.uid,
@@ -77,6 +83,25 @@ class TestClientCallbacks(BaseTestCase):
         self.assertEqual(len(self.client.transcript), 2)
         self.assertEqual(self.client.transcript[1]['text'], "Test transcript 2")
 
+    def test_on_message_segment_updates(self):
+        self.client.on_message(self.mock_ws_app, json.dumps({
+            "uid": self.client.uid,
+            "message": "SERVER_READY",
+            "backend": "faster_whisper",
+            "protocol_version": 2
+        }))
+        updates = [
+            [{"id": 0, "revision": 0, "completed": False, "start": 0, "end": 1, "text": "Test"}],
+            [{"id": 0, "revision": 1, "completed": False, "start": 0, "end": 2, "text": "Test transcript"}],
+            [{"id": 0, "revision": 2, "completed": True, "start": 0, "end": 2, "text": "Test transcript"},
+             {"id": 1, "revision": 0, "completed": False, "start": 2, "end": 3, "text": "Test transcript 2"}],
+        ]
+        for segments in updates:
+            self.client.on_message(self.mock_ws_app, json.dumps({"uid": self.client.uid, "segments": segments}))
+
+        self.assertEqual([seg["text"] for seg in self.client.transcript], ["Test transcript"])
+        self.assertEqual(self.client.last_segment["id"], 1)
+
     def test_on_close(self):
         close_status_code = 1000
         close_msg = "Normal closure"
@@ -143,6 +168,16 @@ class TestTee(BaseTestCase):
         self.client2.client_socket.send.assert_not_called()
         self.client3.client_socket.send.assert_called_with(self.mock_audio_packet, websocket.ABNF.OPCODE_BINARY)
 
+    def test_multicast_audio_in_negotiated_formats(self):
+        self.client2.recording = True
+        self.client3.recording = True
+        self.client3.audio_format = "int16"
+        audio = np.array([0.5, -1.0], dtype=np.float32)
+        self.tee.multicast_audio(audio)
+        self.client2.client_socket.send.assert_called_with(audio.tobytes(), websocket.ABNF.OPCODE_BINARY)
+        self.client3.client_socket.send.assert_called_with(
+            np.array([16384, -32768], dtype=np.int16).tobytes(), websocket.ABNF.OPCODE_BINARY)
+
     def test_close_all(self):
         self.tee.close_all_clients()
         for client in self.tee.clients:
@@ -154,3 +189,47 @@ class TestTee(BaseTestCase):
         self.tee.write_all_clients_srt()
         self.assertTrue(Path("transcript.srt").is_file())
         self.assertTrue(Path("translation.srt").is_file())
+
+
+class TestStreamFile(BaseTestCase):
+    @patch('whisper_live.client.pyaudio.PyAudio')
+    def setUp(self, mock_pyaudio):
+        super().setUp()
+        self.tee = TranscriptionTeeClient([self.client])
+        self.client.recording = True
+        self.client.wait_before_disconnect = MagicMock()
+        self.tee.write_all_clients_srt = MagicMock()
+        self.process = MagicMock()
+        self.process.stdout.read.side_effect = [b'\x00\x00' * self.tee.chunk] * 4 + [b'']
+        self.tee.get_file_ffmpeg_process = MagicMock(return_value=self.process)
+
+    def sent_packets(self):
+        return [c.args[0] for c in self.client.client_socket.send.call_args_list]
+
+    @patch('whisper_live.client.time.sleep')
+    def test_stream_file(self, mock_sleep):
+        self.tee.stream_file("archive.mp3")
+
+        packets = self.sent_packets()
+        self.assertEqual(len(packets), 5)
+        self.assertEqual(len(packets[0]), self.tee.chunk * 4)  # float32 samples
+        self.assertEqual(packets[-1], Client.END_OF_AUDIO.encode('utf-8'))
+        self.process.kill.assert_called()
+        # no audio device is used
+        self.assertIsNone(self.tee._p)
+
+    def test_stream_file_needs_a_positive_speed(self):
+        with self.assertRaises(ValueError):
+            self.tee.stream_file("archive.mp3", speed=0)
+        self.tee.get_file_ffmpeg_process.assert_not_called()
+
+    @patch('whisper_live.client.time.sleep')
+    def test_stream_file_paced(self, mock_sleep):
+        start = time.time()
+        self.tee.stream_file("archive.mp3", speed=2)
+
+        # the last chunk ends 4 * 4096 samples into the audio, sent at twice the real time
+        sent_duration = 4 * self.tee.chunk / self.tee.rate / 2
+        self.assertEqual(mock_sleep.call_count, 4)
+        self.assertLessEqual(mock_sleep.call_args.args[0], sent_duration)
+        self.assertGreater(mock_sleep.call_args.args[0], sent_duration - (time.time() - start) - 0.01)
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile
+import websockets
+
+from whisper_live.bench.e2e import ServerThread, run_level
+from whisper_live.bench.loadgen import SessionStats, run_session, summarize
+
+
+class TestSessionStats(unittest.TestCase):
+    def test_final_latency_of_v2_segments(self):
+        stats = SessionStats("uid")
+        for i in range(1, 5):
+            stats.record_audio(float(i), 100.0 + i)
+        stats.record_segments([{"id": 0, "start": "0.000", "end": "1.500", "completed": False}], 103.0)
+        stats.record_segments([{"id": 0, "start": "0.000", "end": "1.500", "completed": True},
+                               {"id": 1, "start": "1.500", "end": "3.000", "completed": False}], 104.5)
+        # the audio up to 1.5s was sent with the chunk ending at 2s
+        self.assertEqual(stats.final_latencies, [2.5])
+        self.assertEqual(stats.partial_latencies, [1.0, 1.5])
+        self.assertEqual(stats.get_time_to_first_partial(), 2.0)
+        self.assertEqual(stats.get_update_intervals(), [1.5])
+        self.assertEqual(stats.get_real_time_factor(), 3.5 / 4)
+
+    def test_final_latency_of_v1_segments(self):
+        stats = SessionStats("uid")
+        stats.record_audio(2.0, 10.0)
+        stats.record_audio(4.0, 11.0)
+        segments = [{"start": "0.000", "end": "1.000"}, {"start": "1.000", "end": "3.000"}]
+        stats.record_segments(segments, 12.0)
+        stats.record_segments(segments + [{"start": "3.000", "end": "5.000"}], 13.0)
+        # every segment but the last is completed, and counted once
+        self.assertEqual(stats.final_latencies, [2.0, 2.0])
+
+    def test_summarize(self):
+        sessions = [SessionStats(str(i)) for i in range(4)]
+        for session in sessions[:3]:
+            session.status = "done"
+            session.record_audio(1.0, 0.0)
+            session.record_segments([{"start": "0.000", "end": "0.500"}], 0.5)
+        sessions[3].status = "WAIT"
+        summary = summarize(sessions)
+        self.assertEqual(summary["sessions"], 4)
+        self.assertEqual(summary["rates"], {"WAIT": 0.25, "done": 0.75})
+        self.assertEqual(summary["time_to_first_partial"]["count"], 3)
+        self.assertEqual(summary["time_to_first_partial"]["p50"], 0.5)
+        self.assertIsNone(summary["final_latency"])
+
+
+class TestRunSession(unittest.IsolatedAsyncioTestCase):
+    async def test_session_against_a_server(self):
+        received = []
+
+        async def handler(websocket):
+            options = json.loads(await websocket.recv())
+            received.append(options)
+            await websocket.send(json.dumps({"uid": options["uid"], "message": "SERVER_READY", "backend": "test"}))
+            async for message in websocket:
+                if message == b"END_OF_AUDIO":
+                    break
+                received.append(message)
+                end = f"{len(received) - 1:.3f}"
+                await websocket.send(json.dumps({"uid": options["uid"], "segments": [
+                    {"id": 0, "start": "0.000", "end": end, "completed": False}]}))
+
+        async with websockets.serve(handler, "localhost", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            stats = SessionStats("uid")
+            await run_session(f"ws://localhost:{port}", np.zeros(4 * 1000, dtype=np.float32), stats,
+                              {"uid": "uid"}, speed=0, chunk_size=1000, linger=0.2)
+
+        self.assertEqual(stats.status, "done")
+        self.assertEqual(received[0], {"uid": "uid"})
+        self.assertEqual([len(m) for m in received[1:]], [4000] * 4)
+        self.assertEqual(len(stats.message_times), 4)
+        self.assertEqual(len(stats.sent_times), 4)
+
+    async def test_wait_status(self):
+        async def handler(websocket):
+            await websocket.recv()
+            await websocket.send(json.dumps({"uid": "uid", "status": "WAIT", "message": 5.0}))
+
+        async with websockets.serve(handler, "localhost", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            stats = SessionStats("uid")
+            await run_session(f"ws://localhost:{port}", np.zeros(1000, dtype=np.float32), stats, {"uid": "uid"})
+
+        self.assertEqual(stats.status, "WAIT")
+        self.assertEqual(stats.sent_times, [])
+
+
+class TestRunLevel(unittest.TestCase):
+    def test_level_against_a_server(self):
+        def handler(websocket):
+            options = json.loads(websocket.recv())
+            websocket.send(json.dumps({"uid": options["uid"], "message": "SERVER_READY", "backend": "test"}))
+            n_samples = 0
+            for message in websocket:
+                if message == b"END_OF_AUDIO":
+                    break
+                n_samples += len(message) // 4
+                websocket.send(json.dumps({"uid": options["uid"], "segments": [
+                    {"id": 0, "start": "0.000", "end": f"{n_samples / 16000:.3f}", "completed": False}]}))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "audio.wav")
+            soundfile.write(path, np.zeros(8000, dtype=np.float32), 8000)
+            with ServerThread(handler) as server:
+                result = run_level(server.uri, [path], 3, {}, speed=0, linger=0.2)
+
+        self.assertEqual(result["sessions"], 3)
+        self.assertEqual(result["rates"], {"done": 1.0})
+        self.assertEqual(result["audio_seconds"], 3.0)
+        self.assertEqual(result["partial_latency"]["count"], 3 * 4)
+        self.assertGreater(result["cpu_seconds_per_audio_second"], 0)
+        self.assertGreater(result["peak_rss_mb"], 0)
+        self.assertGreater(result["cumulative_peak_rss_mb"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
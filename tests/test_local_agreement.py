@@ -0,0 +1,49 @@
+import unittest
+
+from whisper_live.local_agreement import HypothesisBuffer
+from whisper_live.transcriber import Word
+
+
+def words(*timed_words):
+    return [Word(start=start, end=end, word=word, probability=1.0) for start, end, word in timed_words]
+
+
+class TestHypothesisBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = HypothesisBuffer()
+
+    def test_first_hypothesis_is_not_committed(self):
+        committed = self.buffer.insert(words((0.0, 0.5, " And"), (0.5, 1.0, " so")))
+        self.assertEqual(committed, [])
+        self.assertEqual(len(self.buffer.pending), 2)
+
+    def test_agreeing_prefix_is_committed(self):
+        self.buffer.insert(words((0.0, 0.5, " And"), (0.5, 1.0, " so"), (1.0, 1.2, " my")))
+        committed = self.buffer.insert(words((0.0, 0.5, " And"), (0.5, 1.0, " so,"), (1.0, 1.3, " mine")))
+
+        self.assertEqual([w.word for w in committed], [" And", " so,"])
+        self.assertEqual(self.buffer.committed_end, 1.0)
+        self.assertEqual([w.word for w in self.buffer.pending], [" mine"])
+
+    def test_words_before_committed_audio_are_dropped(self):
+        self.buffer.insert(words((0.0, 0.5, " And"), (0.5, 1.0, " so")))
+        self.buffer.insert(words((0.0, 0.5, " And"), (0.5, 1.0, " so")))
+        self.buffer.insert(words((0.1, 0.5, " And"), (1.0, 1.5, " my"), (1.5, 2.0, " fellow")))
+        committed = self.buffer.insert(words((1.0, 1.5, " my"), (1.5, 2.0, " fellow")))
+        self.assertEqual([w.word for w in committed], [" my", " fellow"])
+
+    def test_repeated_committed_words_are_dropped(self):
+        self.buffer.insert(words((0.0, 0.5, " ask"), (0.5, 1.0, " not")))
+        self.buffer.insert(words((0.0, 0.5, " ask"), (0.5, 1.0, " not")))
+        self.buffer.insert(words((1.0, 1.2, " not"), (1.2, 1.5, " what")))
+        committed = self.buffer.insert(words((1.0, 1.5, " what")))
+        self.assertEqual([w.word for w in committed], [" what"])
+
+    def test_clear_drops_pending_words(self):
+        self.buffer.insert(words((0.0, 0.5, " And")))
+        self.buffer.clear()
+        self.assertEqual(self.buffer.insert(words((0.0, 0.5, " And"))), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
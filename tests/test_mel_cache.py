@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+from faster_whisper.feature_extractor import FeatureExtractor
+
+from whisper_live.mel_cache import LogMelCache
+
+
+class TestLogMelCache(unittest.TestCase):
+    def setUp(self):
+        self.feature_extractor = FeatureExtractor()
+        self.cache = LogMelCache()
+        rng = np.random.default_rng(0)
+        self.stream = (rng.standard_normal(16000 * 8) * 0.1).astype(np.float32)
+
+    def assert_features_match(self, start, end):
+        audio = self.stream[start:end]
+        expected = self.feature_extractor(audio)
+        features = self.cache(self.feature_extractor, audio, start)
+        self.assertEqual(features.shape, expected.shape)
+        np.testing.assert_allclose(features, expected, atol=1e-5)
+
+    def test_matches_feature_extractor(self):
+        self.assert_features_match(0, 16000)
+
+    def test_growing_window_reuses_frames(self):
+        self.assert_features_match(0, 16000)
+        computed = self.cache.computed
+        self.assert_features_match(0, 20000)
+        self.assertEqual(self.cache.computed - computed, 25)
+        self.assertGreater(self.cache.reused, 0)
+
+    def test_window_moving_forward(self):
+        self.assert_features_match(0, 32000)
+        self.assert_features_match(16320, 48000)
+        self.assertGreater(self.cache.reused, 0)
+
+    def test_window_start_not_aligned_with_cached_frames(self):
+        self.assert_features_match(0, 32000)
+        self.assert_features_match(16001, 48000)
+
+    def test_align_chunk(self):
+        self.assertEqual(LogMelCache.align_chunk(1000, 5000, 16000, 160), 960)
+        self.assertEqual(LogMelCache.align_chunk(100, 5000, 16050, 160), 110)
+        self.assertEqual(LogMelCache.align_chunk(0, 5000, 16003, 160), 157)
+        self.assertEqual(LogMelCache.align_chunk(0, 50, 16003, 160), 50)
+        self.assertEqual(LogMelCache.align_chunk(320, 5000, 0, 160), 320)
+
+    def test_unaligned_speech_chunks_reuse_frames(self):
+        # windows starting wherever the committed transcript ends, with the speech starting a bit later
+        hop = self.feature_extractor.hop_length
+        for offset, speech_start, end in [(0, 1234, 32000), (8011, 1579, 48000), (24007, 4321, 64000)]:
+            start = LogMelCache.align_chunk(speech_start, end - offset, offset, hop)
+            self.assertEqual((offset + start) % hop, 0)
+            computed, reused = self.cache.computed, self.cache.reused
+            self.assert_features_match(offset + start, end)
+        self.assertGreater(self.cache.reused - reused, self.cache.computed - computed)
+
+    def test_short_windows(self):
+        for end in [100, 250, 450]:
+            self.assert_features_match(0, end)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from whisper_live.bench.micro import SESSION_BENCHMARKS, bench_update_segments, make_session, run_benchmarks
+
+
+class TestMicroBenchmarks(unittest.TestCase):
+    def test_make_session(self):
+        session = make_session(60)
+        self.assertEqual(len(session.transcript), 11)
+        self.assertAlmostEqual(session.audio_buffer.end / 16000, 60, delta=0.3)
+        self.assertAlmostEqual(session.get_pending_duration(), 3.0)
+
+    def test_update_segments_keeps_the_session_length(self):
+        session = make_session(60)
+        run = bench_update_segments(session)
+        for _ in range(10):
+            run()
+        self.assertEqual(len(session.transcript), 11)
+        self.assertEqual(session.get_pending_duration(), 3.0)
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(durations=[10, 20], names=list(SESSION_BENCHMARKS), repeat=1)
+        self.assertEqual(len(results), 2 * len(SESSION_BENCHMARKS))
+        self.assertEqual({r["session_duration"] for r in results}, {10, 20})
+        self.assertTrue(all(r["us_per_call"] > 0 for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import threading
+import time
+import unittest
+
+from whisper_live.model_pool import ModelPool
+
+
+class TestModelPool(unittest.TestCase):
+    def test_lease_returns_model(self):
+        pool = ModelPool(["model"])
+        with pool.lease() as model:
+            self.assertEqual(model, "model")
+            self.assertEqual(pool.get_metrics()["in_use"], 1)
+        self.assertEqual(pool.get_metrics()["in_use"], 0)
+
+    def test_model_is_returned_on_exception(self):
+        pool = ModelPool(["model"])
+        with self.assertRaises(RuntimeError):
+            with pool.lease():
+                raise RuntimeError("inference failed")
+        with pool.lease() as model:
+            self.assertEqual(model, "model")
+
+    def test_concurrent_leases(self):
+        pool = ModelPool(["a", "b"])
+        leased = []
+        barrier = threading.Barrier(2, timeout=5)
+
+        def worker():
+            with pool.lease() as model:
+                leased.append(model)
+                barrier.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(leased), ["a", "b"])
+
+    def test_wait_metrics(self):
+        pool = ModelPool(["model"])
+        leased = threading.Event()
+
+        def hold():
+            with pool.lease():
+                leased.set()
+                time.sleep(0.1)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        leased.wait(timeout=5)
+        with pool.lease():
+            pass
+        thread.join()
+
+        metrics = pool.get_metrics()
+        self.assertEqual(metrics["leases"], 2)
+        self.assertGreater(metrics["max_wait"], 0.05)
+        self.assertAlmostEqual(metrics["mean_wait"], metrics["total_wait"] / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
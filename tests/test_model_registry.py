@@ -0,0 +1,98 @@
+import threading
+import unittest
+
+from whisper_live.model_registry import ModelRegistry
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.loaded = []
+
+    def loader(self, name, size=100):
+        def load():
+            self.loaded.append(name)
+            return f"model-{name}", size
+        return load
+
+    def test_same_key_is_loaded_once(self):
+        registry = ModelRegistry()
+        first = registry.acquire(("small", "cpu", "int8"), self.loader("small"))
+        second = registry.acquire(("small", "cpu", "int8"), self.loader("small"))
+        self.assertIs(first, second)
+        self.assertEqual(self.loaded, ["small"])
+        metrics = registry.get_metrics()
+        self.assertEqual(metrics["references"], 2)
+        self.assertEqual(metrics["hits"], 1)
+
+    def test_different_keys_are_loaded_separately(self):
+        registry = ModelRegistry()
+        registry.acquire(("small", "cpu", "int8"), self.loader("small-cpu"))
+        registry.acquire(("small", "cuda", "float16"), self.loader("small-cuda"))
+        self.assertEqual(self.loaded, ["small-cpu", "small-cuda"])
+
+    def test_unused_model_stays_loaded_without_budget(self):
+        registry = ModelRegistry()
+        registry.acquire("small", self.loader("small"))
+        registry.release("small")
+        registry.acquire("small", self.loader("small"))
+        self.assertEqual(self.loaded, ["small"])
+
+    def test_least_recently_used_model_is_evicted(self):
+        registry = ModelRegistry(max_memory=250)
+        for name in ["tiny", "base"]:
+            registry.acquire(name, self.loader(name))
+            registry.release(name)
+        registry.acquire("tiny", self.loader("tiny"))
+        registry.release("tiny")
+        registry.acquire("small", self.loader("small"))
+
+        self.assertIn("tiny", registry.entries)
+        self.assertNotIn("base", registry.entries)
+        self.assertEqual(registry.get_metrics()["evictions"], 1)
+
+    def test_models_in_use_are_not_evicted(self):
+        registry = ModelRegistry(max_memory=150)
+        registry.acquire("tiny", self.loader("tiny"))
+        registry.acquire("base", self.loader("base"))
+        self.assertEqual(registry.get_memory(), 200)
+
+        registry.release("tiny")
+        self.assertNotIn("tiny", registry.entries)
+        self.assertIn("base", registry.entries)
+
+    def test_failed_load_is_not_cached(self):
+        registry = ModelRegistry()
+
+        def fail():
+            raise RuntimeError("download failed")
+
+        with self.assertRaises(RuntimeError):
+            registry.acquire("small", fail)
+        self.assertEqual(registry.acquire("small", self.loader("small")), "model-small")
+
+    def test_concurrent_acquire_waits_for_load(self):
+        registry = ModelRegistry()
+        loading = threading.Event()
+        release_load = threading.Event()
+        models = []
+
+        def slow_load():
+            loading.set()
+            release_load.wait(timeout=5)
+            return "model", 100
+
+        thread = threading.Thread(target=lambda: models.append(registry.acquire("small", slow_load)))
+        thread.start()
+        loading.wait(timeout=5)
+        waiter = threading.Thread(target=lambda: models.append(registry.acquire("small", self.loader("small"))))
+        waiter.start()
+        release_load.set()
+        thread.join()
+        waiter.join()
+
+        self.assertEqual(models, ["model", "model"])
+        self.assertEqual(self.loaded, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from whisper_live.offline import write_transcript
+from whisper_live.transcriber import Segment
+
+
+def make_segment(start, end, text):
+    return Segment(id=1, seek=0, start=start, end=end, text=text, tokens=[], avg_logprob=0.0,
+                   compression_ratio=1.0, no_speech_prob=0.0, words=None, temperature=0.0)
+
+
+class TestWriteTranscript(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.segments = [make_segment(0.0, 1.5, " ask not"), make_segment(1.5, 3.0, " what your country")]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_creates_the_output_directory(self):
+        for output_format in ("txt", "srt", "json"):
+            output_file = os.path.join(self.directory, output_format, "jfk")
+            write_transcript(self.segments, output_file, output_format)
+            self.assertTrue(os.path.isfile(f"{output_file}.{output_format}"))
+
+    def test_file_name_without_directory(self):
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        try:
+            write_transcript(self.segments, "transcript", "srt")
+        finally:
+            os.chdir(cwd)
+        with open(os.path.join(self.directory, "transcript.srt"), encoding="utf-8") as f:
+            self.assertIn("00:00:01,500 --> 00:00:03,000\nwhat your country\n", f.read())
+
+    def test_json(self):
+        output_file = os.path.join(self.directory, "jfk")
+        write_transcript(self.segments, output_file, "json")
+        with open(f"{output_file}.json", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)[1], {"start": 1.5, "end": 3.0, "text": "what your country"})
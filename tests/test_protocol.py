@@ -0,0 +1,59 @@
+import unittest
+
+from whisper_live.protocol import JSON, MSGPACK, SegmentRevisions, decode_message, encode_message, msgpack
+
+
+def segment(text, start=0.0, end=1.0):
+    return {"start": "{:.3f}".format(start), "end": "{:.3f}".format(end), "text": text}
+
+
+class TestSegmentRevisions(unittest.TestCase):
+    def setUp(self):
+        self.revisions = SegmentRevisions()
+        self.transcript = []
+
+    def test_open_segment_is_revised_when_it_changes(self):
+        updates = self.revisions.update(self.transcript, segment(" And so"))
+        self.assertEqual(updates, [dict(segment(" And so"), id=0, revision=0, completed=False)])
+
+        self.assertEqual(self.revisions.update(self.transcript, segment(" And so")), [])
+
+        updates = self.revisions.update(self.transcript, segment(" And so my", end=1.5))
+        self.assertEqual(updates, [dict(segment(" And so my", end=1.5), id=0, revision=1, completed=False)])
+
+    def test_completed_segments_are_sent_once(self):
+        self.revisions.update(self.transcript, segment(" And so my fellow"))
+        self.transcript += [segment(" And so my fellow Americans,"), segment(" ask not", 2.0, 3.0)]
+
+        updates = self.revisions.update(self.transcript, segment(" what your", 3.0, 4.0))
+        self.assertEqual([(u["id"], u["revision"], u["completed"]) for u in updates],
+                         [(0, 1, True), (1, 0, True), (2, 0, False)])
+
+        updates = self.revisions.update(self.transcript, segment(" what your country", 3.0, 4.5))
+        self.assertEqual([(u["id"], u["revision"], u["completed"]) for u in updates], [(2, 1, False)])
+
+    def test_open_segment_is_kept_without_new_output(self):
+        self.revisions.update(self.transcript, segment(" And so"))
+        self.assertEqual(self.revisions.update(self.transcript), [])
+        self.assertEqual(self.revisions.update(self.transcript, segment(" And so")), [])
+
+
+class TestMessageEncoding(unittest.TestCase):
+    def setUp(self):
+        self.message = {"uid": "test_client", "segments": [dict(segment(" ask not"), id=3, revision=1, completed=True)]}
+
+    def test_json(self):
+        encoded = encode_message(self.message, JSON)
+        self.assertIsInstance(encoded, str)
+        self.assertEqual(decode_message(encoded), self.message)
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        encoded = encode_message(self.message, MSGPACK)
+        self.assertIsInstance(encoded, bytes)
+        self.assertLess(len(encoded), len(encode_message(self.message, JSON)))
+        self.assertEqual(decode_message(encoded), self.message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from whisper_live.ring_buffer import AudioRingBuffer
+
+
+class TestAudioRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = AudioRingBuffer(8)
+
+    def test_empty(self):
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(self.buffer.start, 0)
+        self.assertEqual(self.buffer.get(0).shape, (0,))
+
+    def test_write_and_get(self):
+        self.buffer.write(np.arange(5, dtype=np.float32))
+        self.assertEqual(len(self.buffer), 5)
+        np.testing.assert_array_equal(self.buffer.get(0), np.arange(5))
+        np.testing.assert_array_equal(self.buffer.get(2, 4), [2, 3])
+
+    def test_wrap_around(self):
+        self.buffer.write(np.arange(6, dtype=np.float32))
+        self.buffer.write(np.arange(6, 11, dtype=np.float32))
+        self.assertEqual(self.buffer.end, 11)
+        self.assertEqual(self.buffer.start, 3)
+        np.testing.assert_array_equal(self.buffer.get(0), np.arange(3, 11))
+        np.testing.assert_array_equal(self.buffer.get(7), np.arange(7, 11))
+
+    def test_frame_larger_than_capacity(self):
+        self.buffer.write(np.arange(3, dtype=np.float32))
+        self.buffer.write(np.arange(3, 23, dtype=np.float32))
+        self.assertEqual(self.buffer.end, 23)
+        np.testing.assert_array_equal(self.buffer.get(0), np.arange(15, 23))
+
+    def test_get_is_a_view(self):
+        for i in range(10):
+            self.buffer.write(np.array([i, i], dtype=np.float32))
+        chunk = self.buffer.get(14)
+        self.assertTrue(np.shares_memory(chunk, self.buffer.buffer))
+        np.testing.assert_array_equal(chunk, [7, 7, 8, 8, 9, 9])
+
+    def test_view_is_overwritten_after_capacity_minus_its_length(self):
+        self.buffer.write(np.arange(6, dtype=np.float32))
+        chunk = self.buffer.get(0)
+        copy = chunk.copy()
+        self.buffer.write(np.full(8 - len(chunk), -1, dtype=np.float32))
+        np.testing.assert_array_equal(chunk, copy)
+        self.buffer.write(np.full(1, -1, dtype=np.float32))
+        self.assertFalse(np.array_equal(chunk, copy))
+        np.testing.assert_array_equal(copy, np.arange(6))
+
+    def test_offsets_are_clamped(self):
+        self.buffer.write(np.arange(12, dtype=np.float32))
+        np.testing.assert_array_equal(self.buffer.get(-5, 100), np.arange(4, 12))
+        self.assertEqual(self.buffer.get(20).shape, (0,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from whisper_live.send_queue import AsyncSendQueue, SendQueue
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class SlowWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.unblocked = threading.Event()
+        self.sending = threading.Event()
+
+    def send(self, message):
+        self.sending.set()
+        self.unblocked.wait(5)
+        self.sent.append(message)
+
+
+class TestSendQueue(unittest.TestCase):
+    def test_partials_are_coalesced_while_the_client_is_slow(self):
+        websocket = SlowWebSocket()
+        queue = SendQueue(websocket.send)
+        queue.put("ready")
+        websocket.sending.wait(5)
+        # the sender thread is blocked on the first message
+        queue.put("partial 1", final=False)
+        queue.put("final 1")
+        queue.put("partial 2", final=False)
+        queue.put("partial 3", final=False)
+        queue.put("final 2")
+        websocket.unblocked.set()
+        queue.close()
+
+        # only the latest pending partial is kept, all finals are sent in order
+        self.assertEqual(websocket.sent, ["ready", "final 1", "partial 3", "final 2"])
+        metrics = queue.get_metrics()
+        self.assertEqual(metrics["messages_sent"], 4)
+        self.assertEqual(metrics["messages_coalesced"], 2)
+        self.assertGreater(metrics["max_send_latency"], 0.0)
+
+    def test_put_does_not_wait_for_send(self):
+        websocket = SlowWebSocket()
+        queue = SendQueue(websocket.send)
+        queue.put("ready")
+        queue.put("partial", final=False)
+        self.assertEqual(websocket.sent, [])
+        websocket.unblocked.set()
+        queue.close()
+        self.assertEqual(websocket.sent, ["ready", "partial"])
+
+    def test_partials_are_rate_limited(self):
+        sent = []
+        queue = SendQueue(sent.append, min_interval=0.3)
+        queue.put("partial 1", final=False)
+        wait_until(lambda: sent == ["partial 1"])
+        queue.put("partial 2", final=False)
+        queue.put("partial 3", final=False)
+        time.sleep(0.05)
+        self.assertEqual(sent, ["partial 1"])
+
+        wait_until(lambda: len(sent) == 2)
+        self.assertEqual(sent, ["partial 1", "partial 3"])
+        self.assertEqual(queue.get_metrics()["messages_coalesced"], 1)
+
+        # a final is not rate limited, and takes the partial queued before it along
+        queue.put("partial 4", final=False)
+        queue.put("final")
+        wait_until(lambda: len(sent) == 4)
+        self.assertEqual(sent[2:], ["partial 4", "final"])
+        queue.close()
+
+    def test_without_thread_messages_are_sent_immediately(self):
+        sent = []
+        queue = SendQueue(sent.append, start_thread=False)
+        queue.put("partial", final=False)
+        self.assertEqual(sent, ["partial"])
+
+    def test_send_errors_are_logged(self):
+        def send(message):
+            raise ConnectionError("connection lost")
+
+        queue = SendQueue(send)
+        with self.assertLogs(level="ERROR"):
+            queue.put("final")
+            queue.close()
+        self.assertEqual(queue.get_metrics()["messages_sent"], 0)
+
+
+class SlowConnection:
+    def __init__(self):
+        self.sent = []
+        self.unblocked = asyncio.Event()
+
+    async def send(self, message):
+        await self.unblocked.wait()
+        self.sent.append(message)
+
+
+class TestAsyncSendQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_partials_are_coalesced_while_the_client_is_slow(self):
+        connection = SlowConnection()
+        queue = AsyncSendQueue(connection.send, asyncio.get_running_loop())
+        sender = asyncio.create_task(queue.send_messages())
+        queue.put("ready")
+        await asyncio.sleep(0.01)
+        # the sender task is blocked on the first message, the next ones come from an inference thread
+        thread = threading.Thread(target=lambda: [
+            queue.put(message, final=message.startswith("final"))
+            for message in ["partial 1", "final 1", "partial 2", "partial 3", "final 2"]
+        ])
+        thread.start()
+        thread.join()
+        connection.unblocked.set()
+        queue.close()
+        await asyncio.wait_for(sender, timeout=5)
+
+        self.assertEqual(connection.sent, ["ready", "final 1", "partial 3", "final 2"])
+        self.assertEqual(queue.get_metrics()["messages_coalesced"], 2)
+
+    async def test_partials_are_rate_limited(self):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        queue = AsyncSendQueue(send, asyncio.get_running_loop(), min_interval=0.3)
+        sender = asyncio.create_task(queue.send_messages())
+        queue.put("partial 1", final=False)
+        await asyncio.sleep(0.05)
+        queue.put("partial 2", final=False)
+        queue.put("partial 3", final=False)
+        await asyncio.sleep(0.05)
+        self.assertEqual(sent, ["partial 1"])
+
+        await asyncio.sleep(0.4)
+        self.assertEqual(sent, ["partial 1", "partial 3"])
+        queue.close()
+        await asyncio.wait_for(sender, timeout=5)
+
+    async def test_messages_are_dropped_once_sending_fails(self):
+        async def send(message):
+            raise ConnectionError("connection lost")
+
+        queue = AsyncSendQueue(send, asyncio.get_running_loop())
+        sender = asyncio.create_task(queue.send_messages())
+        with self.assertLogs(level="ERROR"):
+            queue.put("final 1")
+            await asyncio.wait_for(sender, timeout=5)
+        queue.put("final 2")
+        self.assertEqual(len(queue.messages), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
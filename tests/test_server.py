@@ -1,6 +1,8 @@
 import subprocess
+import tempfile
 import time
 import json
+import threading
 import unittest
 from unittest import mock
 
@@ -8,7 +10,10 @@ import numpy as np
 import evaluate
 
 from websockets.exceptions import ConnectionClosed
-from whisper_live.server import TranscriptionServer
+from whisper_live.adaptive import AdaptiveScheduler
+from whisper_live.model_registry import ModelRegistry
+from whisper_live.server import TranscriptionServer, ServeClientBase, ServeClientFasterWhisper, ServeClientTensorRT
+from whisper_live.transcriber import StageTimings
 from whisper_live.client import Client, TranscriptionClient, TranscriptionTeeClient
 from whisper.normalizers import EnglishTextNormalizer
 
@@ -66,6 +71,311 @@ class TestServerConnection(unittest.TestCase):
         self.assertNotIn(mock_websocket, self.server.client_manager.clients)
 
 
+class TestAudioFormatNegotiation(unittest.TestCase):
+    def setUp(self):
+        self.server = TranscriptionServer()
+        self.server.backend = "faster_whisper"
+        self.server.initialize_client = mock.MagicMock()
+        self.websocket = mock.MagicMock()
+
+    def connect(self, **options):
+        options = json.dumps(dict(uid="test_client", language="en", task="transcribe", model="tiny.en", **options))
+        self.server.setup_connection(self.websocket, options, None, None, False)
+        return self.server.initialize_client.call_args.args[1]
+
+    def test_requested_format_is_used(self):
+        options = self.connect(audio_format="int16")
+        self.assertEqual(options["audio_format"], "int16")
+
+        self.websocket.recv.return_value = np.array([16384, -32768], dtype=np.int16).tobytes()
+        frame_np = self.server.get_audio_from_websocket(self.websocket)
+        np.testing.assert_array_equal(frame_np, np.array([0.5, -1.0], dtype=np.float32))
+
+    def test_float32_is_used_by_default(self):
+        options = self.connect()
+        self.assertEqual(options["audio_format"], "float32")
+        self.websocket.send.assert_not_called()
+
+    def test_unsupported_format_falls_back_to_float32(self):
+        options = self.connect(audio_format="opus")
+        self.assertEqual(options["audio_format"], "float32")
+        message = json.loads(self.websocket.send.call_args.args[0])
+        self.assertEqual(message["status"], "WARNING")
+
+    def test_protocol_version_1_by_default(self):
+        options = self.connect()
+        self.assertEqual(options["protocol_version"], 1)
+        self.assertEqual(options["message_encoding"], "json")
+
+    def test_latest_protocol_version_is_used(self):
+        options = self.connect(protocol_version=3)
+        self.assertEqual(options["protocol_version"], 2)
+
+    def test_format_is_released_on_cleanup(self):
+        self.connect(audio_format="int16")
+        self.server.cleanup(self.websocket)
+        self.assertNotIn(self.websocket, self.server.audio_formats)
+
+
+class TestSegmentDeltas(unittest.TestCase):
+    def setUp(self):
+        self.websocket = mock.MagicMock()
+        self.client = ServeClientBase("test_client", self.websocket, protocol_version=2, start_thread=False)
+
+    def sent_segments(self):
+        return json.loads(self.websocket.send.call_args.args[0])["segments"]
+
+    def test_only_changed_segments_are_sent(self):
+        self.client.transcript = [{"start": "0.000", "end": "1.000", "text": " And so"}]
+        self.client.send_transcription_to_client(self.client.prepare_segments({"text": " my fellow"}))
+        self.assertEqual([(s["id"], s["completed"]) for s in self.sent_segments()], [(0, True), (1, False)])
+
+        self.client.send_transcription_to_client(self.client.prepare_segments({"text": " my fellow Americans"}))
+        self.assertEqual(self.sent_segments(), [{"text": " my fellow Americans", "id": 1, "revision": 1,
+                                                 "completed": False}])
+        self.assertEqual(self.client.prepare_segments({"text": " my fellow Americans"}), [])
+
+    def test_unchanged_segments_are_not_sent_again(self):
+        client = ServeClientBase("test_client", self.websocket, start_thread=False)
+        client.transcript = [{"text": "ask not"}]
+        for _ in range(3):
+            client.send_transcription_to_client(client.prepare_segments({"text": "what your"}))
+        self.assertEqual(self.websocket.send.call_count, 1)
+        self.assertEqual(client.get_metrics()["suppressed_updates"], 2)
+
+    def test_protocol_version_1_resends_last_segments(self):
+        client = ServeClientBase("test_client", self.websocket)
+        client.transcript = [{"text": str(i)} for i in range(12)]
+        segments = client.prepare_segments({"text": "12"})
+        self.assertEqual([s["text"] for s in segments], [str(i) for i in range(2, 13)])
+
+
+class TestStageTimings(unittest.TestCase):
+    @mock.patch.object(ServeClientFasterWhisper, "MODEL_REGISTRY")
+    def test_stage_timings_are_aggregated_per_session(self, mock_registry):
+        def transcribe(audio, **kwargs):
+            timings = StageTimings()
+            timings.seconds["encode"] = 0.5
+            timings.counts.update(calls=1, windows=1, generate_calls=2, fallbacks=1)
+            info = mock.MagicMock(language_probability=1.0, stage_timings=timings)
+            return [], info
+
+        transcriber = mock.MagicMock()
+        transcriber.transcribe.side_effect = transcribe
+        mock_registry.acquire.return_value.lease.return_value.__enter__.return_value = transcriber
+        client = ServeClientFasterWhisper(mock.MagicMock(), language="en", client_uid="test_client",
+                                          model="tiny", start_thread=False, stage_timings=True)
+        for _ in range(2):
+            client.transcribe_audio(np.zeros(16000, dtype=np.float32))
+
+        self.assertTrue(transcriber.transcribe.call_args.kwargs["stage_timings"])
+        timings = client.get_metrics()["stage_timings"]
+        self.assertEqual(timings["seconds"]["encode"], 1.0)
+        self.assertEqual((timings["calls"], timings["generate_calls"], timings["fallbacks"]), (2, 4, 2))
+
+    @mock.patch.object(ServeClientFasterWhisper, "MODEL_REGISTRY")
+    def test_stage_timings_are_off_by_default(self, mock_registry):
+        transcriber = mock.MagicMock()
+        transcriber.transcribe.return_value = ([], None)
+        mock_registry.acquire.return_value.lease.return_value.__enter__.return_value = transcriber
+        client = ServeClientFasterWhisper(mock.MagicMock(), language="en", client_uid="test_client",
+                                          model="tiny", start_thread=False)
+        client.transcribe_audio(np.zeros(16000, dtype=np.float32))
+
+        self.assertFalse(transcriber.transcribe.call_args.kwargs["stage_timings"])
+        self.assertNotIn("stage_timings", client.get_metrics())
+
+
+class TestModelPreloading(unittest.TestCase):
+    def setUp(self):
+        self.server = TranscriptionServer()
+        self.model_path = tempfile.mkdtemp()
+
+    @mock.patch.object(ServeClientFasterWhisper, "preload")
+    def test_single_model_is_preloaded(self, mock_preload):
+        self.server.configure(
+            backend="faster_whisper", faster_whisper_custom_model_path=self.model_path, single_model=True)
+        mock_preload.assert_called_once_with(self.model_path, 1, False)
+
+    @mock.patch.object(ServeClientFasterWhisper, "preload")
+    def test_no_preloading_without_single_model(self, mock_preload):
+        self.server.configure(
+            backend="faster_whisper", faster_whisper_custom_model_path=self.model_path, single_model=False)
+        mock_preload.assert_not_called()
+
+    @mock.patch.object(ServeClientFasterWhisper, "preload_shared")
+    def test_models_are_preloaded_by_name(self, mock_preload_shared):
+        self.server.configure(backend="faster_whisper", num_workers=2, preload_models=["small", "medium"])
+        self.assertEqual(mock_preload_shared.call_args_list, [mock.call("small", 2), mock.call("medium", 2)])
+
+    @mock.patch.object(ServeClientFasterWhisper, "load_shared_model", return_value=("pool", 1))
+    def test_preloaded_model_stays_in_the_registry(self, mock_load_shared_model):
+        with mock.patch.object(ServeClientFasterWhisper, "MODEL_REGISTRY", ModelRegistry()) as registry:
+            ServeClientFasterWhisper.preload_shared("small", num_workers=2)
+            key = ServeClientFasterWhisper.get_model_key("small", mock_load_shared_model.call_args.args[1])
+            self.assertEqual(registry.acquire(key, None), "pool")
+        mock_load_shared_model.assert_called_once()
+        self.assertEqual(mock_load_shared_model.call_args.args[2], 2)
+
+    @mock.patch("whisper_live.server.BatchVoiceActivityDetector")
+    @mock.patch.object(ServeClientTensorRT, "warmup_model")
+    @mock.patch("whisper_live.server.WhisperTRTLLM", create=True)
+    def test_tensorrt_engine_is_reused_by_clients(self, mock_trt, mock_warmup, mock_vad):
+        self.server.configure(backend="tensorrt", whisper_tensorrt_path=self.model_path, single_model=False)
+        self.assertEqual(mock_warmup.call_count, 1)
+        engine = mock_warmup.call_args.args[0]
+
+        client = ServeClientTensorRT(mock.MagicMock(), model=self.model_path, start_thread=False)
+        self.assertIs(client.transcriber, engine)
+        self.assertEqual(mock_warmup.call_count, 1)
+        client.cleanup()
+        client = ServeClientTensorRT(mock.MagicMock(), model=self.model_path, start_thread=False)
+        self.assertIs(client.transcriber, engine)
+        self.assertEqual(mock_trt.call_count, 1)
+        client.cleanup()
+        ServeClientTensorRT.IDLE_MODELS.clear()
+
+    @mock.patch("whisper_live.server.BatchVoiceActivityDetector")
+    @mock.patch.object(ServeClientTensorRT, "warmup_model")
+    @mock.patch("whisper_live.server.WhisperTRTLLM", create=True)
+    def test_tensorrt_engine_is_released_after_the_pass_in_flight(self, mock_trt, mock_warmup, mock_vad):
+        client = ServeClientTensorRT(mock.MagicMock(), model=self.model_path, start_thread=False)
+        engine = client.transcriber
+        engine.log_mel_spectrogram.return_value = ("mel", 1.0)
+        transcribing, finish = threading.Event(), threading.Event()
+        engine.transcribe.side_effect = lambda *args, **kwargs: transcribing.set() or finish.wait(5) and "text"
+        # a pass run by the async server on its executor, with no transcription thread to join
+        results = []
+        inference = threading.Thread(target=lambda: results.append(client.transcribe_audio(np.zeros(16000))))
+        inference.start()
+        transcribing.wait(5)
+        cleanup = threading.Thread(target=client.cleanup)
+        cleanup.start()
+        cleanup.join(0.1)
+        self.assertTrue(cleanup.is_alive())
+        self.assertNotIn(engine, ServeClientTensorRT.IDLE_MODELS.get(client.model_key, []))
+
+        finish.set()
+        inference.join(5)
+        cleanup.join(5)
+        self.assertEqual(results, ["text"])
+        self.assertIn(engine, ServeClientTensorRT.IDLE_MODELS[client.model_key])
+        # a pass starting after cleanup does not use the released engine
+        self.assertEqual(client.transcribe_audio(np.zeros(16000)), "")
+        ServeClientTensorRT.IDLE_MODELS.clear()
+
+    @mock.patch.object(ServeClientFasterWhisper, "preload", side_effect=RuntimeError("out of memory"))
+    def test_preloading_failure_is_logged(self, mock_preload):
+        with self.assertLogs(level="ERROR"):
+            self.server.configure(
+                backend="faster_whisper", faster_whisper_custom_model_path=self.model_path, single_model=True)
+
+
+class TestSharedModels(unittest.TestCase):
+    @mock.patch.object(ServeClientFasterWhisper, "warmup_model")
+    @mock.patch.object(ServeClientFasterWhisper, "load_model")
+    def test_shared_model_has_a_slot_per_worker(self, mock_load_model, mock_warmup):
+        pool, _ = ServeClientFasterWhisper.load_shared_model("small", "cpu", num_workers=3)
+        mock_load_model.assert_called_once_with("small", "cpu", num_workers=3)
+        mock_warmup.assert_called_once_with(mock_load_model.return_value)
+        self.assertEqual(pool.size, 3)
+
+    def test_shared_models_default_to_a_worker_per_client(self):
+        server = TranscriptionServer()
+        server.configure(backend="faster_whisper")
+        self.assertEqual(server.num_workers, server.client_manager.max_clients)
+
+        server = TranscriptionServer()
+        server.configure(backend="faster_whisper", num_workers=2, replicate_model=True)
+        self.assertEqual(server.num_workers, 2)
+        self.assertFalse(server.replicate_model)
+
+
+class TestServeClientWakeup(unittest.TestCase):
+    def setUp(self):
+        self.client = ServeClientBase("test_client", mock.MagicMock(), min_new_audio=0.5)
+        self.client.pending_audio_timeout = 0.1
+
+    def wait_in_thread(self):
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(ready=self.client.wait_for_audio()))
+        thread.start()
+        return thread, result
+
+    def test_wakes_up_once_enough_audio_arrived(self):
+        thread, result = self.wait_in_thread()
+        self.client.add_frames(np.zeros(8000, dtype=np.float32))
+        thread.join(timeout=0.3)
+        self.assertTrue(thread.is_alive())
+
+        self.client.add_frames(np.zeros(8000, dtype=np.float32))
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(result["ready"])
+
+    def test_pending_chunk_is_processed_again_after_timeout(self):
+        self.client.add_frames(np.zeros(16000, dtype=np.float32))
+        self.client.get_audio_chunk_for_processing()
+        self.assertFalse(self.client.has_audio_to_process())
+        self.assertTrue(self.client.wait_for_audio())
+
+    def test_cleanup_wakes_up_thread(self):
+        thread, result = self.wait_in_thread()
+        self.client.cleanup()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(result["ready"])
+
+
+class TestServeClientWindowReuse(unittest.TestCase):
+    def setUp(self):
+        self.client = ServeClientBase("test_client", mock.MagicMock())
+        self.client.transcribe_audio = mock.MagicMock(side_effect=lambda audio: f"result {len(audio)}")
+        self.client.add_frames(np.zeros(16000, dtype=np.float32))
+
+    def transcribe_pending_chunk(self):
+        input_bytes, _ = self.client.get_audio_chunk_for_processing()
+        return self.client.transcribe_window(input_bytes)
+
+    def test_same_window_reuses_result(self):
+        self.assertEqual(self.transcribe_pending_chunk(), "result 16000")
+        self.assertEqual(self.transcribe_pending_chunk(), "result 16000")
+        self.assertEqual(self.client.transcribe_audio.call_count, 1)
+        self.assertEqual(self.client.get_metrics(), {"passes": 2, "skipped_passes": 1, "suppressed_updates": 0})
+
+    def test_new_audio_is_transcribed(self):
+        self.transcribe_pending_chunk()
+        self.client.add_frames(np.zeros(4000, dtype=np.float32))
+        self.assertEqual(self.transcribe_pending_chunk(), "result 20000")
+        self.assertEqual(self.client.transcribe_audio.call_count, 2)
+
+    def test_committed_audio_is_transcribed(self):
+        self.transcribe_pending_chunk()
+        self.client.timestamp_offset = 0.5
+        self.assertEqual(self.transcribe_pending_chunk(), "result 8000")
+        self.assertEqual(self.client.transcribe_audio.call_count, 2)
+
+    def test_model_gets_a_copy_of_the_window(self):
+        received = []
+
+        def transcribe_audio(audio):
+            # the socket thread keeps writing while the pass runs, and wraps around the window
+            self.client.add_frames(np.ones(self.client.audio_buffer.capacity - len(audio) + 1, dtype=np.float32))
+            received.append(audio)
+
+        self.client.transcribe_audio = transcribe_audio
+        self.transcribe_pending_chunk()
+        np.testing.assert_array_equal(received[0], np.zeros(16000))
+
+    @mock.patch("whisper_live.server.time.time", side_effect=[0.0, 2.0])
+    def test_adaptive_scheduler_paces_passes(self, mock_time):
+        self.client.scheduler = AdaptiveScheduler(target_latency=1.0)
+        self.transcribe_pending_chunk()
+        self.assertEqual(self.client.min_new_audio, 2.0)
+        self.assertEqual(self.client.max_window_duration, 12.5)
+        self.assertFalse(self.client.has_audio_to_process())
+
+
 class TestServerInferenceAccuracy(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -0,0 +1,157 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from whisper_live.transcriber import (
+    Segment, StageTimings, TranscriptionInfo, TranscriptionOptions, WhisperModel, _expand_batch_argument,
+    pack_speech_chunks,
+)
+
+
+def make_options(**kwargs):
+    options = dict(
+        beam_size=5, best_of=5, patience=1, length_penalty=1, repetition_penalty=1, no_repeat_ngram_size=0,
+        log_prob_threshold=-1.0, no_speech_threshold=0.6, compression_ratio_threshold=2.4,
+        condition_on_previous_text=True, prompt_reset_on_temperature=0.5, temperatures=[0.0, 0.2, 0.4, 0.6],
+        initial_prompt=None, prefix=None, suppress_blank=True, suppress_tokens=[-1], without_timestamps=False,
+        max_initial_timestamp=1.0, word_timestamps=False, prepend_punctuations="", append_punctuations="",
+        max_new_tokens=None, clip_timestamps="0", hallucination_silence_threshold=None,
+    )
+    options.update(kwargs)
+    return TranscriptionOptions(**options)
+
+
+def make_result(score):
+    return mock.MagicMock(sequences_ids=[[1, 2, 3]], scores=[score], no_speech_prob=0.0)
+
+
+class TestGenerateWithFallback(unittest.TestCase):
+    def setUp(self):
+        self.model = object.__new__(WhisperModel)
+        self.model.model = mock.MagicMock()
+        self.model.logger = mock.MagicMock()
+        self.model.max_length = 448
+        self.model.time_precision = 0.02
+        self.tokenizer = mock.MagicMock()
+        self.tokenizer.decode.return_value = "ask not what your country can do for you"
+        # only the 0.4 temperature passes the log probability threshold
+        self.scores = {0.0: -5.0, 0.2: -5.0, 0.4: -0.1, 0.6: -0.2}
+
+    def generate(self, encoder_output, prompts, asynchronous=False, **kwargs):
+        temperature = kwargs.get("sampling_temperature", 0.0)
+        result = make_result(self.scores[temperature])
+        if asynchronous:
+            return [mock.MagicMock(result=mock.MagicMock(return_value=result))]
+        return [result]
+
+    def test_sequential_fallback(self):
+        self.model.model.generate.side_effect = self.generate
+        result, _, temperature, _ = self.model.generate_with_fallback(
+            "encoder_output", [1], self.tokenizer, make_options())
+        self.assertEqual(temperature, 0.4)
+        self.assertEqual(self.model.model.generate.call_count, 3)
+
+    def test_parallel_fallback_submits_all_temperatures_at_once(self):
+        self.model.model.generate.side_effect = self.generate
+        result, _, temperature, _ = self.model.generate_with_fallback(
+            "encoder_output", [1], self.tokenizer, make_options(parallel_fallback=True))
+        self.assertEqual(temperature, 0.4)
+        self.assertEqual(self.model.model.generate.call_count, 4)
+        async_calls = [c for c in self.model.model.generate.call_args_list if c.kwargs.get("asynchronous")]
+        self.assertEqual([c.kwargs["sampling_temperature"] for c in async_calls], [0.2, 0.4, 0.6])
+        for call in self.model.model.generate.call_args_list:
+            self.assertEqual(call.args[0], "encoder_output")
+
+    def test_fallbacks_are_counted(self):
+        self.model.model.generate.side_effect = self.generate
+        timings = StageTimings()
+        self.model.generate_with_fallback("encoder_output", [1], self.tokenizer, make_options(), timings)
+        self.model.generate_with_fallback(
+            "encoder_output", [1], self.tokenizer, make_options(parallel_fallback=True), timings)
+        self.assertEqual(timings.counts["generate_calls"], 3 + 4)
+        self.assertEqual(timings.counts["fallbacks"], 2 + 2)
+
+    def test_parallel_fallback_not_used_when_first_temperature_passes(self):
+        self.scores[0.0] = -0.1
+        self.model.model.generate.side_effect = self.generate
+        _, _, temperature, _ = self.model.generate_with_fallback(
+            "encoder_output", [1], self.tokenizer, make_options(parallel_fallback=True))
+        self.assertEqual(temperature, 0.0)
+        self.assertEqual(self.model.model.generate.call_count, 1)
+
+    def test_parallel_fallback_when_all_temperatures_fail(self):
+        self.scores.update({0.4: -5.0, 0.6: -3.0})
+        self.model.model.generate.side_effect = self.generate
+        _, avg_logprob, temperature, _ = self.model.generate_with_fallback(
+            "encoder_output", [1], self.tokenizer, make_options(parallel_fallback=True))
+        self.assertEqual(temperature, 0.6)
+        self.assertAlmostEqual(avg_logprob, -3.0 * 3 / 4)
+
+
+class TestStageTimings(unittest.TestCase):
+    def test_measure_and_merge(self):
+        timings = StageTimings()
+        with timings.measure("encode"):
+            pass
+        timings.counts["windows"] += 1
+        total = StageTimings()
+        total.merge(timings)
+        total.merge(timings)
+        self.assertEqual(total.counts["windows"], 2)
+        self.assertEqual(total.seconds["encode"], 2 * timings.seconds["encode"])
+        self.assertEqual(set(total.to_dict()["seconds"]), set(StageTimings.STAGES))
+
+
+class TestExpandBatchArgument(unittest.TestCase):
+    def test_per_input_values(self):
+        self.assertEqual(_expand_batch_argument(["hello", None], 2, (str, list)), ["hello", None])
+        self.assertEqual(_expand_batch_argument([[1, 2], [3]], 2, (str, list)), [[1, 2], [3]])
+
+    def test_shared_values(self):
+        self.assertEqual(_expand_batch_argument("hello", 2, (str, list)), ["hello", "hello"])
+        self.assertEqual(_expand_batch_argument(None, 2, (str, list)), [None, None])
+
+    def test_token_ids_are_one_prompt(self):
+        self.assertEqual(_expand_batch_argument([50, 51], 2, (str, list)), [[50, 51], [50, 51]])
+        self.assertEqual(_expand_batch_argument([50, 51, 52], 2, (str, list)), [[50, 51, 52]] * 2)
+
+
+class TestTranscribeLong(unittest.TestCase):
+    def test_pack_speech_chunks(self):
+        chunks = [{"start": 0, "end": 10}, {"start": 20, "end": 35}, {"start": 50, "end": 60}, {"start": 70, "end": 100}]
+        windows = pack_speech_chunks(chunks, 30)
+        self.assertEqual(windows, [chunks[:2], chunks[2:3], chunks[3:]])
+
+    @mock.patch("whisper_live.transcriber.get_speech_timestamps")
+    def test_windows_are_transcribed_in_batches(self, mock_speech_timestamps):
+        model = object.__new__(WhisperModel)
+        model.logger = mock.MagicMock()
+        model.feature_extractor = mock.MagicMock(sampling_rate=10, chunk_length=30, n_samples=300)
+        # three windows: speech at 0-20s and 25-35s, then at 40-70s, then at 80-90s
+        mock_speech_timestamps.return_value = [
+            {"start": 0, "end": 200}, {"start": 250, "end": 350}, {"start": 400, "end": 700}, {"start": 800, "end": 900},
+        ]
+
+        def transcribe_batch(audios, **kwargs):
+            # one segment over the second half of every window
+            return [
+                ([Segment(0, 0, len(audio) / 20, len(audio) / 10 - 1, " text", [], 0.0, -0.1, 1.0, 0.0, None)],
+                 TranscriptionInfo("en", 1.0, len(audio) / 10, len(audio) / 10, None, make_options(), None))
+                for audio in audios
+            ]
+
+        model.transcribe_batch = mock.MagicMock(side_effect=transcribe_batch)
+        segments, info = model.transcribe_long(np.zeros(1000, dtype=np.float32), batch_size=2, language="en")
+
+        self.assertEqual([len(c.args[0]) for c in model.transcribe_batch.call_args_list], [2, 1])
+        self.assertEqual(model.transcribe_batch.call_args.kwargs["language"], "en")
+        self.assertEqual([s.id for s in segments], [1, 2, 3])
+        # the segment times are restored to the input audio
+        self.assertEqual([(s.start, s.end) for s in segments], [(15.0, 34.0), (55.0, 69.0), (85.0, 89.0)])
+        self.assertEqual(info.duration, 100.0)
+        self.assertEqual(info.duration_after_vad, 70.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+import scipy.signal
+
+from whisper_live.utils import StreamingResampler, resample_stream
+
+
+def make_stereo(rate, seconds):
+    t = np.arange(int(rate * seconds)) / rate
+    signal = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.1 * np.sin(2 * np.pi * 3000 * t)
+    return (np.stack([signal, signal], axis=1) * 32767).astype(np.int16)
+
+
+class TestStreamingResampler(unittest.TestCase):
+    def resample_in_chunks(self, resampler, frames, chunk_sizes):
+        outputs = []
+        position = 0
+        while position < len(frames):
+            chunk_size = chunk_sizes[len(outputs) % len(chunk_sizes)]
+            outputs.append(resampler(frames[position:position + chunk_size].tobytes()).copy())
+            position += chunk_size
+        outputs.append(resampler.flush())
+        return np.concatenate(outputs)
+
+    def test_chunks_match_resampling_the_whole_stream(self):
+        for rate in [44100, 48000]:
+            frames = make_stereo(rate, 1.5)
+            expected = scipy.signal.resample_poly(frames.mean(axis=1) / 32768, 16000, rate)
+
+            resampler = StreamingResampler(rate, 16000, num_channels=2)
+            output = self.resample_in_chunks(resampler, frames, [4096, 1000, 7, 9000])
+
+            self.assertEqual(output.dtype, np.float32)
+            self.assertEqual(len(output), len(expected))
+            np.testing.assert_allclose(output, expected, atol=1e-6)
+
+    def test_same_rate_only_mixes_down(self):
+        frames = make_stereo(16000, 0.5)
+        resampler = StreamingResampler(16000, 16000, num_channels=2)
+        output = self.resample_in_chunks(resampler, frames, [4096])
+        np.testing.assert_allclose(output, frames.mean(axis=1) / 32768, atol=1e-6)
+
+    def test_resample_stream(self):
+        frames = make_stereo(48000, 0.5)
+        resampled = np.frombuffer(resample_stream(frames.tobytes(), 48000, 16000, 2), dtype=np.int16)
+        self.assertEqual(len(resampled), 8000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 import numpy as np
 from whisper_live.tensorrt_utils import load_audio
-from whisper_live.vad import VoiceActivityDetector
+from whisper_live.vad import BatchVoiceActivityDetector, VoiceActivityDetector, VoiceActivityEndpointer
 
 
 class TestVoiceActivityDetection(unittest.TestCase):
@@ -24,3 +24,57 @@ class TestVoiceActivityDetection(unittest.TestCase):
         audio_tensor = load_audio("assets/jfk.flac")
         is_speech_present = self.vad(audio_tensor)
         self.assertTrue(is_speech_present, "VAD failed to identify speech segment.")
+
+
+class TestBatchVoiceActivityDetection(unittest.TestCase):
+    def setUp(self):
+        self.vad = BatchVoiceActivityDetector()
+
+    def test_streams_keep_their_own_state(self):
+        speech = load_audio("assets/jfk.flac")
+        silence = np.zeros_like(speech)
+        speech_slot = self.vad.allocate_slot()
+        silence_slot = self.vad.allocate_slot()
+
+        results = []
+        for i in range(0, 16000 * 2, 4096):
+            results.append(self.vad.detect_batch(
+                [speech_slot, silence_slot], [speech[i:i + 4096], silence[i:i + 4096]]))
+
+        self.assertTrue(any(is_speech for is_speech, _ in results))
+        self.assertFalse(any(is_silence_speech for _, is_silence_speech in results))
+        self.assertTrue(self.vad.h[:, speech_slot].any())
+
+    def test_released_slot_is_reset(self):
+        slot = self.vad.allocate_slot()
+        self.vad.detect_batch([slot], [load_audio("assets/jfk.flac")[:4096]])
+        self.vad.release_slot(slot)
+        self.assertEqual(self.vad.allocate_slot(), slot)
+        self.assertFalse(self.vad.h[:, slot].any())
+        self.assertFalse(self.vad.c[:, slot].any())
+
+
+class TestVoiceActivityEndpointer(unittest.TestCase):
+    def setUp(self):
+        self.endpointer = VoiceActivityEndpointer(threshold=0.5, min_silence_frames=3)
+
+    def test_leading_silence_ends_speech(self):
+        self.assertEqual([self.endpointer.update(0.1) for _ in range(4)], [None, None, True, None])
+        self.assertFalse(self.endpointer.speech)
+
+    def test_speech_starts_on_first_voiced_frame(self):
+        for _ in range(3):
+            self.endpointer.update(0.0)
+        self.assertFalse(self.endpointer.update(0.9))
+        self.assertTrue(self.endpointer.speech)
+        self.assertIsNone(self.endpointer.update(0.9))
+
+    def test_hysteresis(self):
+        # frames between the two thresholds neither end nor start speech
+        self.assertEqual([self.endpointer.update(0.4) for _ in range(5)], [None] * 5)
+        self.assertTrue(self.endpointer.speech)
+        self.assertEqual([self.endpointer.update(0.1) for _ in range(2)], [None, None])
+        self.assertIsNone(self.endpointer.update(0.9))
+        self.assertEqual([self.endpointer.update(0.1) for _ in range(3)], [None, None, True])
+        self.assertIsNone(self.endpointer.update(0.4))
+        self.assertFalse(self.endpointer.speech)
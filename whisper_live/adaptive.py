@@ -0,0 +1,82 @@
+class AdaptiveScheduler:
+    """
+    Adapts when a session transcribes its audio, and how much audio it keeps, to how fast inference runs.
+
+    The scheduler measures the wall time of every transcription pass, including the time spent waiting for a
+    shared model, so it follows both the speed of the host and the load of the server. From the smoothed pass
+    time `t`, it derives:
+
+    - `min_new_audio`, the new audio a session waits for before its next pass. A partial result is at most
+      `min_new_audio + t` seconds late, so sessions wait for `target_latency - t` seconds of audio. Fast hosts
+      then update more often, down to `min_interval`. A session always waits for at least `t` seconds of audio
+      though, so that it keeps the model busy for at most half of real time: as passes get slower, sessions back
+      off instead of queueing more passes than the server can run.
+    - `max_window`, the longest window transcribed before the oldest audio is dropped. When passes are slower
+      than the target latency, the window shrinks proportionally, down to `min_window`, so that each pass
+      decodes less text.
+    """
+    def __init__(self, target_latency=1.0, min_interval=0.1, max_interval=5.0, min_window=10.0, max_window=25.0,
+                 smoothing=0.3):
+        """
+        Args:
+            target_latency (float, optional): The targeted delay of partial results, in seconds. Defaults to 1.0.
+            min_interval (float, optional): The least new audio between two passes, in seconds. Defaults to 0.1.
+            max_interval (float, optional): The most new audio between two passes, in seconds. Defaults to 5.0.
+            min_window (float, optional): The shortest window kept under load, in seconds. Defaults to 10.0.
+            max_window (float, optional): The longest window kept, in seconds. Defaults to 25.0.
+            smoothing (float, optional): The weight of the last pass in the smoothed pass time. Defaults to 0.3.
+        """
+        self.target_latency = target_latency
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.min_window = min_window
+        self.max_window_duration = max_window
+        self.smoothing = smoothing
+        self.inference_time = None
+        self.audio_duration = 0.0
+        self.total_inference_time = 0.0
+
+    def update(self, inference_time, audio_duration):
+        """
+        Records a transcription pass.
+
+        Args:
+            inference_time (float): The wall time of the pass, in seconds.
+            audio_duration (float): The duration of the transcribed window, in seconds.
+        """
+        if self.inference_time is None:
+            self.inference_time = inference_time
+        else:
+            self.inference_time += self.smoothing * (inference_time - self.inference_time)
+        self.audio_duration += audio_duration
+        self.total_inference_time += inference_time
+
+    def get_min_new_audio(self, default):
+        """
+        Args:
+            default (float): The value to use before the first pass.
+
+        Returns:
+            float: The seconds of new audio to wait for before the next pass.
+        """
+        if self.inference_time is None:
+            return default
+        interval = max(self.target_latency - self.inference_time, self.inference_time)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def get_max_window(self):
+        """
+        Returns:
+            float: The longest window to transcribe, in seconds.
+        """
+        if self.inference_time is None or self.inference_time <= self.target_latency:
+            return self.max_window_duration
+        window = self.max_window_duration * self.target_latency / self.inference_time
+        return max(window, self.min_window)
+
+    def get_real_time_factor(self):
+        """
+        Returns:
+            float: The total pass time divided by the total duration of the transcribed windows.
+        """
+        return self.total_inference_time / self.audio_duration if self.audio_duration else 0.0
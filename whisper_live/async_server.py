@@ -0,0 +1,244 @@
+import asyncio
+import functools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from websockets import serve
+from websockets.exceptions import ConnectionClosed
+
+from whisper_live.audio_format import FLOAT32, decode_audio
+from whisper_live.batching import VoiceActivityRequest
+from whisper_live.send_queue import AsyncSendQueue
+from whisper_live.server import TranscriptionServer
+
+
+class AsyncWebSocket:
+    """
+    Wraps an asyncio websocket connection for the transcription sessions.
+
+    Sessions send their messages from inference threads through the blocking `send` and `close` interface
+    of a sync websocket connection. Here, messages are only queued in `send_queue`, and a task on the event
+    loop sends them in order. The session queues its results there too, so that partial results are
+    coalesced and rate limited like with a sender thread. Receiving is left to the event loop through the
+    `recv` coroutine.
+    """
+    def __init__(self, websocket, loop):
+        """
+        Must be called on the event loop thread.
+
+        Args:
+            websocket: The asyncio websocket connection.
+            loop (asyncio.AbstractEventLoop): The event loop serving the connection.
+        """
+        self.websocket = websocket
+        self.loop = loop
+        self.send_queue = AsyncSendQueue(websocket.send, loop)
+        self.sender = loop.create_task(self.send_messages())
+
+    async def recv(self):
+        return await self.websocket.recv()
+
+    def send(self, message):
+        """
+        Queues a message, can be called from any thread.
+        """
+        self.send_queue.put(message)
+
+    def close(self):
+        """
+        Closes the connection once the queued messages are sent, can be called from any thread.
+        """
+        self.send_queue.close()
+
+    async def send_messages(self):
+        await self.send_queue.send_messages()
+        await self.websocket.close()
+
+
+class AsyncTranscriptionServer(TranscriptionServer):
+    """
+    Transcription server running all connections on a single asyncio event loop.
+
+    Receiving audio, voice activity detection and sending results happen on the event loop, and
+    sessions do not start a transcription thread. Instead, whenever a session has enough new audio,
+    one pass of its transcription loop (`process_audio_chunk`) runs on a thread pool shared by all
+    connections, so the number of threads is bounded by `max_inference_workers` whatever the number
+    of connected clients.
+    """
+    def __init__(self):
+        super().__init__()
+        self.start_client_threads = False
+        self.loop = None
+        self.executor = None
+        self.transcriptions = {}
+        self.retry_timers = {}
+
+    async def get_audio_from_websocket(self, websocket):
+        """
+        Receives audio buffer from websocket and creates a numpy array out of it.
+
+        Args:
+            websocket (AsyncWebSocket): The websocket to receive audio from.
+
+        Returns:
+            A numpy array containing the audio.
+        """
+        frame_data = await websocket.recv()
+        if frame_data == b"END_OF_AUDIO":
+            return False
+        return decode_audio(frame_data, self.audio_formats.get(websocket, FLOAT32))
+
+    async def handle_new_connection(self, websocket, faster_whisper_custom_model_path,
+                                    whisper_tensorrt_path, trt_multilingual):
+        try:
+            logging.info("New client connected")
+            options = await websocket.recv()
+            # loading a model blocks, keep it off the event loop
+            return await self.loop.run_in_executor(None, functools.partial(
+                self.setup_connection, websocket, options, faster_whisper_custom_model_path,
+                whisper_tensorrt_path, trt_multilingual
+            ))
+        except json.JSONDecodeError:
+            logging.error("Failed to decode JSON from client")
+            return False
+        except ConnectionClosed:
+            logging.info("Connection closed by client")
+            return False
+        except Exception as e:
+            logging.error(f"Error during new connection initialization: {str(e)}")
+            return False
+
+    async def process_audio_frames(self, websocket):
+        frame_np = await self.get_audio_from_websocket(websocket)
+        client = self.client_manager.get_client(websocket)
+        if frame_np is False:
+            if self.backend == "tensorrt":
+                client.set_eos(True)
+            return False
+
+        if self.backend == "tensorrt":
+            voice_active = await self.voice_activity(websocket, frame_np)
+            if not self.use_vad or voice_active:
+                client.add_frames(frame_np)
+        else:
+            client.add_frames(frame_np)
+        self.schedule_transcription(client)
+        return True
+
+    async def voice_activity(self, websocket, frame_np):
+        """
+        Same as `TranscriptionServer.voice_activity`, waiting for the batched VAD run without blocking the event loop.
+        """
+        speech_prob = await asyncio.wrap_future(
+            self.vad_scheduler.submit(VoiceActivityRequest(self.vad_slots[websocket], frame_np)))
+        return self.update_voice_activity(websocket, speech_prob)
+
+    def schedule_transcription(self, client):
+        """
+        Starts a transcription pass for a client if it has enough new audio.
+
+        At most one pass per client runs at a time. If the client has an uncommitted chunk but no new
+        audio, a pass is scheduled after `pending_audio_timeout` seconds instead, like the wait timeout
+        of the threaded sessions.
+
+        Args:
+            client (ServeClientBase): The session to transcribe.
+        """
+        if client.exit or client in self.transcriptions:
+            return
+        timer = self.retry_timers.pop(client, None)
+        if timer is not None:
+            timer.cancel()
+
+        if client.has_audio_to_process():
+            self.run_transcription(client)
+        elif client.get_pending_duration() >= client.min_audio_duration:
+            self.retry_timers[client] = self.loop.call_later(
+                client.pending_audio_timeout, self.run_transcription, client)
+
+    def run_transcription(self, client):
+        """
+        Runs one transcription pass of a client on the inference executor.
+
+        Args:
+            client (ServeClientBase): The session to transcribe.
+        """
+        self.retry_timers.pop(client, None)
+        if client.exit or client in self.transcriptions:
+            return
+        future = self.loop.run_in_executor(self.executor, client.process_audio_chunk)
+        self.transcriptions[client] = future
+        future.add_done_callback(functools.partial(self.transcription_done, client))
+
+    def transcription_done(self, client, future):
+        del self.transcriptions[client]
+        if not future.cancelled() and future.exception() is not None:
+            logging.error(f"[ERROR]: Failed to transcribe audio chunk: {future.exception()}")
+        self.schedule_transcription(client)
+
+    async def recv_audio(self,
+                         websocket,
+                         backend="faster_whisper",
+                         faster_whisper_custom_model_path=None,
+                         whisper_tensorrt_path=None,
+                         trt_multilingual=False):
+        """
+        Receive audio chunks from a client until it disconnects.
+
+        Same as `TranscriptionServer.recv_audio`, but the connection is served by a coroutine.
+
+        Args:
+            websocket: The asyncio websocket connection for the client.
+            backend (str): The backend to run the server with.
+            faster_whisper_custom_model_path (str): path to custom faster whisper model.
+            whisper_tensorrt_path (str): Required for tensorrt backend.
+            trt_multilingual(bool): Only used for tensorrt, True if multilingual model.
+        """
+        self.backend = backend
+        websocket = AsyncWebSocket(websocket, self.loop)
+        try:
+            if not await self.handle_new_connection(websocket, faster_whisper_custom_model_path,
+                                                    whisper_tensorrt_path, trt_multilingual):
+                return
+
+            while not self.client_manager.is_client_timeout(websocket):
+                if not await self.process_audio_frames(websocket):
+                    break
+        except ConnectionClosed:
+            logging.info("Connection closed by client")
+        except Exception as e:
+            logging.error(f"Unexpected error: {str(e)}")
+        finally:
+            client = self.client_manager.get_client(websocket)
+            if client:
+                # the session releases its model on cleanup, let the pass in flight finish with it first
+                while client in self.transcriptions:
+                    await asyncio.wait([self.transcriptions[client]])
+                timer = self.retry_timers.pop(client, None)
+                if timer is not None:
+                    timer.cancel()
+                self.cleanup(websocket)
+            self.release_vad_state(websocket)
+            websocket.close()
+            await websocket.sender
+
+    async def serve(self, handler, host, port):
+        self.loop = asyncio.get_running_loop()
+        async with serve(handler, host, port):
+            await asyncio.Future()  # run forever
+
+    def run(self, host, port=9090, max_inference_workers=4, **kwargs):
+        """
+        Run the transcription server.
+
+        Args:
+            host (str): The host address to bind the server.
+            port (int): The port number to bind the server.
+            max_inference_workers (int): The number of threads running model inference for all clients.
+            **kwargs: The model options of `TranscriptionServer.run`.
+        """
+        handler = self.configure(**kwargs)
+        with ThreadPoolExecutor(max_workers=max_inference_workers, thread_name_prefix="inference") as executor:
+            self.executor = executor
+            asyncio.run(self.serve(handler, host, port))
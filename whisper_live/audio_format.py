@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+FLOAT32 = "float32"
+INT16 = "int16"
+FLAC = "flac"
+RATE = 16000
+
+
+def get_supported_formats():
+    """
+    Returns:
+        list: The audio formats that can be encoded and decoded here, FLAC needs the `soundfile` package.
+    """
+    formats = [FLOAT32, INT16]
+    if soundfile is not None:
+        formats.append(FLAC)
+    return formats
+
+
+def encode_audio(audio, audio_format=FLOAT32):
+    """
+    Encodes a chunk of 16kHz mono audio for the websocket.
+
+    float32 sends 4 bytes per sample, int16 halves that, and FLAC compresses the int16 samples without loss.
+    Every FLAC chunk is a complete FLAC stream, so it can be decoded without the previous chunks.
+
+    Args:
+        audio (np.ndarray): The float32 samples, between -1 and 1.
+        audio_format (str, optional): One of `get_supported_formats()`. Defaults to "float32".
+
+    Returns:
+        bytes: The encoded chunk.
+    """
+    if audio_format == FLOAT32:
+        return audio.astype(np.float32, copy=False).tobytes()
+    samples = (audio * 32768.0).clip(-32768, 32767).astype(np.int16)
+    if audio_format == INT16:
+        return samples.tobytes()
+    if audio_format == FLAC and soundfile is not None:
+        data = io.BytesIO()
+        soundfile.write(data, samples, RATE, format="FLAC", subtype="PCM_16")
+        return data.getvalue()
+    raise ValueError(f"Unsupported audio format: {audio_format}")
+
+
+def decode_audio(data, audio_format=FLOAT32):
+    """
+    Decodes a chunk of audio received from the websocket.
+
+    Args:
+        data (bytes): The encoded chunk.
+        audio_format (str, optional): The format negotiated with the client. Defaults to "float32".
+
+    Returns:
+        np.ndarray: The float32 samples, between -1 and 1.
+    """
+    if audio_format == FLOAT32:
+        return np.frombuffer(data, dtype=np.float32)
+    if audio_format == INT16:
+        return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+    if audio_format == FLAC and soundfile is not None:
+        audio, _ = soundfile.read(io.BytesIO(data), dtype="float32")
+        return audio
+    raise ValueError(f"Unsupported audio format: {audio_format}")
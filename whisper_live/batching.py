@@ -0,0 +1,200 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+
+class TranscriptionRequest(NamedTuple):
+    audio: np.ndarray
+    language: Optional[str]
+    task: str
+    initial_prompt: Optional[str]
+    vad_filter: bool
+    vad_parameters: Optional[dict]
+    word_timestamps: bool = False
+
+
+class VoiceActivityRequest(NamedTuple):
+    slot: int
+    frame: np.ndarray
+
+
+class BatchScheduler:
+    """
+    Collects requests submitted from many threads and processes them in batches on a single worker thread.
+
+    Every tick, a worker waits for a first request, then gathers the requests that arrive within
+    `batch_timeout` seconds (up to `max_batch_size` of them) and hands them to `process_batch` at once.
+    Callers get a `concurrent.futures.Future` which resolves to the result of their own request.
+    """
+    def __init__(self, max_batch_size=8, batch_timeout=0.01, num_workers=1):
+        """
+        Initializes the scheduler and starts its worker threads.
+
+        Args:
+            max_batch_size (int, optional): The maximum number of requests processed together. Defaults to 8.
+            batch_timeout (float, optional): How long (in seconds) to wait for more requests once the first
+                                             request of a batch arrived. Defaults to 0.01.
+            num_workers (int, optional): The number of batches processed concurrently. Defaults to 1.
+        """
+        self.max_batch_size = max_batch_size
+        self.batch_timeout = batch_timeout
+        self.requests = queue.Queue()
+        self.exit = False
+        self.workers = [threading.Thread(target=self.run, daemon=True) for _ in range(num_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, request):
+        """
+        Queues a request for the next batch.
+
+        Args:
+            request: The request to process.
+
+        Returns:
+            concurrent.futures.Future: A future holding the result of the request.
+        """
+        future = Future()
+        self.requests.put((request, future))
+        return future
+
+    def process_batch(self, requests):
+        """
+        Processes a batch of requests.
+
+        Args:
+            requests (list): The requests collected during the current tick.
+
+        Returns:
+            list: One result per request, in the same order.
+        """
+        raise NotImplementedError
+
+    def collect_batch(self):
+        """
+        Blocks until a request is available, then collects the requests queued within the batch timeout.
+
+        Returns:
+            list: A list of (request, future) tuples.
+        """
+        batch = [self.requests.get()]
+        deadline = time.time() + self.batch_timeout
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    batch.append(self.requests.get(timeout=remaining))
+                else:
+                    batch.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        """
+        Worker loop, runs batches until `stop` is called.
+        """
+        while not self.exit:
+            batch = [(request, future) for request, future in self.collect_batch() if future is not None]
+            if not batch:
+                continue
+
+            try:
+                results = self.process_batch([request for request, _ in batch])
+            except Exception as e:
+                logging.error(f"[ERROR]: Failed to process batch of {len(batch)} requests: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stop(self):
+        """
+        Stops the worker threads once their current batch is done.
+        """
+        self.exit = True
+        for _ in self.workers:
+            self.requests.put((None, None))
+
+
+class TranscriptionBatchScheduler(BatchScheduler):
+    """
+    Runs the pending transcription requests of all sessions sharing a faster_whisper model as one batched
+    `WhisperModel.transcribe_batch` call. There is one worker per model instance of the pool, so that
+    each instance can run a batch.
+    """
+    def __init__(self, model_pool, max_batch_size=8, batch_timeout=0.01):
+        """
+        Args:
+            model_pool (ModelPool): The pool of models shared by the sessions.
+            max_batch_size (int, optional): The maximum number of audio windows per model call. Defaults to 8.
+            batch_timeout (float, optional): How long (in seconds) to wait for more windows once the first one
+                                             arrived. Defaults to 0.01.
+        """
+        self.model_pool = model_pool
+        super().__init__(max_batch_size=max_batch_size, batch_timeout=batch_timeout, num_workers=model_pool.size)
+
+    def process_batch(self, requests):
+        """
+        Transcribes a batch of `TranscriptionRequest`.
+
+        Returns:
+            list: One (segments, info) tuple per request, as returned by `WhisperModel.transcribe`.
+        """
+        logging.debug(f"Transcribing a batch of {len(requests)} audio windows")
+        with self.model_pool.lease() as transcriber:
+            return transcriber.transcribe_batch(
+                [request.audio for request in requests],
+                language=[request.language for request in requests],
+                task=[request.task for request in requests],
+                initial_prompt=[request.initial_prompt for request in requests],
+                vad_filter=[request.vad_filter for request in requests],
+                vad_parameters=[request.vad_parameters for request in requests],
+                word_timestamps=any(request.word_timestamps for request in requests),
+            )
+
+
+class VoiceActivityBatchScheduler(BatchScheduler):
+    """
+    Runs voice activity detection on the latest audio frames of all sessions with batched model runs.
+    """
+    def __init__(self, detector, max_batch_size=64, batch_timeout=0.005):
+        """
+        Args:
+            detector (BatchVoiceActivityDetector): The detector holding the VAD state of every session.
+            max_batch_size (int, optional): The maximum number of frames per model run. Defaults to 64.
+            batch_timeout (float, optional): How long (in seconds) to wait for more frames once the first one
+                                             arrived. Defaults to 0.005.
+        """
+        self.detector = detector
+        super().__init__(max_batch_size=max_batch_size, batch_timeout=batch_timeout)
+
+    def process_batch(self, requests):
+        """
+        Computes the speech probability of a batch of `VoiceActivityRequest`.
+
+        Frames can only be stacked if they have the same length, so there is one model run per distinct
+        frame length in the batch.
+
+        Returns:
+            list: The speech probability of every frame.
+        """
+        results = [None] * len(requests)
+        groups = {}
+        for i, request in enumerate(requests):
+            groups.setdefault(request.frame.shape[0], []).append(i)
+        for indices in groups.values():
+            speech_probs = self.detector.forward_batch(
+                [requests[i].slot for i in indices],
+                [requests[i].frame for i in indices],
+            )
+            for i, speech_prob in zip(indices, speech_probs):
+                results[i] = float(speech_prob)
+        return results
@@ -0,0 +1,263 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+
+from websockets.sync.server import serve
+
+from whisper_live.bench.loadgen import run_load, summarize
+from whisper_live.protocol import PROTOCOL_VERSION
+
+DEFAULT_LEVELS = [1, 4, 16, 64]
+
+
+def get_peak_rss():
+    """
+    Returns:
+        float: The peak resident set size of this process so far, in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def get_rss():
+    """
+    Returns:
+        float: The current resident set size of this process in MB, or None if it cannot be read.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        return None
+
+
+class RssSampler:
+    """
+    Samples the resident set size of this process from a background thread, to get the peak of a time range
+    rather than the peak since the process started.
+    """
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.sample()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.sample()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        rss = get_rss()
+        if rss is not None:
+            self.peak = rss if self.peak is None else max(self.peak, rss)
+
+
+class ServerThread:
+    """
+    Serves a websocket connection handler from a background thread, on a free port of localhost.
+    """
+    def __init__(self, handler, host="localhost", port=0):
+        self.server = serve(handler, host, port)
+        self.port = self.server.socket.getsockname()[1]
+        self.uri = f"ws://{host}:{self.port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.thread.join()
+
+
+def start_server(max_clients, num_workers=1, **kwargs):
+    """
+    Sets up a `TranscriptionServer` with the faster_whisper backend on the CPU, in this process.
+
+    Args:
+        max_clients (int): The number of concurrent connections the server accepts.
+        num_workers (int, optional): The CTranslate2 workers of the model shared by the connections, rather
+            than the server's default of one per accepted connection. Defaults to 1.
+        **kwargs: Passed to `TranscriptionServer.configure`.
+
+    Returns:
+        ServerThread: The server, started when entered.
+    """
+    # hide the GPUs before torch is imported by the server
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    from whisper_live.server import ClientManager, TranscriptionServer
+
+    server = TranscriptionServer()
+    server.client_manager = ClientManager(max_clients=max_clients, max_connection_time=3600)
+    return ServerThread(server.configure(backend="faster_whisper", num_workers=num_workers, **kwargs))
+
+
+def run_level(uri, files, clients, options, **kwargs):
+    """
+    Streams the files to the server from `clients` concurrent sessions, and measures the results and the
+    resources used.
+
+    The CPU time and the RSS are the ones of this process, which runs both the server and the clients. The
+    peak RSS is sampled during the level, while the cumulative peak RSS is the peak since the process started.
+
+    Args:
+        uri (str): The websocket URI of the server.
+        files (list): The audio files, assigned to the sessions in turn.
+        clients (int): The number of concurrent sessions.
+        options (dict): The options sent by every session.
+        **kwargs: Passed to `run_load`.
+
+    Returns:
+        dict: The summary of `summarize`, with the wall time, the CPU seconds spent per second of audio
+            streamed, and the peak and cumulative peak RSS in MB.
+    """
+    start_cpu, start = time.process_time(), time.time()
+    with RssSampler() as rss:
+        sessions = asyncio.run(run_load(uri, files, clients, options, **kwargs))
+    cpu, wall = time.process_time() - start_cpu, time.time() - start
+    audio_seconds = sum(session.sent_positions[-1] for session in sessions if session.sent_positions)
+
+    result = summarize(sessions)
+    result.update({
+        "wall_time": wall,
+        "audio_seconds": audio_seconds,
+        "cpu_seconds_per_audio_second": cpu / audio_seconds if audio_seconds else None,
+        "peak_rss_mb": rss.peak,
+        "cumulative_peak_rss_mb": get_peak_rss(),
+    })
+    return result
+
+
+def get_environment():
+    """
+    Returns:
+        dict: The versions of the software the benchmark ran with.
+    """
+    environment = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "omp_num_threads": os.environ.get("OMP_NUM_THREADS"),
+    }
+    for package in ("faster_whisper", "ctranslate2", "websockets"):
+        try:
+            environment[package] = __import__(package).__version__
+        except (ImportError, AttributeError):
+            environment[package] = None
+    return environment
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark WhisperLive end to end: start a faster_whisper "
+                                                 "server on the CPU in this process, stream audio files to it at "
+                                                 "increasing numbers of concurrent sessions, and write the real "
+                                                 "time factor, latency percentiles, CPU time and peak memory.")
+    parser.add_argument('files',
+                        nargs='*',
+                        default=['assets/jfk.flac'],
+                        help='WAV or FLAC files to stream, assigned to the sessions in turn.')
+    parser.add_argument('--levels',
+                        type=int,
+                        nargs='+',
+                        default=DEFAULT_LEVELS,
+                        help='Numbers of concurrent sessions to benchmark, one after the other.')
+    parser.add_argument('--model', '-m',
+                        type=str,
+                        default='tiny.en',
+                        help='Model requested by the sessions.')
+    parser.add_argument('--language', '-l',
+                        type=str,
+                        default='en',
+                        help='Language requested by the sessions.')
+    parser.add_argument('--speed',
+                        type=float,
+                        default=1.0,
+                        help='Streaming rate as a multiple of real time, 0 to send as fast as possible.')
+    parser.add_argument('--ramp_up',
+                        type=float,
+                        default=0.0,
+                        help='Seconds over which the sessions of a level are started.')
+    parser.add_argument('--linger',
+                        type=float,
+                        default=5.0,
+                        help='Seconds to wait for results after the last message, once the audio was sent.')
+    parser.add_argument('--omp_num_threads', '-omp',
+                        type=int,
+                        default=1,
+                        help="Number of threads to use for OpenMP")
+    parser.add_argument('--num_workers',
+                        type=int,
+                        default=1,
+                        help='Number of CTranslate2 workers of the model shared by the sessions, at every level.')
+    parser.add_argument('--min_new_audio',
+                        type=float,
+                        default=0.25,
+                        help='Seconds of new audio a session has to send before it is transcribed again.')
+    parser.add_argument('--max_update_rate',
+                        type=float,
+                        default=None,
+                        help='Maximum number of partial results per second sent to each session.')
+    parser.add_argument('--output', '-o',
+                        type=str,
+                        default='benchmark.json',
+                        help='JSON file to write the results to.')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if "OMP_NUM_THREADS" not in os.environ:
+        os.environ["OMP_NUM_THREADS"] = str(args.omp_num_threads)
+
+    options = {
+        "language": args.language,
+        "task": "transcribe",
+        "model": args.model,
+        "use_vad": True,
+        "protocol_version": PROTOCOL_VERSION,
+    }
+    load_kwargs = dict(speed=args.speed, linger=args.linger)
+    results = {"config": vars(args), "environment": get_environment(), "levels": []}
+    with start_server(max(args.levels), num_workers=args.num_workers, min_new_audio=args.min_new_audio,
+                      max_update_rate=args.max_update_rate) as server:
+        # loads the model, so that the first level does not measure it
+        run_level(server.uri, args.files[:1], 1, options, **load_kwargs)
+        for clients in args.levels:
+            logging.info(f"Benchmarking {clients} concurrent sessions.")
+            result = run_level(server.uri, args.files, clients, options, ramp_up=args.ramp_up, **load_kwargs)
+            results["levels"].append(dict(result, clients=clients))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    for level in results["levels"]:
+        rtf, final = level["real_time_factor"], level["final_latency"]
+        logging.info(f"{level['clients']} sessions: RTF p50 {rtf['p50'] if rtf else None}, final latency p95 "
+                     f"{final['p95'] if final else None}, {level['cpu_seconds_per_audio_second']} CPU s/audio s, "
+                     f"{level['peak_rss_mb']} MB peak RSS")
+    return results
+
+
+if __name__ == "__main__":
+    main()
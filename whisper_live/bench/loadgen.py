@@ -0,0 +1,359 @@
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import time
+import uuid
+
+import numpy as np
+import scipy.signal
+import soundfile
+import websockets
+
+from whisper_live.audio_format import FLOAT32, encode_audio
+from whisper_live.protocol import PROTOCOL_VERSION, decode_message
+
+RATE = 16000
+END_OF_AUDIO = b"END_OF_AUDIO"
+
+
+def load_audio(path):
+    """
+    Reads a WAV or FLAC file as 16kHz mono float32 audio.
+
+    Args:
+        path (str): The audio file.
+
+    Returns:
+        np.ndarray: The samples, between -1 and 1.
+    """
+    audio, rate = soundfile.read(path, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    if rate != RATE:
+        audio = scipy.signal.resample_poly(audio, RATE, rate).astype(np.float32)
+    return audio
+
+
+def percentiles(values):
+    """
+    Returns:
+        dict or None: The count, mean, 50th, 90th, 95th and 99th percentiles of the values, None if there are
+            none.
+    """
+    if not len(values):
+        return None
+    p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+    return {"count": len(values), "mean": float(np.mean(values)), "p50": float(p50), "p90": float(p90),
+            "p95": float(p95), "p99": float(p99)}
+
+
+class SessionStats:
+    """
+    Measures the transcription results of one synthetic client.
+
+    - the time to first partial, from the first audio chunk sent to the first transcript message,
+    - the partial update interval, between consecutive transcript messages,
+    - the partial latency, from the moment the audio at the end of the segment being spoken was sent to the
+      message carrying it,
+    - the final segment latency, from the moment the audio at the end of a completed segment was sent to the
+      message completing the segment.
+
+    Completed segments are the ones flagged `completed` with protocol version 2, and all but the last segment
+    of a message with version 1.
+    """
+    def __init__(self, uid):
+        self.uid = uid
+        self.status = None  # "ready", then "done", or "WAIT", "ERROR" or "failed"
+        self.warnings = 0
+        self.audio_format = FLOAT32
+        self.connect_time = None
+        self.ready_time = None
+        self.sent_positions = []  # audio sent in seconds, after every chunk
+        self.sent_times = []
+        self.message_times = []
+        self.partial_latencies = []
+        self.final_latencies = []
+        self.completed = set()
+        self.last_message_time = None
+
+    def record_audio(self, position, sent_time):
+        """
+        Args:
+            position (float): The duration of the audio sent so far, in seconds.
+            sent_time (float): When the chunk ending there was sent.
+        """
+        self.sent_positions.append(position)
+        self.sent_times.append(sent_time)
+
+    def get_send_time(self, position):
+        """
+        Returns:
+            float or None: When the audio at `position` seconds was sent, None if it was not sent yet.
+        """
+        i = bisect.bisect_left(self.sent_positions, position)
+        if i == len(self.sent_positions):
+            return None
+        return self.sent_times[i]
+
+    def record_segments(self, segments, received_time):
+        """
+        Args:
+            segments (list): The segments of a transcript message.
+            received_time (float): When the message was received.
+        """
+        self.message_times.append(received_time)
+        self.last_message_time = received_time
+        for i, segment in enumerate(segments):
+            completed = segment.get("completed", i < len(segments) - 1)
+            key = segment.get("id", segment.get("start"))
+            if completed and key in self.completed:
+                continue
+            if completed:
+                self.completed.add(key)
+            if "end" not in segment:
+                continue
+            sent_time = self.get_send_time(float(segment["end"]))
+            if sent_time is None:
+                continue
+            latencies = self.final_latencies if completed else self.partial_latencies
+            latencies.append(received_time - sent_time)
+
+    def get_time_to_first_partial(self):
+        if not self.message_times or not self.sent_times:
+            return None
+        return self.message_times[0] - self.sent_times[0]
+
+    def get_update_intervals(self):
+        return np.diff(self.message_times).tolist()
+
+    def get_real_time_factor(self):
+        """
+        Returns:
+            float or None: The time from the first audio chunk sent to the last transcript message, over the
+                duration of the audio sent. None if no transcript was received.
+        """
+        if not self.message_times or not self.sent_times:
+            return None
+        return (self.message_times[-1] - self.sent_times[0]) / self.sent_positions[-1]
+
+    def to_dict(self):
+        return {
+            "uid": self.uid,
+            "status": self.status,
+            "warnings": self.warnings,
+            "time_to_ready": self.ready_time - self.connect_time if self.ready_time else None,
+            "time_to_first_partial": self.get_time_to_first_partial(),
+            "real_time_factor": self.get_real_time_factor(),
+            "messages": len(self.message_times),
+            "update_interval": percentiles(self.get_update_intervals()),
+            "partial_latency": percentiles(self.partial_latencies),
+            "final_latency": percentiles(self.final_latencies),
+        }
+
+
+def summarize(sessions):
+    """
+    Aggregates the measurements of all sessions.
+
+    Args:
+        sessions (list): The `SessionStats` of every session.
+
+    Returns:
+        dict: The number of sessions, the rate of each final status, and the distribution of the time to
+            first partial, real time factor, partial update interval, partial latency and final segment latency
+            over all sessions.
+    """
+    statuses = [session.status for session in sessions]
+    ttfp = [session.get_time_to_first_partial() for session in sessions]
+    rtf = [session.get_real_time_factor() for session in sessions]
+    return {
+        "sessions": len(sessions),
+        "rates": {status: statuses.count(status) / len(sessions) for status in sorted(set(statuses), key=str)},
+        "warnings": sum(session.warnings for session in sessions),
+        "time_to_first_partial": percentiles([t for t in ttfp if t is not None]),
+        "real_time_factor": percentiles([r for r in rtf if r is not None]),
+        "update_interval": percentiles([i for session in sessions for i in session.get_update_intervals()]),
+        "partial_latency": percentiles([lat for session in sessions for lat in session.partial_latencies]),
+        "final_latency": percentiles([lat for session in sessions for lat in session.final_latencies]),
+    }
+
+
+async def receive_messages(websocket, stats, ready):
+    """
+    Records the messages of the server until the connection closes.
+    """
+    async for message in websocket:
+        received_time = time.time()
+        message = decode_message(message)
+        status = message.get("status")
+        if status == "WARNING":
+            stats.warnings += 1
+        elif status in ("WAIT", "ERROR"):
+            stats.status = status
+            ready.set()
+            return
+        elif message.get("message") == "SERVER_READY":
+            stats.status = "ready"
+            stats.ready_time = received_time
+            stats.audio_format = message.get("audio_format", FLOAT32)
+            ready.set()
+        elif "segments" in message:
+            stats.record_segments(message["segments"], received_time)
+
+
+async def run_session(uri, audio, stats, options, speed=1.0, chunk_size=4096, ready_timeout=60.0, linger=5.0):
+    """
+    Streams audio to the server as one client, recording the results in `stats`.
+
+    Args:
+        uri (str): The websocket URI of the server.
+        audio (np.ndarray): The 16kHz float32 audio to stream.
+        stats (SessionStats): Where the measurements go.
+        options (dict): The options sent when connecting.
+        speed (float, optional): The sending rate as a multiple of real time, 0 to send as fast as possible.
+            Defaults to 1.0.
+        chunk_size (int, optional): The samples per message. Defaults to 4096, like the client.
+        ready_timeout (float, optional): The longest wait for SERVER_READY, in seconds. Defaults to 60.0.
+        linger (float, optional): How long to wait for results after the last message, once all the audio
+            was sent, in seconds. Defaults to 5.0.
+    """
+    stats.connect_time = time.time()
+    try:
+        async with websockets.connect(uri, max_size=None) as websocket:
+            ready = asyncio.Event()
+            receiver = asyncio.ensure_future(receive_messages(websocket, stats, ready))
+            await websocket.send(json.dumps(options))
+            await asyncio.wait_for(ready.wait(), ready_timeout)
+            if stats.status != "ready":
+                receiver.cancel()
+                return
+
+            start = time.time()
+            for position in range(0, len(audio), chunk_size):
+                chunk = audio[position:position + chunk_size]
+                await websocket.send(encode_audio(chunk, stats.audio_format))
+                sent = (position + len(chunk)) / RATE
+                stats.record_audio(sent, time.time())
+                if speed:
+                    await asyncio.sleep(max(start + sent / speed - time.time(), 0))
+
+            while not receiver.done():
+                last = stats.last_message_time or stats.sent_times[-1]
+                if time.time() - max(last, stats.sent_times[-1]) >= linger:
+                    break
+                await asyncio.sleep(0.1)
+            stats.status = "done"
+            await websocket.send(END_OF_AUDIO)
+            receiver.cancel()
+    except Exception as e:
+        logging.error(f"Session {stats.uid} failed: {e}")
+        if stats.status in (None, "ready"):
+            stats.status = "failed"
+
+
+async def run_load(uri, files, clients, options, ramp_up=0.0, **kwargs):
+    """
+    Runs `clients` concurrent sessions, each streaming one of the files, from a single event loop.
+
+    Args:
+        uri (str): The websocket URI of the server.
+        files (list): The audio files, assigned to the sessions in turn.
+        clients (int): The number of sessions.
+        options (dict): The options sent by every session, a unique uid is added.
+        ramp_up (float, optional): The time over which session starts are spread, in seconds. Defaults to 0.
+        **kwargs: Passed to `run_session`.
+
+    Returns:
+        list: The `SessionStats` of every session.
+    """
+    audios = [load_audio(path) for path in files]
+    sessions = [SessionStats(str(uuid.uuid4())) for _ in range(clients)]
+
+    async def start(i):
+        await asyncio.sleep(ramp_up * i / clients)
+        await run_session(uri, audios[i % len(audios)], sessions[i], dict(options, uid=sessions[i].uid), **kwargs)
+
+    await asyncio.gather(*(start(i) for i in range(clients)))
+    return sessions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream audio files to a WhisperLive server from many "
+                                                 "concurrent synthetic clients, and report the result latencies.")
+    parser.add_argument('files',
+                        nargs='*',
+                        default=['assets/jfk.flac'],
+                        help='WAV or FLAC files to stream, assigned to the clients in turn.')
+    parser.add_argument('--host',
+                        type=str,
+                        default='localhost',
+                        help='Host of the server.')
+    parser.add_argument('--port', '-p',
+                        type=int,
+                        default=9090,
+                        help='Websocket port of the server.')
+    parser.add_argument('--clients', '-n',
+                        type=int,
+                        default=16,
+                        help='Number of concurrent clients.')
+    parser.add_argument('--ramp_up',
+                        type=float,
+                        default=0.0,
+                        help='Seconds over which the client connections are spread.')
+    parser.add_argument('--speed',
+                        type=float,
+                        default=1.0,
+                        help='Streaming rate as a multiple of real time, 0 to send as fast as possible.')
+    parser.add_argument('--chunk_size',
+                        type=int,
+                        default=4096,
+                        help='Audio samples per message.')
+    parser.add_argument('--model', '-m',
+                        type=str,
+                        default='small',
+                        help='Model requested by the clients.')
+    parser.add_argument('--language', '-l',
+                        type=str,
+                        default='en',
+                        help='Language requested by the clients.')
+    parser.add_argument('--no_vad',
+                        action='store_true',
+                        help='Disable voice activity detection on the server.')
+    parser.add_argument('--audio_format',
+                        type=str,
+                        default=FLOAT32,
+                        help='Audio format requested by the clients, "float32", "int16" or "flac".')
+    parser.add_argument('--linger',
+                        type=float,
+                        default=5.0,
+                        help='Seconds to wait for results after the last message, once the audio was sent.')
+    parser.add_argument('--output', '-o',
+                        type=str,
+                        default=None,
+                        help='JSON file to write the summary and the per-session measurements to.')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    options = {
+        "language": args.language,
+        "task": "transcribe",
+        "model": args.model,
+        "use_vad": not args.no_vad,
+        "audio_format": args.audio_format,
+        "protocol_version": PROTOCOL_VERSION,
+    }
+    sessions = asyncio.run(run_load(
+        f"ws://{args.host}:{args.port}", args.files, args.clients, options, ramp_up=args.ramp_up,
+        speed=args.speed, chunk_size=args.chunk_size, linger=args.linger))
+
+    summary = summarize(sessions)
+    print(json.dumps(summary, indent=2))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "sessions": [session.to_dict() for session in sessions]}, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import itertools
+import json
+import logging
+import timeit
+
+import numpy as np
+
+RATE = 16000
+FRAME_SIZE = 4096  # samples per client message
+DEFAULT_DURATIONS = [60, 600, 3600]
+
+
+class NullWebSocket:
+    """
+    Stands in for the websocket of a session, discarding what is sent.
+    """
+    def send(self, message):
+        pass
+
+
+class Segment:
+    """
+    The fields of a faster_whisper segment read by `update_segments`.
+    """
+    def __init__(self, start, end, text, no_speech_prob=0.0):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.no_speech_prob = no_speech_prob
+
+
+def make_session(duration, protocol_version=1, segment_duration=5.0):
+    """
+    Builds a faster_whisper session which already received `duration` seconds of audio, one segment of
+    transcript per `segment_duration` seconds, without loading a model or starting its threads.
+
+    Args:
+        duration (float): The length of the session, in seconds.
+        protocol_version (int, optional): The transcript protocol version of the session. Defaults to 1.
+        segment_duration (float, optional): The length of every transcript segment. Defaults to 5.0.
+
+    Returns:
+        ServeClientFasterWhisper: The session.
+    """
+    from whisper_live.server import ServeClientBase, ServeClientFasterWhisper
+
+    session = object.__new__(ServeClientFasterWhisper)
+    ServeClientBase.__init__(session, "bench", NullWebSocket(), protocol_version=protocol_version,
+                             start_thread=False)
+    session.no_speech_thresh = 0.45
+    frame = np.random.default_rng(0).uniform(-0.1, 0.1, FRAME_SIZE).astype(np.float32)
+    for _ in range(int(duration * RATE) // FRAME_SIZE):
+        session.add_frames(frame)
+    for start in np.arange(0, duration - segment_duration, segment_duration):
+        session.transcript.append(session.format_segment(start, start + segment_duration, " ask not what your"
+                                                                                          " country can do"))
+    session.prepare_segments()
+    # the last committed segment ends a few seconds before the end of the audio
+    session.timestamp_offset = max(session.audio_buffer.end / RATE - 3.0, session.audio_buffer.start / RATE)
+    return session
+
+
+def measure(func, repeat=5):
+    """
+    Args:
+        func (callable): The code to time, called without arguments.
+        repeat (int, optional): The number of timing runs, the fastest is kept. Defaults to 5.
+
+    Returns:
+        float: The time of one call, in microseconds.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def bench_add_frames(session):
+    frame = np.zeros(FRAME_SIZE, dtype=np.float32)
+    return lambda: session.add_frames(frame)
+
+
+def bench_get_audio_chunk_for_processing(session):
+    return session.get_audio_chunk_for_processing
+
+
+def bench_clip_audio_if_no_valid_segment(session):
+    return session.clip_audio_if_no_valid_segment
+
+
+def bench_update_segments(session):
+    segments = [Segment(0.0, 1.5, " ask not what your country can do for you"),
+                Segment(1.5, 2.8, " ask what you can do")]
+    n_transcript, n_text, offset = len(session.transcript), len(session.text), session.timestamp_offset
+
+    def run():
+        session.update_segments(segments, 3.0)
+        # keeps the session as long as it was
+        del session.transcript[n_transcript:]
+        del session.text[n_text:]
+        session.timestamp_offset = offset
+    return run
+
+
+def bench_prepare_segments(session):
+    last_segments = itertools.cycle([session.format_segment(0.0, 2.0, " ask not"),
+                                     session.format_segment(0.0, 2.5, " ask not what")])
+    return lambda: json.dumps({"uid": session.client_uid, "segments": session.prepare_segments(next(last_segments))})
+
+
+def bench_vad():
+    from whisper_live.vad import VoiceActivityDetector
+
+    detector = VoiceActivityDetector()
+    frame = np.random.default_rng(0).uniform(-0.1, 0.1, FRAME_SIZE).astype(np.float32)
+    return lambda: detector(frame)
+
+
+def bench_bytes_to_float_array():
+    from whisper_live.client import TranscriptionTeeClient
+
+    data = np.zeros(FRAME_SIZE, dtype=np.int16).tobytes()
+    return lambda: TranscriptionTeeClient.bytes_to_float_array(data)
+
+
+SESSION_BENCHMARKS = {
+    "add_frames": bench_add_frames,
+    "get_audio_chunk_for_processing": bench_get_audio_chunk_for_processing,
+    "clip_audio_if_no_valid_segment": bench_clip_audio_if_no_valid_segment,
+    "update_segments": bench_update_segments,
+    "prepare_segments_v1+json": bench_prepare_segments,
+    "prepare_segments_v2+json": bench_prepare_segments,
+}
+FRAME_BENCHMARKS = {
+    "VoiceActivityDetector": bench_vad,
+    "bytes_to_float_array": bench_bytes_to_float_array,
+}
+
+
+def run_benchmarks(durations=DEFAULT_DURATIONS, names=None, repeat=5):
+    """
+    Times the per-frame and per-pass code of the server and client.
+
+    The code running on every pass of a session is timed on sessions of every duration, since its cost may
+    grow with the audio or transcript of the session. The code running on every frame on its own does not
+    depend on the session, and is timed once.
+
+    Args:
+        durations (list, optional): The session durations, in seconds. Defaults to 1 minute, 10 minutes and
+            1 hour.
+        names (list, optional): The benchmarks to run. Defaults to all of them.
+        repeat (int, optional): The number of timing runs of every benchmark. Defaults to 5.
+
+    Returns:
+        list: One dict per measurement, with the benchmark `name`, the `session_duration` in seconds, None for
+            per-frame code, and the time of one call in microseconds as `us_per_call`.
+    """
+    results = []
+    for name, make_func in FRAME_BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        try:
+            func = make_func()
+        except Exception as e:
+            logging.warning(f"Skipping {name}: {e}")
+            continue
+        results.append({"name": name, "session_duration": None, "us_per_call": measure(func, repeat)})
+
+    for duration in durations:
+        for name, make_func in SESSION_BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            session = make_session(duration, protocol_version=2 if "_v2" in name else 1)
+            results.append({"name": name, "session_duration": duration,
+                            "us_per_call": measure(make_func(session), repeat)})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the per-frame and per-pass code paths of WhisperLive on "
+                                                 "synthetic sessions of increasing duration.")
+    parser.add_argument('--durations',
+                        type=float,
+                        nargs='+',
+                        default=DEFAULT_DURATIONS,
+                        help='Durations of the synthetic sessions, in seconds.')
+    parser.add_argument('--benchmarks',
+                        type=str,
+                        nargs='+',
+                        default=None,
+                        choices=list(FRAME_BENCHMARKS) + list(SESSION_BENCHMARKS),
+                        help='Benchmarks to run, all of them by default.')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=5,
+                        help='Timing runs per benchmark, the fastest is reported.')
+    parser.add_argument('--output', '-o',
+                        type=str,
+                        default=None,
+                        help='JSON file to write the results to.')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    results = run_benchmarks(args.durations, args.benchmarks, args.repeat)
+    for result in results:
+        duration = "-" if result["session_duration"] is None else f"{result['session_duration']:g}s"
+        print(f"{result['name']:<34} {duration:>8} {result['us_per_call']:>12.2f} us")
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
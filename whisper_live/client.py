@@ -12,8 +12,12 @@ import time
 import ffmpeg
 import queue
 import whisper_live.utils as utils
+from whisper_live.audio_format import FLOAT32, encode_audio
+from whisper_live.protocol import JSON, PROTOCOL_VERSION, decode_message, get_supported_encodings
 from whisper_live.device_type_enum import DeviceType
 
+DEFAULT_STREAM_SPEED = 4.0  # times real time, when streaming a file to the server
+
 
 class Client:
     """
@@ -31,7 +35,10 @@ class Client:
             model="small",
             device_type=DeviceType.INPUT,
             srt_file_path="output.srt",
-            use_vad=True
+            use_vad=True,
+            audio_format=FLOAT32,
+            protocol_version=PROTOCOL_VERSION,
+            message_encoding=JSON
     ):
         """
         Initializes a Client instance for audio recording and streaming to a server.
@@ -45,6 +52,12 @@ class Client:
             port (int): The port number for the WebSocket server.
             lang (str, optional): The selected language for transcription. Default is None.
             translate (bool, optional): Specifies if the task is translation. Default is False.
+            audio_format (str, optional): The audio encoding to request from the server, "float32", "int16" or
+                "flac". The server may fall back to "float32". Default is "float32".
+            protocol_version (int, optional): The version of the transcript messages to request. With version 2,
+                the server only sends new or changed segments. Default is the latest version.
+            message_encoding (str, optional): The encoding of the transcript messages to request, "json" or
+                "msgpack". Default is "json".
         """
         self.recording = False
         self.task = "transcribe"
@@ -58,6 +71,11 @@ class Client:
         self.server_error = False
         self.srt_file_path = srt_file_path
         self.use_vad = use_vad
+        self.audio_format = audio_format
+        if message_encoding not in get_supported_encodings():
+            raise ValueError(f"Unsupported message encoding: {message_encoding}")
+        self.protocol_version = protocol_version
+        self.message_encoding = message_encoding
         self.last_segment = None
         self.last_received_segment = None
         self.hallucinations = utils.get_hallucinations_list(lang)
@@ -131,6 +149,30 @@ class Client:
         utils.clear_screen()
         utils.print_transcript(text, speaker=self.device_type)
 
+    def process_segment_updates(self, segments):
+        """
+        Processes the new, changed or completed transcript segments of protocol version 2.
+
+        Completed segments are final and appended to the transcript. Other segments replace the segment
+        being spoken, with the same id and a newer revision, or start the next one.
+        """
+        for seg in segments:
+            if seg["completed"]:
+                if self.last_segment is not None and self.last_segment["id"] == seg["id"]:
+                    self.last_segment = None
+                if seg["text"].strip() not in self.hallucinations:
+                    self.transcript.append(seg)
+            elif seg["text"].strip() not in self.hallucinations:
+                self.last_segment = seg
+        # the server only sends segments which changed
+        self.last_response_received = time.time()
+
+        text = [seg["text"] for seg in self.transcript[-3:]]
+        if self.last_segment is not None:
+            text.append(self.last_segment["text"])
+        utils.clear_screen()
+        utils.print_transcript(text[-3:], speaker=self.device_type)
+
     def on_message(self, ws, message):
         """
         Callback function called when a message is received from the server.
@@ -141,10 +183,10 @@ class Client:
 
         Args:
             ws (websocket.WebSocketApp): The WebSocket client instance.
-            message (str): The received message from the server.
+            message (str or bytes): The received message from the server, msgpack encoded if binary.
 
         """
-        message = json.loads(message)
+        message = decode_message(message)
 
         if self.uid != message.get("uid"):
             print(f"[{self.device_type}] [ERROR]: invalid client uid")
@@ -162,6 +204,9 @@ class Client:
             self.last_response_received = time.time()
             self.recording = True
             self.server_backend = message["backend"]
+            # servers without audio format or protocol negotiation only accept float32 and send version 1
+            self.audio_format = message.get("audio_format", FLOAT32)
+            self.protocol_version = message.get("protocol_version", 1)
             print(f"[{self.device_type}] [INFO]: Server Running with backend {self.server_backend}")
             return
 
@@ -174,7 +219,10 @@ class Client:
             return
 
         if "segments" in message.keys():
-            self.process_segments(message["segments"])
+            if self.protocol_version >= 2:
+                self.process_segment_updates(message["segments"])
+            else:
+                self.process_segments(message["segments"])
 
     def on_error(self, ws, error):
         print(f"[{self.device_type}] [ERROR] WebSocket Error: {error}")
@@ -205,7 +253,10 @@ class Client:
                     "language": self.language,
                     "task": self.task,
                     "model": self.model,
-                    "use_vad": self.use_vad
+                    "use_vad": self.use_vad,
+                    "audio_format": self.audio_format,
+                    "protocol_version": self.protocol_version,
+                    "message_encoding": self.message_encoding
                 }
             )
         )
@@ -301,11 +352,20 @@ class TranscriptionTeeClient:
         self.save_output_recording = save_output_recording
         self.output_recording_filename = output_recording_filename
         self.frames = b""
-        TranscriptionTeeClient._lock.acquire()
-        self.p = pyaudio.PyAudio()
-        TranscriptionTeeClient._lock.release()
+        self._p = None
+
+    @property
+    def p(self):
+        """
+        The PyAudio instance, only created once an audio device is used, so that streaming a file works
+        on a headless machine.
+        """
+        if self._p is None:
+            with TranscriptionTeeClient._lock:
+                self._p = pyaudio.PyAudio()
+        return self._p
 
-    def __call__(self, audio=None, rtsp_url=None, hls_url=None, save_file=None):
+    def __call__(self, audio=None, rtsp_url=None, hls_url=None, save_file=None, speed=None):
         """
         Start the transcription process.
 
@@ -315,6 +375,8 @@ class TranscriptionTeeClient:
 
         Args:
             audio (str, optional): Path to an audio file for transcription. Default is None, which triggers live recording.
+            speed (float, optional): If set, the audio file is streamed without playing it, at `speed` times real
+                time, see `stream_file`. Default is None, which plays the file in real time.
 
         """
         assert sum(
@@ -332,6 +394,8 @@ class TranscriptionTeeClient:
         print(f"[{self.device_type}] [INFO]: Server Ready!")
         if hls_url is not None:
             self.process_hls_stream(hls_url, save_file)
+        elif audio is not None and speed is not None:
+            self.stream_file(audio, speed)
         elif audio is not None:
             resampled_file = utils.resample(audio)
             self.play_file(resampled_file)
@@ -362,6 +426,20 @@ class TranscriptionTeeClient:
             if (unconditional or client.recording):
                 client.send_packet_to_server(packet)
 
+    def multicast_audio(self, audio_array):
+        """
+        Sends a chunk of audio via all recording clients, in the audio format each of them negotiated.
+
+        Args:
+            audio_array (np.ndarray): The float32 samples, between -1 and 1.
+        """
+        packets = {}
+        for client in self.clients:
+            if client.recording:
+                if client.audio_format not in packets:
+                    packets[client.audio_format] = encode_audio(audio_array, client.audio_format)
+                client.send_packet_to_server(packets[client.audio_format])
+
     def play_file(self, filename):
         """
         Play an audio file and send it to the server for processing.
@@ -394,7 +472,7 @@ class TranscriptionTeeClient:
                         break
 
                     audio_array = self.bytes_to_float_array(data)
-                    self.multicast_packet(audio_array.tobytes())
+                    self.multicast_audio(audio_array)
                     self.stream.write(data)
 
                 wavfile.close()
@@ -413,6 +491,56 @@ class TranscriptionTeeClient:
                 self.close_all_clients()
                 self.write_all_clients_srt()
 
+    def stream_file(self, filename, speed=DEFAULT_STREAM_SPEED):
+        """
+        Stream an audio file to the server without playing it.
+
+        The file is decoded by ffmpeg straight to 16kHz mono 16-bit PCM, and sent in chunks paced at `speed`
+        times real time, without an audio device or a resampled copy on disk. This is typically used to
+        transcribe archived audio faster than real time.
+
+        The server does not slow the upload down: it keeps at most `ServeClientBase.MAX_BUFFER_DURATION`
+        seconds of untranscribed audio per connection and drops the oldest audio beyond that. A speed above
+        what the server transcribes in real time therefore loses audio, without any error.
+
+        Args:
+            filename (str): The path to the audio file, in any format ffmpeg can decode.
+            speed (float, optional): The sending rate as a multiple of real time. Default is 4.
+
+        Raises:
+            ValueError: If the speed is not positive.
+        """
+        if speed <= 0:
+            raise ValueError(f"The streaming speed must be positive, got {speed}.")
+        process = self.get_file_ffmpeg_process(filename)
+        print(f"[{self.device_type}] [INFO]: Streaming {filename} at {speed}x real time...")
+        start = time.time()
+        n_samples = 0
+        try:
+            while any(client.recording for client in self.clients):
+                in_bytes = process.stdout.read(self.chunk * 2)  # 2 bytes per sample
+                if not in_bytes:
+                    break
+                audio_array = self.bytes_to_float_array(in_bytes)
+                self.multicast_audio(audio_array)
+
+                n_samples += len(audio_array)
+                delay = n_samples / self.rate / speed - (time.time() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            elapsed = time.time() - start
+            print(f"[{self.device_type}] [INFO]: Sent {n_samples / self.rate:.1f}s of audio in {elapsed:.1f}s.")
+
+            for client in self.clients:
+                client.wait_before_disconnect()
+            self.multicast_packet(Client.END_OF_AUDIO.encode('utf-8'), True)
+
+        except KeyboardInterrupt:
+            print(f"[{self.device_type}] [INFO]: Keyboard interrupt.")
+        finally:
+            process.kill()
+            self.close_all_clients()
+            self.write_all_clients_srt()
 
     def process_rtsp_stream(self, rtsp_url):
         """
@@ -444,7 +572,7 @@ class TranscriptionTeeClient:
                 if not in_bytes:
                     break
                 audio_array = self.bytes_to_float_array(in_bytes)
-                self.multicast_packet(audio_array.tobytes())
+                self.multicast_audio(audio_array)
 
         except Exception as e:
             print(f"[{self.device_type}] [ERROR]: Failed to connect to {stream_type} stream: {e}")
@@ -464,6 +592,16 @@ class TranscriptionTeeClient:
             .run_async(pipe_stdout=True, pipe_stderr=True)
         )
 
+    def get_file_ffmpeg_process(self, filename):
+        # progress statistics are disabled since stderr is not read while streaming
+        return (
+            ffmpeg
+            .input(filename, threads=0)
+            .output('-', format='s16le', acodec='pcm_s16le', ac=1, ar=self.rate)
+            .global_args('-nostats', '-loglevel', 'error')
+            .run_async(pipe_stdout=True, pipe_stderr=True)
+        )
+
     def get_hls_ffmpeg_process(self, hls_url, save_file):
         if save_file is None:
             process = (
@@ -594,6 +732,11 @@ class TranscriptionTeeClient:
         except OSError as error:
             print(f"[{self.device_type}] [WARN]: Unable to access audio device. {error}")
 
+        # mix-down to one channel and resample to 16k if needed
+        resampler = None
+        if self.channels != 1 or self.rate != 16000:
+            resampler = utils.StreamingResampler(self.rate, 16000, self.channels, self.chunk)
+
         n_audio_file = 0
         if self.save_output_recording:
             if os.path.exists("chunks"):
@@ -611,16 +754,14 @@ class TranscriptionTeeClient:
                 data = self.stream.read(self.chunk, exception_on_overflow=False)
                 self.frames += data
 
-                # mix-down to one channel and resample to 16k if needed
-                resampled_audio = data
-                if self.channels != 1 or self.rate != 16000:
-                    resampled_audio = utils.resample_stream(data, self.rate, 16000, self.channels)
-
                 # normalize for numpy
-                audio_array = self.bytes_to_float_array(resampled_audio)
+                if resampler is not None:
+                    audio_array = resampler(data)
+                else:
+                    audio_array = self.bytes_to_float_array(data)
 
                 # multicast ava audio_array
-                self.multicast_packet(audio_array.tobytes())
+                self.multicast_audio(audio_array)
 
                 # save frames if more than a minute
                 if len(self.frames) > 60 * self.rate:
@@ -738,6 +879,8 @@ class TranscriptionClient(TranscriptionTeeClient):
         save_output_recording (bool, optional): Indicates whether to save recording from microphone.
         output_recording_filename (str, optional): File to save the output recording.
         output_transcription_path (str, optional): File to save the output transcription.
+        audio_format (str, optional): The audio encoding to request from the server, "float32", "int16" or "flac".
+        message_encoding (str, optional): The encoding of the transcript messages, "json" or "msgpack".
 
     Attributes:
         client (Client): An instance of the underlying Client class responsible for handling the WebSocket connection.
@@ -761,11 +904,13 @@ class TranscriptionClient(TranscriptionTeeClient):
             device_type=DeviceType.INPUT,
             save_output_recording=False,
             output_recording_filename="./output_recording.wav",
-            output_transcription_path="./output.srt"
+            output_transcription_path="./output.srt",
+            audio_format=FLOAT32,
+            message_encoding=JSON
     ):
         q = queue.Queue()
         self.client = Client(host, port, lang, translate, model, srt_file_path=output_transcription_path,
-                             use_vad=use_vad)
+                             use_vad=use_vad, audio_format=audio_format, message_encoding=message_encoding)
         if save_output_recording and not output_recording_filename.endswith(".wav"):
             raise ValueError(
                 f"[{device_type}] Please provide a valid `output_recording_filename`: {output_recording_filename}")
@@ -0,0 +1,73 @@
+import re
+
+
+def normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class HypothesisBuffer:
+    """
+    Commits the words on which consecutive transcriptions of a growing audio window agree (LocalAgreement-2).
+
+    Whisper transcribes the whole uncommitted window on every pass, and its last words change as more audio
+    arrives. A word is committed once two consecutive hypotheses agree on it and on all the words before it:
+    the longest common prefix of the previous and the new hypothesis is committed, and the rest of the new
+    hypothesis is kept to be compared with the next one. Word timestamps are absolute, so the audio before the
+    end of the last committed word can be dropped from the window.
+    """
+    def __init__(self, max_ngram=5):
+        """
+        Args:
+            max_ngram (int, optional): The longest run of already committed words dropped from the start of a
+                                       new hypothesis. Defaults to 5.
+        """
+        self.max_ngram = max_ngram
+        self.committed = []  # the last committed words, to drop their repetitions
+        self.committed_end = 0.0
+        self.pending = []  # the uncommitted words of the previous hypothesis
+
+    def insert(self, words):
+        """
+        Compares a new hypothesis to the previous one and commits the words both agree on.
+
+        Args:
+            words (list): The words of the new hypothesis, with absolute timestamps in seconds.
+
+        Returns:
+            list: The newly committed words, in order.
+        """
+        # words ending before the committed audio are left over from the previous window
+        words = [w for w in words if w.start > self.committed_end - 0.1]
+        words = self.drop_committed_ngram(words)
+
+        committed = []
+        for previous, word in zip(self.pending, words):
+            if normalize_word(previous.word) != normalize_word(word.word):
+                break
+            committed.append(word)
+
+        self.pending = words[len(committed):]
+        if committed:
+            self.committed_end = committed[-1].end
+            self.committed = (self.committed + committed)[-self.max_ngram:]
+        return committed
+
+    def drop_committed_ngram(self, words):
+        """
+        Drops the first words of a hypothesis if they repeat the last committed words, which happens when
+        Whisper transcribes the audio right at the start of the window again.
+        """
+        if not words or not self.committed or abs(words[0].start - self.committed_end) >= 1:
+            return words
+        for n in range(min(len(self.committed), len(words), self.max_ngram), 0, -1):
+            tail = [normalize_word(w.word) for w in self.committed[-n:]]
+            head = [normalize_word(w.word) for w in words[:n]]
+            if tail == head:
+                return words[n:]
+        return words
+
+    def clear(self):
+        """
+        Drops the pending hypothesis, e.g. once the window holds no speech anymore.
+        """
+        self.pending = []
@@ -0,0 +1,121 @@
+import numpy as np
+
+
+class LogMelCache:
+    """
+    Computes the log-Mel features of a session's audio windows incrementally.
+
+    A streaming session transcribes a window of its audio stream which only grows by a small amount of new
+    audio between two passes, and `FeatureExtractor` recomputes the STFT of the whole window every time. Most
+    frames only depend on audio inside the window though: the log-Mel values of these frames are cached, keyed
+    by the absolute position of the frame center in the stream, and only the frames over newly arrived audio are
+    computed. Frames at the window edges, which see the reflection padding at the start or the zero padding at
+    the end, are computed for every window, and frames only covering the zero padding are constant.
+
+    The cache keeps the log10 Mel values before normalization, which depends on the maximum of the whole window
+    and is applied per window, so the features match the ones of `FeatureExtractor` for the same window.
+
+    Cached frames are only reused by windows starting on the same frame grid, see `align_chunk`.
+    """
+    def __init__(self):
+        self.frames = None  # log10 Mel values of the cached frames, one column per frame
+        self.first = 0  # stream position of the center of the first cached frame
+        self.mel_filters = None
+        self.computed = 0
+        self.reused = 0
+
+    def __call__(self, feature_extractor, audio, offset):
+        """
+        Returns the features `feature_extractor(audio)` would return.
+
+        Args:
+            feature_extractor (FeatureExtractor): The feature extractor of the model.
+            audio (np.ndarray): The audio window.
+            offset (int): The position of the first sample of `audio` in the session's audio stream.
+
+        Returns:
+            np.ndarray: The normalized log-Mel features of the window, padded with `chunk_length` seconds.
+        """
+        hop, n_fft = feature_extractor.hop_length, feature_extractor.n_fft
+        half_window = n_fft // 2
+        n_samples = audio.shape[0]
+        n_frames = (n_samples + feature_extractor.n_samples) // hop
+        # frames [first_inner, end_inner) only cover audio of the window, frames from end_audio only cover zeros
+        first_inner = -(-half_window // hop)
+        end_inner = max(first_inner, (n_samples - half_window) // hop + 1)
+        end_audio = min(n_frames, (n_samples + half_window + hop - 1) // hop)
+
+        if self.mel_filters is not feature_extractor.mel_filters or (offset - self.first) % hop != 0:
+            self.reset(feature_extractor)
+        log_spec = np.full((self.mel_filters.shape[0], n_frames), -10.0, dtype=np.float32)
+
+        # the padded window, like the one `FeatureExtractor` frames, but only up to the end of the audio frames
+        padded = np.concatenate([audio, np.zeros(n_fft + hop, dtype=audio.dtype)])
+        padded = np.concatenate([padded[half_window:0:-1], padded])
+        windows = np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop]
+
+        edge_frames = list(range(min(first_inner, end_audio))) + list(range(end_inner, end_audio))
+        if edge_frames:
+            log_spec[:, edge_frames] = self.log_mel(windows[edge_frames])
+        if end_inner > first_inner:
+            log_spec[:, first_inner:end_inner] = self.get_inner_frames(
+                windows, offset, first_inner, end_inner, hop)
+
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+    @staticmethod
+    def align_chunk(start, end, offset, hop):
+        """
+        Moves the start of a chunk of a window onto the frame grid of the stream, the multiples of `hop`, so
+        that windows starting wherever the voice activity or the committed transcript leaves them share their
+        frames. The chunk is extended back to the previous grid position if the window has the audio, and
+        trimmed to the next one otherwise.
+
+        Args:
+            start (int): The position of the first sample of the chunk in the window.
+            end (int): The position after the last sample of the chunk in the window.
+            offset (int): The position of the first sample of the window in the session's audio stream.
+            hop (int): The hop length of the feature extractor.
+
+        Returns:
+            int: The aligned start of the chunk in the window, which is `end` if the chunk is too short.
+        """
+        shift = (offset + start) % hop
+        if shift <= start:
+            return start - shift
+        return min(start + hop - shift, end)
+
+    def get_inner_frames(self, windows, offset, start, end, hop):
+        """
+        Returns the log10 Mel values of the window frames [start, end), from the cache where possible.
+        """
+        first = offset + start * hop
+        if self.frames is None or first < self.first:
+            self.frames = np.empty((self.mel_filters.shape[0], 0), dtype=np.float32)
+            self.first = first
+        # drop the frames before the window, the stream does not go back
+        self.frames = self.frames[:, (first - self.first) // hop:]
+        self.first = first
+
+        reused = min(self.frames.shape[1], end - start)
+        if reused < end - start:
+            new_frames = self.log_mel(windows[start + reused:end])
+            self.frames = np.concatenate([self.frames[:, :reused], new_frames], axis=1)
+        self.computed += end - start - reused
+        self.reused += reused
+        return self.frames[:, :end - start]
+
+    def log_mel(self, windows):
+        """
+        Computes the log10 Mel values of audio frames, like `FeatureExtractor` before normalization.
+        """
+        spectrum = np.fft.rfft(windows * self.window, axis=-1).astype(np.complex64)
+        magnitudes = np.abs(spectrum) ** 2
+        mel_spec = self.mel_filters @ magnitudes.T
+        return np.log10(np.clip(mel_spec, a_min=1e-10, a_max=None))
+
+    def reset(self, feature_extractor):
+        self.frames = None
+        self.mel_filters = feature_extractor.mel_filters
+        self.window = np.hanning(feature_extractor.n_fft + 1)[:-1]
@@ -0,0 +1,66 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ModelPool:
+    """
+    Leases a fixed set of model instances to transcription sessions, one inference call at a time.
+
+    The instances are either distinct replicas of a model, or the same model listed several times when it
+    can serve concurrent calls by itself, e.g. a CTranslate2 model created with `num_workers` workers. A pool
+    of size 1 serializes all calls like a lock. The pool keeps track of how long sessions wait for a lease.
+    """
+    def __init__(self, models):
+        """
+        Args:
+            models (list): The model instances to lease, one per concurrent inference call.
+        """
+        self.size = len(models)
+        self.models = queue.Queue()
+        for model in models:
+            self.models.put(model)
+
+        self.metrics_lock = threading.Lock()
+        self.leases = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @contextmanager
+    def lease(self):
+        """
+        Blocks until a model instance is available, and gives it back when the context exits.
+
+        Yields:
+            The leased model instance.
+        """
+        start = time.time()
+        model = self.models.get()
+        wait = time.time() - start
+        with self.metrics_lock:
+            self.leases += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        logging.debug(f"Leased model after waiting {wait:.3f}s")
+        try:
+            yield model
+        finally:
+            self.models.put(model)
+
+    def get_metrics(self):
+        """
+        Returns:
+            dict: The pool size, the number of instances in use, and the number of leases with their
+                total, mean and max wait time in seconds.
+        """
+        with self.metrics_lock:
+            return {
+                "size": self.size,
+                "in_use": self.size - self.models.qsize(),
+                "leases": self.leases,
+                "total_wait": self.total_wait,
+                "mean_wait": self.total_wait / self.leases if self.leases else 0.0,
+                "max_wait": self.max_wait,
+            }
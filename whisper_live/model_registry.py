@@ -0,0 +1,142 @@
+import logging
+import threading
+from collections import OrderedDict
+
+
+class _Entry:
+    def __init__(self):
+        self.model = None
+        self.size = 0
+        self.refcount = 0
+        self.loaded = threading.Event()
+        self.error = None
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models, shared by all the connections asking for the same model.
+
+    Models are keyed by e.g. (model, device, compute_type). Connections `acquire` a model and `release` it once
+    they are done, and a model is only loaded by the first connection asking for it. Models which are no longer
+    used by any connection stay loaded for the next connections, until the total size of the loaded models
+    exceeds `max_memory`: then the least recently used of them are unloaded. Models still in use are never
+    unloaded, so the budget can be exceeded while they are.
+    """
+    def __init__(self, max_memory=None):
+        """
+        Args:
+            max_memory (int, optional): The memory budget of the loaded models, in bytes. Defaults to None, in
+                                        which case unused models are never unloaded.
+        """
+        self.max_memory = max_memory
+        self.entries = OrderedDict()  # least recently used first
+        self.lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def acquire(self, key, loader):
+        """
+        Returns the model for a key, loading it if needed, and holds a reference to it until `release`.
+
+        Connections asking for a model which is being loaded wait for the load instead of loading it again.
+
+        Args:
+            key (tuple): The key of the model.
+            loader (callable): Called without arguments to load the model if it is not loaded yet. Returns the
+                               model and its size in bytes.
+
+        Returns:
+            The loaded model.
+
+        Raises:
+            Exception: Whatever `loader` raised, if the model could not be loaded.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self.entries[key] = _Entry()
+            else:
+                self.entries.move_to_end(key)
+            entry.refcount += 1
+
+        if owner:
+            try:
+                entry.model, entry.size = loader()
+            except Exception as e:
+                entry.error = e
+            with self.lock:
+                if entry.error is None:
+                    self.loads += 1
+                    logging.info(f"Loaded model {key} ({entry.size / 1e6:.0f} MB).")
+                    self.evict()
+                else:
+                    del self.entries[key]
+                entry.loaded.set()
+        else:
+            entry.loaded.wait()
+            if entry.error is None:
+                with self.lock:
+                    self.hits += 1
+
+        if entry.error is not None:
+            raise entry.error
+        return entry.model
+
+    def release(self, key):
+        """
+        Drops a reference taken by `acquire`. The model stays loaded until it has to be evicted.
+
+        Args:
+            key (tuple): The key of the model.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.refcount == 0:
+                return
+            entry.refcount -= 1
+            self.evict()
+
+    def evict(self):
+        """
+        Unloads the least recently used models without references until the loaded models fit the budget.
+        Must be called with the lock held.
+        """
+        if self.max_memory is None:
+            return
+        total = self.get_memory()
+        for key, entry in list(self.entries.items()):
+            if total <= self.max_memory:
+                break
+            if entry.refcount == 0 and entry.loaded.is_set():
+                del self.entries[key]
+                total -= entry.size
+                self.evictions += 1
+                logging.info(f"Unloaded model {key} to stay within the {self.max_memory / 1e6:.0f} MB model budget.")
+        if total > self.max_memory:
+            logging.warning(
+                f"Models in use take {total / 1e6:.0f} MB, over the {self.max_memory / 1e6:.0f} MB model budget.")
+
+    def get_memory(self):
+        """
+        Returns:
+            int: The total size of the loaded models, in bytes.
+        """
+        return sum(entry.size for entry in self.entries.values())
+
+    def get_metrics(self):
+        """
+        Returns:
+            dict: The number of loaded models, their total size and references, and the number of loads,
+                cache hits and evictions.
+        """
+        with self.lock:
+            return {
+                "models": len(self.entries),
+                "memory": self.get_memory(),
+                "references": sum(entry.refcount for entry in self.entries.values()),
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,90 @@
+import argparse
+import json
+import logging
+import os
+import time
+
+from whisper_live.transcriber import WhisperModel
+from whisper_live.utils import create_srt_file
+
+
+def write_transcript(segments, output_file, output_format):
+    """
+    Writes the segments of a transcribed file.
+
+    Args:
+        segments (list): The segments returned by `WhisperModel.transcribe_long`.
+        output_file (str): The path of the output file, without extension.
+        output_format (str): One of "txt", "srt" or "json".
+    """
+    output_file = f"{output_file}.{output_format}"
+    segments = [{"start": s.start, "end": s.end, "text": s.text.strip()} for s in segments]
+    if os.path.dirname(output_file):
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    if output_format == "srt":
+        create_srt_file(segments, output_file)
+        return
+    with open(output_file, "w", encoding="utf-8") as f:
+        if output_format == "json":
+            json.dump(segments, f, ensure_ascii=False, indent=2)
+        else:
+            f.writelines(f"{segment['text']}\n" for segment in segments)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe audio files with batched inference.")
+    parser.add_argument('files',
+                        nargs='+',
+                        help='Audio files to transcribe.')
+    parser.add_argument('--model', '-m',
+                        type=str,
+                        default='small',
+                        help='Whisper model size, or path to a converted faster_whisper model.')
+    parser.add_argument('--device',
+                        type=str,
+                        default='auto',
+                        help='Device to run the model on, "cpu", "cuda" or "auto".')
+    parser.add_argument('--compute_type',
+                        type=str,
+                        default='default',
+                        help='CTranslate2 compute type of the model, e.g. "int8" or "float16".')
+    parser.add_argument('--batch_size', '-bs',
+                        type=int,
+                        default=8,
+                        help='Number of 30 seconds windows per model call.')
+    parser.add_argument('--language', '-l',
+                        type=str,
+                        default=None,
+                        help='Language of the audio. Detected for every window if not set.')
+    parser.add_argument('--task',
+                        type=str,
+                        default='transcribe',
+                        help='"transcribe" or "translate".')
+    parser.add_argument('--output_dir', '-o',
+                        type=str,
+                        default='.',
+                        help='Directory to write the transcripts to.')
+    parser.add_argument('--output_format', '-f',
+                        choices=['txt', 'srt', 'json'],
+                        default='srt',
+                        help='Format of the transcripts.')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    model = WhisperModel(args.model, device=args.device, compute_type=args.compute_type)
+    for path in args.files:
+        start = time.time()
+        segments, info = model.transcribe_long(
+            path, batch_size=args.batch_size, language=args.language, task=args.task)
+        elapsed = time.time() - start
+        name = os.path.splitext(os.path.basename(path))[0]
+        write_transcript(segments, os.path.join(args.output_dir, name), args.output_format)
+        if info is not None:
+            logging.info(f"Transcribed {path} ({info.duration:.0f}s of audio) in {elapsed:.1f}s, "
+                         f"{info.duration / elapsed:.1f}x real time.")
+        else:
+            logging.info(f"No speech found in {path}.")
+
+
+if __name__ == "__main__":
+    main()
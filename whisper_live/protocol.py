@@ -0,0 +1,93 @@
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PROTOCOL_VERSION = 2  # the latest version of the transcript messages
+JSON = "json"
+MSGPACK = "msgpack"
+
+
+def get_supported_encodings():
+    """
+    Returns:
+        list: The encodings of transcript messages available here, msgpack needs the `msgpack` package.
+    """
+    encodings = [JSON]
+    if msgpack is not None:
+        encodings.append(MSGPACK)
+    return encodings
+
+
+def encode_message(message, encoding=JSON):
+    """
+    Args:
+        message (dict): The message to send.
+        encoding (str, optional): "json" or "msgpack". Defaults to "json".
+
+    Returns:
+        str or bytes: A JSON text message, or a msgpack binary message.
+    """
+    if encoding == MSGPACK:
+        return msgpack.packb(message)
+    return json.dumps(message)
+
+
+def decode_message(data):
+    """
+    Args:
+        data (str or bytes): A received message, binary messages are msgpack encoded.
+
+    Returns:
+        dict: The decoded message.
+    """
+    if isinstance(data, bytes):
+        return msgpack.unpackb(data)
+    return json.loads(data)
+
+
+class SegmentRevisions:
+    """
+    Tracks the transcript segments sent to a client, to only send the segments which changed.
+
+    Version 2 of the protocol gives every segment a stable `id`, its position in the transcript, and a
+    `revision` number. Completed segments are sent once, with `completed` set, and never change again. The
+    segment being spoken takes the next id, and is sent again with a new revision whenever its text or
+    timestamps change. When it gets completed, the completed segments replace it, and the next segment being
+    spoken takes the following id. A client then updates its transcript in O(changes) per message, instead of
+    walking the last segments sent with every update of version 1.
+    """
+    def __init__(self):
+        self.n_completed = 0  # transcript segments already sent as completed
+        self.open_segment = None  # (id, revision, segment) of the last segment sent before its completion
+
+    def update(self, transcript, last_segment=None):
+        """
+        Args:
+            transcript (list): All the completed segments of the session.
+            last_segment (dict, optional): The segment being spoken. Defaults to None, in which case
+                the last one sent is left as it is.
+
+        Returns:
+            list: The new, changed or completed segments, with their `id`, `revision` and `completed` fields.
+        """
+        updates = []
+        for segment_id in range(self.n_completed, len(transcript)):
+            updates.append(self.revise(segment_id, transcript[segment_id], completed=True))
+        self.n_completed = len(transcript)
+        if last_segment is not None:
+            update = self.revise(len(transcript), last_segment, completed=False)
+            if update is not None:
+                updates.append(update)
+        return updates
+
+    def revise(self, segment_id, segment, completed):
+        revision = 0
+        if self.open_segment is not None and self.open_segment[0] == segment_id:
+            if not completed and self.open_segment[2] == segment:
+                return None
+            revision = self.open_segment[1] + 1
+        self.open_segment = None if completed else (segment_id, revision, segment)
+        return dict(segment, id=segment_id, revision=revision, completed=completed)
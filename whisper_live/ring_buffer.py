@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity audio buffer addressed by absolute sample offsets.
+
+    Samples are stored twice, in two mirrored halves of the underlying array, so that any range of up to
+    `capacity` retained samples is contiguous in memory and can be returned as a zero-copy view. Writing a
+    frame costs O(frame size) whatever the amount of buffered audio; the oldest samples are overwritten once
+    more than `capacity` samples have been written.
+
+    A view returned by `get` stays valid until `capacity - len(view)` more samples have been written.
+    """
+    def __init__(self, capacity, dtype=np.float32):
+        """
+        Args:
+            capacity (int): The number of most recent samples to retain.
+            dtype (np.dtype, optional): The sample type. Defaults to np.float32.
+        """
+        self.capacity = int(capacity)
+        self.buffer = np.zeros(2 * self.capacity, dtype=dtype)
+        self.end = 0
+
+    @property
+    def start(self):
+        """int: The absolute offset of the oldest retained sample."""
+        return max(0, self.end - self.capacity)
+
+    def __len__(self):
+        return self.end - self.start
+
+    def write(self, frames):
+        """
+        Appends audio samples to the buffer.
+
+        Args:
+            frames (np.ndarray): The samples to append.
+        """
+        n = frames.shape[0]
+        if n > self.capacity:
+            self.end += n - self.capacity
+            frames = frames[-self.capacity:]
+            n = self.capacity
+
+        pos = self.end % self.capacity
+        first = min(n, self.capacity - pos)
+        self.buffer[pos:pos + first] = frames[:first]
+        self.buffer[pos + self.capacity:pos + self.capacity + first] = frames[:first]
+        rest = n - first
+        if rest:
+            self.buffer[:rest] = frames[first:]
+            self.buffer[self.capacity:self.capacity + rest] = frames[first:]
+        self.end += n
+
+    def get(self, start, end=None):
+        """
+        Returns the retained samples between two absolute offsets without copying them.
+
+        Args:
+            start (int): The absolute offset of the first sample. Clamped to the oldest retained sample.
+            end (int, optional): The absolute offset after the last sample. Defaults to the end of the buffer.
+
+        Returns:
+            np.ndarray: A view of the requested samples, which must not be modified.
+        """
+        end = self.end if end is None else min(int(end), self.end)
+        start = min(max(int(start), self.start), end)
+        pos = start % self.capacity
+        return self.buffer[pos:pos + end - start]
@@ -0,0 +1,207 @@
+import asyncio
+import collections
+import logging
+import threading
+import time
+
+
+class SendQueue:
+    """
+    Sends the messages of a session from a dedicated thread, so that transcription never waits on the network.
+
+    Messages are either final, like completed segments or status messages, which are all sent in order, or
+    partial, like the segment being spoken, which only matter until the next partial. While a slow client
+    has not received a partial yet, a newer partial replaces it in the queue instead of queueing up behind it.
+    Partials can also be rate limited: a partial sent less than `min_interval` seconds after the previous one
+    waits in the queue, where newer partials replace it, unless a final is queued behind it. The time from
+    queueing a message to the end of its send is measured.
+    """
+    def __init__(self, send, start_thread=True, min_interval=0.0):
+        """
+        Args:
+            send (callable): Sends a message, typically the `send` method of the websocket.
+            start_thread (bool, optional): Whether to send from a dedicated thread. If False, messages are
+                sent as soon as they are queued, when `send` does not block, and partials are not rate
+                limited. Defaults to True.
+            min_interval (float, optional): The shortest time between two partials, in seconds. Defaults to 0.
+        """
+        self.send = send
+        self.min_interval = min_interval
+        self.last_partial_time = 0.0
+        self.messages = collections.deque()  # (message, final, queued_at)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.sent = 0
+        self.coalesced = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.thread = None
+        if start_thread:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def put(self, message, final=True):
+        """
+        Queues a message.
+
+        Args:
+            message (str or bytes): The message to send.
+            final (bool, optional): Whether the message must be sent. If False, the message is dropped when
+                another partial message is queued before it was sent. Defaults to True.
+        """
+        if self.thread is None:
+            self.deliver(message, time.time())
+            return
+        self.enqueue(message, final)
+
+    def enqueue(self, message, final):
+        """
+        Adds a message to the queue, in place of the queued partial if the message is partial.
+
+        Returns:
+            bool: Whether the message was queued, which it is not once the queue is closed.
+        """
+        with self.condition:
+            if self.closed:
+                return False
+            if not final:
+                for i, (_, queued_final, _) in enumerate(self.messages):
+                    if not queued_final:
+                        del self.messages[i]
+                        self.coalesced += 1
+                        break
+            self.messages.append((message, final, time.time()))
+            self.condition.notify()
+        return True
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.messages:
+                        if self.closed:
+                            return
+                        self.condition.wait()
+                        continue
+                    delay = self.get_delay()
+                    if delay <= 0:
+                        break
+                    # a newer partial may replace the queued one meanwhile
+                    self.condition.wait(delay)
+                message, final, queued_at = self.messages.popleft()
+            self.deliver(message, queued_at)
+            if not final:
+                self.last_partial_time = time.time()
+
+    def get_delay(self):
+        """
+        Returns:
+            float: How long the next queued message has to wait for the rate limit, in seconds.
+        """
+        if self.closed or any(final for _, final, _ in self.messages):
+            return 0.0
+        return self.last_partial_time + self.min_interval - time.time()
+
+    def deliver(self, message, queued_at):
+        try:
+            self.send(message)
+        except Exception as e:
+            logging.error(f"[ERROR]: Sending data to client: {e}")
+            return
+        self.record_latency(queued_at)
+
+    def record_latency(self, queued_at):
+        latency = time.time() - queued_at
+        self.sent += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def close(self, timeout=5.0):
+        """
+        Sends the queued messages, then stops the sender thread.
+
+        Args:
+            timeout (float, optional): The longest time to wait for the queued messages to be sent, in seconds.
+                Defaults to 5.0.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def get_metrics(self):
+        """
+        Returns:
+            dict: The number of messages sent, the number of partial messages replaced before they were sent,
+                and the mean and max time from queueing a message to the end of its send, in seconds.
+        """
+        return {
+            "messages_sent": self.sent,
+            "messages_coalesced": self.coalesced,
+            "mean_send_latency": self.total_latency / self.sent if self.sent else 0.0,
+            "max_send_latency": self.max_latency,
+        }
+
+
+class AsyncSendQueue(SendQueue):
+    """
+    A `SendQueue` whose messages are sent by a task on an asyncio event loop instead of a dedicated thread.
+
+    Messages can be queued from any thread, and are coalesced and rate limited like those of a `SendQueue`.
+    Once sending fails, the connection is considered lost: the queued messages are dropped, and so are the
+    next ones, so that a client which went away does not grow the queue.
+    """
+    def __init__(self, send, loop, min_interval=0.0):
+        """
+        Args:
+            send (coroutine function): Sends a message, typically the `send` method of an asyncio websocket.
+            loop (asyncio.AbstractEventLoop): The event loop running `send_messages`.
+            min_interval (float, optional): The shortest time between two partials, in seconds. Defaults to 0.
+        """
+        super().__init__(send, start_thread=False, min_interval=min_interval)
+        self.loop = loop
+        self.ready = asyncio.Event()
+
+    def put(self, message, final=True):
+        if self.enqueue(message, final):
+            self.loop.call_soon_threadsafe(self.ready.set)
+
+    def close(self, timeout=5.0):
+        """
+        Lets `send_messages` return once the queued messages are sent, can be called from any thread.
+        """
+        super().close(timeout)
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    async def send_messages(self):
+        """
+        Sends the queued messages until the queue is closed and empty, or sending fails.
+        """
+        while True:
+            with self.condition:
+                if not self.messages and self.closed:
+                    return
+                delay = self.get_delay() if self.messages else None
+                message = None
+                if delay is not None and delay <= 0:
+                    message, final, queued_at = self.messages.popleft()
+            if message is None:
+                # put and close set the event from the loop, so it cannot be set between the check and here
+                self.ready.clear()
+                try:
+                    await asyncio.wait_for(self.ready.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self.send(message)
+            except Exception as e:
+                logging.error(f"[ERROR]: Sending data to client: {e}")
+                with self.condition:
+                    self.closed = True
+                    self.messages.clear()
+                return
+            self.record_latency(queued_at)
+            if not final:
+                self.last_partial_time = time.time()
@@ -1,15 +1,30 @@
 import os
+import hashlib
 import time
 import threading
 import json
 import functools
 import logging
 import torch
-import numpy as np
 from websockets.sync.server import serve
 from websockets.exceptions import ConnectionClosed
-from whisper_live.vad import VoiceActivityDetector
-from whisper_live.transcriber import WhisperModel
+from whisper_live.vad import BatchVoiceActivityDetector, VoiceActivityEndpointer
+from whisper_live.transcriber import StageTimings, WhisperModel
+from whisper_live.batching import (
+    TranscriptionBatchScheduler,
+    TranscriptionRequest,
+    VoiceActivityBatchScheduler,
+    VoiceActivityRequest,
+)
+from whisper_live.model_pool import ModelPool
+from whisper_live.model_registry import ModelRegistry
+from whisper_live.mel_cache import LogMelCache
+from whisper_live.local_agreement import HypothesisBuffer
+from whisper_live.adaptive import AdaptiveScheduler
+from whisper_live.ring_buffer import AudioRingBuffer
+from whisper_live.send_queue import SendQueue
+from whisper_live.audio_format import FLOAT32, decode_audio, get_supported_formats
+from whisper_live.protocol import JSON, PROTOCOL_VERSION, SegmentRevisions, encode_message, get_supported_encodings
 
 try:
     from whisper_live.transcriber_tensorrt import WhisperTRTLLM
@@ -127,9 +142,23 @@ class TranscriptionServer:
 
     def __init__(self):
         self.client_manager = ClientManager()
-        self.no_voice_activity_chunks = 0
+        self.vad_detector = None
+        self.vad_scheduler = None
+        self.vad_slots = {}
+        self.endpointers = {}
         self.use_vad = True
         self.single_model = False
+        self.batch_inference = False
+        self.max_batch_size = 8
+        self.min_new_audio = 0.25
+        self.local_agreement = False
+        self.target_latency = None
+        self.max_update_rate = None
+        self.stage_timings = False
+        self.num_workers = 1
+        self.replicate_model = False
+        self.start_client_threads = True
+        self.audio_formats = {}
 
     def initialize_client(
             self, websocket, options, faster_whisper_custom_model_path,
@@ -145,6 +174,13 @@ class TranscriptionServer:
                     client_uid=options["uid"],
                     model=whisper_tensorrt_path,
                     single_model=self.single_model,
+                    min_new_audio=self.min_new_audio,
+                    start_thread=self.start_client_threads,
+                    target_latency=self.target_latency,
+                    audio_format=options["audio_format"],
+                    protocol_version=options["protocol_version"],
+                    message_encoding=options["message_encoding"],
+                    max_update_rate=self.max_update_rate,
                 )
                 logging.info("Running TensorRT backend.")
             except Exception as e:
@@ -172,6 +208,19 @@ class TranscriptionServer:
                 vad_parameters=options.get("vad_parameters"),
                 use_vad=self.use_vad,
                 single_model=self.single_model,
+                batch_inference=self.batch_inference,
+                max_batch_size=self.max_batch_size,
+                min_new_audio=self.min_new_audio,
+                start_thread=self.start_client_threads,
+                local_agreement=self.local_agreement,
+                num_workers=self.num_workers,
+                replicate_model=self.replicate_model,
+                target_latency=self.target_latency,
+                audio_format=options["audio_format"],
+                protocol_version=options["protocol_version"],
+                message_encoding=options["message_encoding"],
+                max_update_rate=self.max_update_rate,
+                stage_timings=self.stage_timings,
             )
             logging.info("Running faster_whisper backend.")
 
@@ -190,24 +239,15 @@ class TranscriptionServer:
         frame_data = websocket.recv()
         if frame_data == b"END_OF_AUDIO":
             return False
-        return np.frombuffer(frame_data, dtype=np.float32)
+        return decode_audio(frame_data, self.audio_formats.get(websocket, FLOAT32))
 
     def handle_new_connection(self, websocket, faster_whisper_custom_model_path,
                               whisper_tensorrt_path, trt_multilingual):
         try:
             logging.info("New client connected")
             options = websocket.recv()
-            options = json.loads(options)
-            self.use_vad = options.get('use_vad')
-            if self.client_manager.is_server_full(websocket, options):
-                websocket.close()
-                return False  # Indicates that the connection should not continue
-
-            if self.backend == "tensorrt":
-                self.vad_detector = VoiceActivityDetector(frame_rate=self.RATE)
-            self.initialize_client(websocket, options, faster_whisper_custom_model_path,
-                                   whisper_tensorrt_path, trt_multilingual)
-            return True
+            return self.setup_connection(websocket, options, faster_whisper_custom_model_path,
+                                         whisper_tensorrt_path, trt_multilingual)
         except json.JSONDecodeError:
             logging.error("Failed to decode JSON from client")
             return False
@@ -218,6 +258,84 @@ class TranscriptionServer:
             logging.error(f"Error during new connection initialization: {str(e)}")
             return False
 
+    def setup_connection(self, websocket, options, faster_whisper_custom_model_path,
+                         whisper_tensorrt_path, trt_multilingual):
+        """
+        Parses the options sent by a new client and initializes its transcription session.
+
+        Args:
+            websocket: The websocket of the new client.
+            options (str): The JSON encoded options sent by the client.
+
+        Returns:
+            bool: True if the session was created, False if the connection should not continue.
+        """
+        options = json.loads(options)
+        self.use_vad = options.get('use_vad')
+        if self.client_manager.is_server_full(websocket, options):
+            websocket.close()
+            return False  # Indicates that the connection should not continue
+
+        options["audio_format"] = self.negotiate_audio_format(websocket, options)
+        options["protocol_version"], options["message_encoding"] = self.negotiate_protocol(websocket, options)
+        self.initialize_client(websocket, options, faster_whisper_custom_model_path,
+                               whisper_tensorrt_path, trt_multilingual)
+        self.audio_formats[websocket] = options["audio_format"]
+        if self.backend == "tensorrt":
+            self.vad_slots[websocket] = self.vad_detector.allocate_slot()
+            self.endpointers[websocket] = VoiceActivityEndpointer(threshold=self.vad_detector.threshold)
+        return True
+
+    def negotiate_audio_format(self, websocket, options):
+        """
+        Picks the encoding of the audio sent by a new client.
+
+        Clients request a format with the "audio_format" option, and the format used is reported in the
+        SERVER_READY message. Clients which do not request one send float32 samples.
+
+        Args:
+            websocket: The websocket of the new client.
+            options (dict): The options sent by the client.
+
+        Returns:
+            str: The requested format if it is supported, "float32" otherwise.
+        """
+        audio_format = options.get("audio_format") or FLOAT32
+        if audio_format not in get_supported_formats():
+            websocket.send(json.dumps({
+                "uid": options["uid"],
+                "status": "WARNING",
+                "message": f"Audio format '{audio_format}' not supported on Server. Reverting to '{FLOAT32}'"
+            }))
+            audio_format = FLOAT32
+        return audio_format
+
+    def negotiate_protocol(self, websocket, options):
+        """
+        Picks the version and encoding of the transcript messages sent to a new client.
+
+        Clients request them with the "protocol_version" and "message_encoding" options, and the ones used are
+        reported in the SERVER_READY message. Clients which do not request them get version 1 JSON messages.
+
+        Args:
+            websocket: The websocket of the new client.
+            options (dict): The options sent by the client.
+
+        Returns:
+            tuple: The protocol version, the requested one up to the latest one, and the requested message
+                encoding if it is supported, "json" otherwise.
+        """
+        protocol_version = min(int(options.get("protocol_version") or 1), PROTOCOL_VERSION)
+        message_encoding = options.get("message_encoding") or JSON
+        if message_encoding not in get_supported_encodings():
+            websocket.send(json.dumps({
+                "uid": options["uid"],
+                "status": "WARNING",
+                "message": f"Message encoding '{message_encoding}' not supported on Server. Reverting to '{JSON}'"
+            }))
+            message_encoding = JSON
+        return protocol_version, message_encoding
+
     def process_audio_frames(self, websocket):
         frame_np = self.get_audio_from_websocket(websocket)
         client = self.client_manager.get_client(websocket)
@@ -228,9 +346,6 @@ class TranscriptionServer:
 
         if self.backend == "tensorrt":
             voice_active = self.voice_activity(websocket, frame_np)
-            if voice_active:
-                self.no_voice_activity_chunks = 0
-                client.set_eos(False)
             if self.use_vad and not voice_active:
                 return True
 
@@ -284,6 +399,7 @@ class TranscriptionServer:
             if self.client_manager.get_client(websocket):
                 self.cleanup(websocket)
                 websocket.close()
+            self.release_vad_state(websocket)
             del websocket
 
     def run(self,
@@ -293,13 +409,97 @@ class TranscriptionServer:
             faster_whisper_custom_model_path=None,
             whisper_tensorrt_path=None,
             trt_multilingual=False,
-            single_model=False):
+            single_model=False,
+            batch_inference=False,
+            max_batch_size=8,
+            min_new_audio=0.25,
+            num_workers=None,
+            replicate_model=False,
+            max_model_memory=None,
+            local_agreement=False,
+            target_latency=None,
+            max_update_rate=None,
+            stage_timings=False,
+            preload_models=None):
         """
         Run the transcription server.
 
         Args:
             host (str): The host address to bind the server.
             port (int): The port number to bind the server.
+            batch_inference (bool): Only used for faster_whisper in single model mode. If True, the pending audio
+                                    of all clients is transcribed with one batched model call per tick.
+            max_batch_size (int): The maximum number of client audio windows per batched model call.
+            min_new_audio (float): Seconds of new audio a client has to send before its audio is transcribed again.
+            num_workers (int): Only used for faster_whisper. The number of inference calls which can run
+                               concurrently on each shared model. Defaults to 1 in single model mode, and to the
+                               maximum number of clients otherwise, so that clients sharing a model by name do not
+                               wait on each other.
+            replicate_model (bool): If True, loads `num_workers` replicas of the shared model instead of a single
+                                    model with `num_workers` CTranslate2 workers.
+            max_model_memory (float): Only used for faster_whisper without single model mode. The memory budget, in
+                                      GB, of the models kept loaded for the connections. Unused models are unloaded,
+                                      least recently used first, when it is exceeded. Defaults to no limit.
+            local_agreement (bool): Only used for faster_whisper. If True, words are committed once two consecutive
+                                    transcriptions agree on them, and only the audio after them is transcribed again.
+            target_latency (float): If set, the targeted delay of partial results in seconds. Every client then
+                                    paces its transcription passes and the length of its window on the measured
+                                    inference time, instead of using `min_new_audio` and a fixed 25 seconds window.
+            max_update_rate (float): If set, the most partial results sent to each client per second. Results
+                                     which would exceed it are replaced by the next ones, completed segments are
+                                     always sent. Defaults to no limit.
+            stage_timings (bool): Only used for faster_whisper. If True, every client times the stages of its
+                                  transcriptions (VAD, features, encoder, decoding, word timestamps), counts the
+                                  temperature fallbacks, and logs the totals when it disconnects.
+            preload_models (list): Only used for faster_whisper without single model mode. The model sizes or
+                                   paths to load and warm up before accepting connections, e.g. ["small", "medium"].
+        """
+        handler = self.configure(
+            backend=backend,
+            faster_whisper_custom_model_path=faster_whisper_custom_model_path,
+            whisper_tensorrt_path=whisper_tensorrt_path,
+            trt_multilingual=trt_multilingual,
+            single_model=single_model,
+            batch_inference=batch_inference,
+            max_batch_size=max_batch_size,
+            min_new_audio=min_new_audio,
+            num_workers=num_workers,
+            replicate_model=replicate_model,
+            max_model_memory=max_model_memory,
+            local_agreement=local_agreement,
+            target_latency=target_latency,
+            max_update_rate=max_update_rate,
+            stage_timings=stage_timings,
+            preload_models=preload_models,
+        )
+        with serve(handler, host, port) as server:
+            server.serve_forever()
+
+    def configure(self,
+                  backend="tensorrt",
+                  faster_whisper_custom_model_path=None,
+                  whisper_tensorrt_path=None,
+                  trt_multilingual=False,
+                  single_model=False,
+                  batch_inference=False,
+                  max_batch_size=8,
+                  min_new_audio=0.25,
+                  num_workers=None,
+                  replicate_model=False,
+                  max_model_memory=None,
+                  local_agreement=False,
+                  target_latency=None,
+                  max_update_rate=None,
+                  stage_timings=False,
+                  preload_models=None):
+        """
+        Validates the options of `run` and sets up the server options shared by all connections.
+
+        Returns:
+            callable: The connection handler, i.e. `recv_audio` bound to the model options.
+
+        Raises:
+            ValueError: If a custom model path does not exist.
         """
         if faster_whisper_custom_model_path is not None and not os.path.exists(faster_whisper_custom_model_path):
             raise ValueError(f"Custom faster_whisper model '{faster_whisper_custom_model_path}' is not a valid path.")
@@ -309,30 +509,106 @@ class TranscriptionServer:
             if faster_whisper_custom_model_path or whisper_tensorrt_path:
                 logging.info("Custom model option was provided. Switching to single model mode.")
                 self.single_model = True
-                # TODO: load model initially
             else:
                 logging.info("Single model mode currently only works with custom models.")
-        with serve(
-                functools.partial(
-                    self.recv_audio,
-                    backend=backend,
-                    faster_whisper_custom_model_path=faster_whisper_custom_model_path,
-                    whisper_tensorrt_path=whisper_tensorrt_path,
-                    trt_multilingual=trt_multilingual
-                ),
-                host,
-                port
-        ) as server:
-            server.serve_forever()
+        self.min_new_audio = min_new_audio
+        self.local_agreement = local_agreement
+        if target_latency is not None:
+            logging.info(f"Pacing transcription on the measured inference time, targeting {target_latency}s latency.")
+            self.target_latency = target_latency
+        if max_update_rate is not None:
+            logging.info(f"Sending at most {max_update_rate} partial results per second to each client.")
+            self.max_update_rate = max_update_rate
+        if stage_timings:
+            logging.info("Timing the transcription stages of every client.")
+            self.stage_timings = True
+        if backend == "faster_whisper":
+            if num_workers is None:
+                num_workers = 1 if self.single_model else self.client_manager.max_clients
+            self.num_workers = num_workers
+            if num_workers > 1:
+                logging.info(f"Running up to {num_workers} inference calls concurrently on every shared model.")
+            if replicate_model and not self.single_model:
+                logging.info("Model replicas currently only work in single model mode.")
+            self.replicate_model = replicate_model and self.single_model
+        elif num_workers is not None and num_workers > 1:
+            logging.info("Multiple model workers currently only work with faster_whisper.")
+        if batch_inference:
+            if self.single_model and backend == "faster_whisper":
+                logging.info(f"Batching inference across clients, with up to {max_batch_size} clients per batch.")
+                self.batch_inference = True
+                self.max_batch_size = max_batch_size
+            else:
+                logging.info("Batch inference currently only works with faster_whisper in single model mode.")
+        if max_model_memory is not None:
+            logging.info(f"Unloading unused models above {max_model_memory} GB of loaded models.")
+            ServeClientFasterWhisper.MODEL_REGISTRY.max_memory = int(max_model_memory * 1e9)
+        if backend == "tensorrt":
+            # a single detector keeps the VAD state of every client, and runs their frames in batches
+            self.vad_detector = BatchVoiceActivityDetector(frame_rate=self.RATE)
+            self.vad_scheduler = VoiceActivityBatchScheduler(self.vad_detector)
+        self.preload_model(backend, faster_whisper_custom_model_path, whisper_tensorrt_path, trt_multilingual)
+        if preload_models:
+            if backend == "faster_whisper" and not self.single_model:
+                for model in preload_models:
+                    self.preload_shared_model(model)
+            else:
+                logging.info("Preloading models by name currently only works with faster_whisper without single "
+                             "model mode.")
+        return functools.partial(
+            self.recv_audio,
+            backend=backend,
+            faster_whisper_custom_model_path=faster_whisper_custom_model_path,
+            whisper_tensorrt_path=whisper_tensorrt_path,
+            trt_multilingual=trt_multilingual
+        )
+
+    def preload_model(self, backend, faster_whisper_custom_model_path, whisper_tensorrt_path, trt_multilingual):
+        """
+        Loads and warms up the configured model, so that the server only accepts connections once it is ready
+        and the first client does not wait for the model: the model shared by all clients in single model mode,
+        or a TensorRT engine handed to the first client otherwise.
+
+        If loading fails, the model is loaded when the first client connects instead, like without preloading.
+        """
+        start = time.time()
+        try:
+            if backend == "tensorrt" and whisper_tensorrt_path is not None:
+                ServeClientTensorRT.preload(whisper_tensorrt_path, trt_multilingual, single_model=self.single_model)
+            elif backend == "faster_whisper" and self.single_model and faster_whisper_custom_model_path is not None:
+                ServeClientFasterWhisper.preload(faster_whisper_custom_model_path, self.num_workers, self.replicate_model)
+            else:
+                return
+        except Exception as e:
+            logging.error(f"Failed to preload the {backend} model: {e}")
+            return
+        logging.info(f"Loaded and warmed up the {backend} model in {time.time() - start:.2f}s.")
+
+    def preload_shared_model(self, model):
+        """
+        Loads and warms up a faster_whisper model shared by the clients asking for it by name, see
+        `ServeClientFasterWhisper.preload_shared`. Failures are logged, the model is then loaded when a
+        client asks for it.
+
+        Args:
+            model (str): The model size, or the path to a converted model.
+        """
+        start = time.time()
+        try:
+            ServeClientFasterWhisper.preload_shared(model, self.num_workers)
+        except Exception as e:
+            logging.error(f"Failed to preload the faster_whisper model {model}: {e}")
+            return
+        logging.info(f"Loaded and warmed up the faster_whisper model {model} in {time.time() - start:.2f}s.")
 
     def voice_activity(self, websocket, frame_np):
         """
         Evaluates the voice activity in a given audio frame and manages the state of voice activity detection.
 
-        This method uses the configured voice activity detection (VAD) model to assess whether the given audio frame
-        contains speech. If the VAD model detects no voice activity for more than three consecutive frames,
-        it sets an end-of-speech (EOS) flag for the associated client. This method aims to efficiently manage
-        speech detection to improve subsequent processing steps.
+        This method uses the configured voice activity detection (VAD) model to compute the speech probability of
+        the given audio frame. The frame is batched with the frames of the other clients received at the same time,
+        and evaluated with the VAD state of its own client. The probability then drives the endpointing state of the
+        client, which sets or clears its end-of-speech (EOS) flag when speech ends or starts.
 
         Args:
             websocket: The websocket associated with the current client. Used to retrieve the client object
@@ -341,19 +617,28 @@ class TranscriptionServer:
                                     the audio data for the current frame.
 
         Returns:
-            bool: True if voice activity is detected in the current frame, False otherwise. When returning False
-                after detecting no voice activity for more than three consecutive frames, it also triggers the
-                end-of-speech (EOS) flag for the client.
-        """
-        if not self.vad_detector(frame_np):
-            self.no_voice_activity_chunks += 1
-            if self.no_voice_activity_chunks > 3:
-                client = self.client_manager.get_client(websocket)
-                if not client.eos:
-                    client.set_eos(True)
-                time.sleep(0.1)  # Sleep 100m; wait some voice activity.
-            return False
-        return True
+            bool: True if the client is in speech after this frame, False otherwise.
+        """
+        speech_prob = self.vad_scheduler.submit(VoiceActivityRequest(self.vad_slots[websocket], frame_np)).result()
+        return self.update_voice_activity(websocket, speech_prob)
+
+    def update_voice_activity(self, websocket, speech_prob):
+        """
+        Updates the endpointing state of a client with the speech probability of its latest audio frame, and
+        forwards end-of-speech (EOS) changes to the client.
+
+        Args:
+            websocket: The websocket associated with the client.
+            speech_prob (float): The speech probability of the frame.
+
+        Returns:
+            bool: True if the client is in speech after this frame, False otherwise.
+        """
+        endpointer = self.endpointers[websocket]
+        eos = endpointer.update(speech_prob)
+        if eos is not None:
+            self.client_manager.get_client(websocket).set_eos(eos)
+        return endpointer.speech
 
     def cleanup(self, websocket):
         """
@@ -364,20 +649,60 @@ class TranscriptionServer:
         """
         if self.client_manager.get_client(websocket):
             self.client_manager.remove_client(websocket)
+        self.audio_formats.pop(websocket, None)
+
+    def release_vad_state(self, websocket):
+        """
+        Frees the VAD state slot of a disconnected client.
+
+        Args:
+            websocket: The websocket associated with the client.
+        """
+        slot = self.vad_slots.pop(websocket, None)
+        if slot is not None:
+            self.vad_detector.release_slot(slot)
+        self.endpointers.pop(websocket, None)
 
 
 class ServeClientBase(object):
     RATE = 16000
     SERVER_READY = "SERVER_READY"
     DISCONNECT = "DISCONNECT"
+    MAX_BUFFER_DURATION = 45  # seconds of audio kept in the session buffer
 
-    def __init__(self, client_uid, websocket):
+    def __init__(self, client_uid, websocket, min_new_audio=0.25, target_latency=None, audio_format=FLOAT32,
+                 protocol_version=1, message_encoding=JSON, start_thread=True, max_update_rate=None):
         self.client_uid = client_uid
         self.websocket = websocket
+        min_interval = 1.0 / max_update_rate if max_update_rate else 0.0
+        if isinstance(getattr(websocket, "send_queue", None), SendQueue):
+            # a websocket served by an event loop comes with its own queue, sent from a task on the loop
+            self.send_queue = websocket.send_queue
+            self.send_queue.min_interval = min_interval
+        else:
+            # without a transcription thread, the server passes a websocket whose send does not block
+            self.send_queue = SendQueue(websocket.send, start_thread=start_thread, min_interval=min_interval)
+        self.n_sent_transcript = 0  # transcript segments when the last transcription message was queued
+        self.last_sent_hash = None  # content hash of the last transcription message queued
+        self.suppressed_updates = 0
+        self.audio_format = audio_format
+        self.protocol_version = protocol_version
+        self.message_encoding = message_encoding
+        self.segment_revisions = SegmentRevisions()
         self.frames = b""
         self.timestamp_offset = 0.0
-        self.frames_np = None
-        self.frames_offset = 0.0
+        self.audio_buffer = AudioRingBuffer(self.MAX_BUFFER_DURATION * self.RATE)
+        self.processed_start = 0  # buffer position of the start of the last chunk taken for processing
+        self.processed_end = 0  # buffer position of the end of the last chunk taken for processing
+        self.last_window = None  # (start, end) buffer positions of the last transcribed chunk
+        self.last_result = None
+        self.passes = 0
+        self.skipped_passes = 0
+        self.min_audio_duration = 1.0  # shortest audio chunk worth transcribing, in seconds
+        self.min_new_audio = min_new_audio  # seconds of new audio that wake up the transcription thread
+        self.pending_audio_timeout = 0.5  # re-transcribe a pending chunk after 0.5 seconds without new audio
+        self.max_window_duration = 25  # drop the oldest uncommitted audio beyond 25 seconds
+        self.scheduler = AdaptiveScheduler(target_latency) if target_latency is not None else None
         self.text = []
         self.current_out = ''
         self.prev_out = ''
@@ -394,10 +719,14 @@ class ServeClientBase(object):
 
         # threading
         self.lock = threading.Lock()
+        self.audio_available = threading.Condition(self.lock)
 
     def speech_to_text(self):
         raise NotImplementedError
 
+    def process_audio_chunk(self):
+        raise NotImplementedError
+
     def transcribe_audio(self):
         raise NotImplementedError
 
@@ -409,58 +738,146 @@ class ServeClientBase(object):
         Add audio frames to the ongoing audio stream buffer.
 
         This method is responsible for maintaining the audio stream buffer, allowing the continuous addition
-        of audio frames as they are received. It also ensures that the buffer does not exceed a specified size
-        to prevent excessive memory usage.
+        of audio frames as they are received. The frames are written into a fixed-capacity ring buffer, so adding
+        a frame costs the same whatever the amount of buffered audio and memory usage stays bounded.
 
-        If the buffer size exceeds a threshold (45 seconds of audio data), it discards the oldest 30 seconds
-        of audio data to maintain a reasonable buffer size. If the buffer is empty, it initializes it with the provided
-        audio frame. The audio stream buffer is used for real-time processing of audio data for transcription.
+        Once the buffer holds more than `MAX_BUFFER_DURATION` seconds of audio, the oldest samples are overwritten.
+        The audio stream buffer is used for real-time processing of audio data for transcription.
 
         Args:
             frame_np (numpy.ndarray): The audio frame data as a NumPy array.
 
         """
         self.lock.acquire()
-        if self.frames_np is not None and self.frames_np.shape[0] > 45 * self.RATE:
-            self.frames_offset += 30.0
-            self.frames_np = self.frames_np[int(30 * self.RATE):]
-            # check timestamp offset(should be >= self.frame_offset)
-            # this basically means that there is no speech as timestamp offset hasnt updated
-            # and is less than frame_offset
-            if self.timestamp_offset < self.frames_offset:
-                self.timestamp_offset = self.frames_offset
-        if self.frames_np is None:
-            self.frames_np = frame_np.copy()
-        else:
-            self.frames_np = np.concatenate((self.frames_np, frame_np), axis=0)
+        self.audio_buffer.write(frame_np)
+        # check timestamp offset(should be >= the oldest buffered sample)
+        # this basically means that there is no speech as timestamp offset hasnt updated
+        # and points to audio that has been overwritten
+        buffer_start = self.audio_buffer.start / self.RATE
+        if self.timestamp_offset < buffer_start:
+            self.timestamp_offset = buffer_start
+        if self.has_audio_to_process():
+            self.audio_available.notify()
         self.lock.release()
 
+    def get_pending_duration(self):
+        """
+        Returns the duration in seconds of the buffered audio which has not been committed yet.
+        """
+        return (self.audio_buffer.end - int(self.timestamp_offset * self.RATE)) / self.RATE
+
+    def has_audio_to_process(self):
+        """
+        Checks whether the transcription thread should run on the pending audio.
+
+        Returns:
+            bool: True if the pending chunk lasts at least `min_audio_duration` seconds and at least
+                `min_new_audio` seconds of it arrived after the last processed chunk.
+        """
+        new_audio = (self.audio_buffer.end - self.processed_end) / self.RATE
+        return self.get_pending_duration() >= self.min_audio_duration and new_audio >= self.min_new_audio
+
+    def wait_for_audio(self):
+        """
+        Blocks the transcription thread until there is audio to process.
+
+        The thread sleeps on a condition variable, so an idle session does not use any CPU. It is
+        woken up by `add_frames` once enough new audio arrived, and by `cleanup`. A chunk that was
+        already processed but not committed yet is processed again after `pending_audio_timeout`
+        seconds without new audio, so that the output of a finished utterance still gets committed.
+
+        Returns:
+            bool: False if the session is exiting, True otherwise.
+        """
+        with self.audio_available:
+            while not self.exit and not self.has_audio_to_process():
+                timeout = None
+                if self.get_pending_duration() >= self.min_audio_duration:
+                    timeout = self.pending_audio_timeout
+                if not self.audio_available.wait(timeout) and timeout is not None:
+                    break
+            return not self.exit
+
+    def transcribe_window(self, input_bytes):
+        """
+        Transcribes the chunk returned by `get_audio_chunk_for_processing`, unless no audio was added or
+        committed since the previous pass: the window is then the same, and so is the result of the
+        previous pass, which is returned without running the model again.
+
+        The model gets a copy of the chunk: a view on the ring buffer is overwritten once `add_frames` wrote
+        `MAX_BUFFER_DURATION` seconds minus its duration, which can happen during a slow pass or while the
+        chunk waits in a batch queue.
+
+        With an adaptive scheduler, the time of the pass updates `min_new_audio` and `max_window_duration`.
+
+        Args:
+            input_bytes (np.ndarray): The audio chunk to transcribe, possibly a view on the ring buffer.
+
+        Returns:
+            The result of `transcribe_audio` for the chunk.
+        """
+        window = (self.processed_start, self.processed_end)
+        self.passes += 1
+        if window == self.last_window:
+            self.skipped_passes += 1
+            return self.last_result
+        start = time.time()
+        result = self.transcribe_audio(input_bytes.copy())
+        if self.scheduler is not None:
+            self.scheduler.update(time.time() - start, input_bytes.shape[0] / self.RATE)
+            self.min_new_audio = self.scheduler.get_min_new_audio(self.min_new_audio)
+            self.max_window_duration = self.scheduler.get_max_window()
+        self.last_window, self.last_result = window, result
+        return result
+
+    def get_metrics(self):
+        """
+        Returns:
+            dict: The number of transcription passes of the session, how many of them reused the result
+                of the previous pass, and how many results were not sent since they did not change. With an
+                adaptive scheduler, also its real time factor and current `min_new_audio` and
+                `max_window_duration`.
+        """
+        metrics = {
+            "passes": self.passes,
+            "skipped_passes": self.skipped_passes,
+            "suppressed_updates": self.suppressed_updates,
+        }
+        if self.scheduler is not None:
+            metrics.update(
+                real_time_factor=self.scheduler.get_real_time_factor(),
+                min_new_audio=self.min_new_audio,
+                max_window_duration=self.max_window_duration,
+            )
+        return metrics
+
     def clip_audio_if_no_valid_segment(self):
         """
         Update the timestamp offset based on audio buffer status.
-        Clip audio if the current chunk exceeds 30 seconds, this basically implies that
-        no valid segment for the last 30 seconds from whisper
+        Clip audio if the current chunk exceeds `max_window_duration` seconds, this basically implies that
+        no valid segment for the last `max_window_duration` seconds from whisper
         """
-        if self.frames_np[int((self.timestamp_offset - self.frames_offset) * self.RATE):].shape[0] > 25 * self.RATE:
-            duration = self.frames_np.shape[0] / self.RATE
-            self.timestamp_offset = self.frames_offset + duration - 5
+        buffer_end = self.audio_buffer.end
+        if buffer_end - int(self.timestamp_offset * self.RATE) > self.max_window_duration * self.RATE:
+            self.timestamp_offset = buffer_end / self.RATE - 5
 
     def get_audio_chunk_for_processing(self):
         """
         Retrieves the next chunk of audio data for processing based on the current offsets.
 
-        Calculates which part of the audio data should be processed next, based on
-        the difference between the current timestamp offset and the frame's offset, scaled by
-        the audio sample rate (RATE). It then returns this chunk of audio data along with its
-        duration in seconds.
+        The chunk starts at the current timestamp offset, scaled by the audio sample rate (RATE), and
+        ends with the most recent audio. It is returned as a view on the session's ring buffer, without
+        copying, along with its duration in seconds. The view is only valid until the buffer wraps around
+        it, see `transcribe_window`.
 
         Returns:
             tuple: A tuple containing:
                 - input_bytes (np.ndarray): The next chunk of audio data to be processed.
                 - duration (float): The duration of the audio chunk in seconds.
         """
-        samples_take = max(0, (self.timestamp_offset - self.frames_offset) * self.RATE)
-        input_bytes = self.frames_np[int(samples_take):].copy()
+        self.processed_end = self.audio_buffer.end
+        input_bytes = self.audio_buffer.get(int(self.timestamp_offset * self.RATE), self.processed_end)
+        self.processed_start = self.processed_end - input_bytes.shape[0]
         duration = input_bytes.shape[0] / self.RATE
         return input_bytes, duration
 
@@ -473,6 +890,9 @@ class ServeClientBase(object):
         recent segment of text if provided (which is considered incomplete because of the possibility
         of the last word being truncated in the audio chunk).
 
+        With version 2 of the protocol, only the segments which are new or changed since the last message
+        are included, see `SegmentRevisions`.
+
         Args:
             last_segment (str, optional): The most recent segment of transcribed text to be added
                                           to the list of segments. Defaults to None.
@@ -480,6 +900,9 @@ class ServeClientBase(object):
         Returns:
             list: A list of transcribed text segments to be sent to the client.
         """
+        if self.protocol_version >= 2:
+            return self.segment_revisions.update(self.transcript, last_segment)
+
         segments = []
         if len(self.transcript) >= self.send_last_n_segments:
             segments = self.transcript[-self.send_last_n_segments:].copy()
@@ -505,21 +928,54 @@ class ServeClientBase(object):
         """
         Sends the specified transcription segments to the client over the websocket connection.
 
-        This method formats the transcription segments into a JSON object and attempts to send
-        this object to the client. If an error occurs during the send operation, it logs the error.
+        This method formats the transcription segments into a JSON object and queues it for the sender
+        thread of the session. Messages which do not complete any segment only update the segment being
+        spoken, so they are partial: a newer one replaces them if the client did not receive them yet, or
+        if they exceed the maximum update rate. A message with the same content hash as the last one sent is
+        not sent again, as happens during pauses or when a pass decodes the same text.
 
         Returns:
             segments (list): A list of transcription segments to be sent to the client.
         """
-        try:
-            self.websocket.send(
-                json.dumps({
-                    "uid": self.client_uid,
-                    "segments": segments,
-                })
-            )
-        except Exception as e:
-            logging.error(f"[ERROR]: Sending data to client: {e}")
+        message = encode_message({
+            "uid": self.client_uid,
+            "segments": segments,
+        }, self.message_encoding)
+        # a digest rather than a copy of the segments, so the session keeps no reference to them
+        digest = hashlib.blake2b(message.encode() if isinstance(message, str) else message, digest_size=16).digest()
+        if digest == self.last_sent_hash:
+            self.suppressed_updates += 1
+            return
+        self.last_sent_hash = digest
+        final = len(self.transcript) != self.n_sent_transcript
+        self.n_sent_transcript = len(self.transcript)
+        self.send_message(message, final=final)
+
+    def send_message(self, message, final=True):
+        """
+        Queues a message for the client, without waiting for it to be sent.
+
+        Args:
+            message (str or bytes): The encoded message.
+            final (bool, optional): Whether the message must be sent, see `SendQueue.put`. Defaults to True.
+        """
+        self.send_queue.put(message, final=final)
+
+    def send_server_ready(self, backend):
+        """
+        Tells the client that the session is ready, along with the audio format and protocol it negotiated.
+
+        Args:
+            backend (str): The backend running the session.
+        """
+        self.send_message(json.dumps({
+            "uid": self.client_uid,
+            "message": self.SERVER_READY,
+            "backend": backend,
+            "audio_format": self.audio_format,
+            "protocol_version": self.protocol_version,
+            "message_encoding": self.message_encoding,
+        }))
 
     def disconnect(self):
         """
@@ -529,7 +985,7 @@ class ServeClientBase(object):
         that the transcription service is disconnecting gracefully.
 
         """
-        self.websocket.send(json.dumps({
+        self.send_message(json.dumps({
             "uid": self.client_uid,
             "message": self.DISCONNECT
         }))
@@ -544,15 +1000,24 @@ class ServeClientBase(object):
 
         """
         logging.info("Cleaning up.")
-        self.exit = True
+        logging.info(f"Session metrics: {self.get_metrics()}")
+        with self.audio_available:
+            self.exit = True
+            self.audio_available.notify()
+        # deliver the last messages before the server closes the connection
+        self.send_queue.close()
+        logging.info(f"Send queue metrics: {self.send_queue.get_metrics()}")
 
 
 class ServeClientTensorRT(ServeClientBase):
     SINGLE_MODEL = None
     SINGLE_MODEL_LOCK = threading.Lock()
+    IDLE_MODELS = {}  # (engine directory, multilingual) -> warmed up engines not used by any connection
+    IDLE_MODELS_LOCK = threading.Lock()
 
     def __init__(self, websocket, task="transcribe", multilingual=False, language=None, client_uid=None, model=None,
-                 single_model=False):
+                 single_model=False, min_new_audio=0.25, start_thread=True, target_latency=None,
+                 audio_format=FLOAT32, protocol_version=1, message_encoding=JSON, max_update_rate=None):
         """
         Initialize a ServeClient instance.
         The Whisper model is initialized based on the client's language and device availability.
@@ -567,13 +1032,33 @@ class ServeClientTensorRT(ServeClientBase):
             language (str, optional): The language for transcription. Defaults to None.
             client_uid (str, optional): A unique identifier for the client. Defaults to None.
             single_model (bool, optional): Whether to instantiate a new model for each client connection. Defaults to False.
-
-        """
-        super().__init__(client_uid, websocket)
+            min_new_audio (float, optional): Seconds of new audio that trigger a new transcription. Defaults to 0.25.
+            start_thread (bool, optional): Whether to run `speech_to_text` in a dedicated thread. If False, the
+                                           server calls `process_audio_chunk` itself. Defaults to True.
+            target_latency (float, optional): If set, the targeted delay of partial results in seconds, from which
+                                              an adaptive scheduler paces the transcription. Defaults to None.
+            audio_format (str, optional): The audio format negotiated with the client, reported in the
+                                          SERVER_READY message. Defaults to "float32".
+            protocol_version (int, optional): The version of the transcript messages negotiated with the client.
+                                              Version 2 only sends new or changed segments. Defaults to 1.
+            message_encoding (str, optional): The encoding of the transcript messages, "json" or "msgpack".
+                                              Defaults to "json".
+            max_update_rate (float, optional): If set, the most partial results sent to the client per second,
+                                               the latest one is sent when the rate allows. Defaults to None.
+
+        """
+        super().__init__(client_uid, websocket, min_new_audio=min_new_audio, target_latency=target_latency,
+                         audio_format=audio_format, protocol_version=protocol_version,
+                         message_encoding=message_encoding, start_thread=start_thread,
+                         max_update_rate=max_update_rate)
         self.language = language if multilingual else "en"
         self.task = task
         self.eos = False
+        self.min_audio_duration = 0.4
 
+        self.single_model = single_model
+        self.model_key = (model, multilingual)
+        self.transcriber_lock = threading.Lock()  # held by a pass while it uses the engine of the connection
         if single_model:
             if ServeClientTensorRT.SINGLE_MODEL is None:
                 self.create_model(model, multilingual)
@@ -581,17 +1066,19 @@ class ServeClientTensorRT(ServeClientBase):
             else:
                 self.transcriber = ServeClientTensorRT.SINGLE_MODEL
         else:
-            self.create_model(model, multilingual)
+            # reuse an engine warmed up at startup or left by a closed connection
+            with ServeClientTensorRT.IDLE_MODELS_LOCK:
+                idle_models = ServeClientTensorRT.IDLE_MODELS.get(self.model_key)
+                self.transcriber = idle_models.pop() if idle_models else None
+            if self.transcriber is None:
+                self.create_model(model, multilingual)
 
         # threading
-        self.trans_thread = threading.Thread(target=self.speech_to_text)
-        self.trans_thread.start()
+        if start_thread:
+            self.trans_thread = threading.Thread(target=self.speech_to_text)
+            self.trans_thread.start()
 
-        self.websocket.send(json.dumps({
-            "uid": self.client_uid,
-            "message": self.SERVER_READY,
-            "backend": "tensorrt"
-        }))
+        self.send_server_ready("tensorrt")
 
     def create_model(self, model, multilingual, warmup=True):
         """
@@ -615,10 +1102,80 @@ class ServeClientTensorRT(ServeClientBase):
         Args:
             warmup_steps (int): Number of steps to warm up the model for.
         """
+        self.warmup_model(self.transcriber, warmup_steps)
+
+    @staticmethod
+    def warmup_model(transcriber, warmup_steps=10):
+        """
+        Runs a few inferences on `assets/jfk.flac`.
+
+        Args:
+            transcriber (WhisperTRTLLM): The model to warm up.
+            warmup_steps (int): Number of steps to warm up the model for.
+        """
         logging.info("[INFO:] Warming up TensorRT engine..")
-        mel, _ = self.transcriber.log_mel_spectrogram("assets/jfk.flac")
+        mel, _ = transcriber.log_mel_spectrogram("assets/jfk.flac")
         for i in range(warmup_steps):
-            self.transcriber.transcribe(mel)
+            transcriber.transcribe(mel)
+
+    @classmethod
+    def preload(cls, model, multilingual, single_model=True):
+        """
+        Loads and warms up an engine before any client connects: the engine shared by all connections in single
+        model mode, otherwise an engine handed to the first connection.
+
+        Args:
+            model (str): The TensorRT engine directory.
+            multilingual (bool): Whether the model is multilingual.
+            single_model (bool, optional): Whether all connections share the engine. Defaults to True.
+        """
+        transcriber = WhisperTRTLLM(
+            model,
+            assets_dir="assets",
+            device="cuda",
+            is_multilingual=multilingual,
+            language=None if multilingual else "en",
+            task="transcribe"
+        )
+        cls.warmup_model(transcriber)
+        if single_model:
+            cls.SINGLE_MODEL = transcriber
+        else:
+            cls.release_model((model, multilingual), transcriber)
+
+    @classmethod
+    def release_model(cls, model_key, transcriber):
+        """
+        Keeps a warmed up engine for the next connection using the same engine directory.
+
+        Args:
+            model_key (tuple): The engine directory, and whether the model is multilingual.
+            transcriber (WhisperTRTLLM): The engine, no longer used by any connection.
+        """
+        with cls.IDLE_MODELS_LOCK:
+            cls.IDLE_MODELS.setdefault(model_key, []).append(transcriber)
+
+    def cleanup(self):
+        """
+        Stops the transcription thread, and keeps the engine of the connection for the next connections once
+        no pass uses it anymore, including a pass run by the async server on its executor.
+        """
+        super().cleanup()
+        if self.single_model or getattr(self, "transcriber", None) is None:
+            return
+        trans_thread = getattr(self, "trans_thread", None)
+        if trans_thread is not None and trans_thread is not threading.current_thread():
+            trans_thread.join(timeout=10)
+            if trans_thread.is_alive():
+                return
+        if not self.transcriber_lock.acquire(timeout=10):
+            logging.warning("[WhisperTensorRT:] A pass is still running, not reusing the engine.")
+            return
+        try:
+            transcriber, self.transcriber = self.transcriber, None
+        finally:
+            self.transcriber_lock.release()
+        ServeClientTensorRT.release_model(self.model_key, transcriber)
 
     def set_eos(self, eos):
         """
@@ -628,6 +1185,10 @@ class ServeClientTensorRT(ServeClientBase):
             eos (bool): The value to set for the EOS flag.
         """
         self.lock.acquire()
+        if eos and not self.eos:
+            # mark the pending chunk as new so that it is transcribed and committed right away
+            self.processed_end = min(self.processed_end, int(self.timestamp_offset * self.RATE))
+            self.audio_available.notify()
         self.eos = eos
         self.lock.release()
 
@@ -641,29 +1202,38 @@ class ServeClientTensorRT(ServeClientBase):
             duration (float): Duration of the transcribed audio chunk.
         """
         segments = self.prepare_segments({"text": last_segment})
-        self.send_transcription_to_client(segments)
+        if segments:
+            self.send_transcription_to_client(segments)
         if self.eos:
             self.update_timestamp_offset(last_segment, duration)
 
     def transcribe_audio(self, input_bytes):
         """
-        Transcribe the audio chunk and send the results to the client.
+        Transcribe the audio chunk.
 
         Args:
             input_bytes (np.array): The audio chunk to transcribe.
-        """
-        if ServeClientTensorRT.SINGLE_MODEL:
-            ServeClientTensorRT.SINGLE_MODEL_LOCK.acquire()
-        logging.info(f"[WhisperTensorRT:] Processing audio with duration: {input_bytes.shape[0] / self.RATE}")
-        mel, duration = self.transcriber.log_mel_spectrogram(input_bytes)
-        last_segment = self.transcriber.transcribe(
-            mel,
-            text_prefix=f"<|startoftranscript|><|{self.language}|><|{self.task}|><|notimestamps|>"
-        )
-        if ServeClientTensorRT.SINGLE_MODEL:
-            ServeClientTensorRT.SINGLE_MODEL_LOCK.release()
-        if last_segment:
-            self.handle_transcription_output(last_segment, duration)
+
+        Returns:
+            str: The transcribed text, empty if there is none or if the connection was cleaned up.
+        """
+        with self.transcriber_lock:
+            if self.transcriber is None:
+                # the engine went back to the idle engines with the connection
+                return ""
+            single_model_lock = ServeClientTensorRT.SINGLE_MODEL_LOCK if ServeClientTensorRT.SINGLE_MODEL else None
+            if single_model_lock is not None:
+                single_model_lock.acquire()
+            try:
+                logging.info(f"[WhisperTensorRT:] Processing audio with duration: {input_bytes.shape[0] / self.RATE}")
+                mel, _ = self.transcriber.log_mel_spectrogram(input_bytes)
+                return self.transcriber.transcribe(
+                    mel,
+                    text_prefix=f"<|startoftranscript|><|{self.language}|><|{self.task}|><|notimestamps|>"
+                )
+            finally:
+                if single_model_lock is not None:
+                    single_model_lock.release()
 
     def update_timestamp_offset(self, last_segment, duration):
         """
@@ -697,35 +1267,40 @@ class ServeClientTensorRT(ServeClientBase):
 
         """
         while True:
-            if self.exit:
+            if not self.wait_for_audio():
                 logging.info("Exiting speech to text thread")
                 break
 
-            if self.frames_np is None:
-                time.sleep(0.02)  # wait for any audio to arrive
-                continue
+            self.process_audio_chunk()
 
-            self.clip_audio_if_no_valid_segment()
+    def process_audio_chunk(self):
+        """
+        Transcribes the pending audio chunk once and sends the result to the client.
+        """
+        self.clip_audio_if_no_valid_segment()
 
-            input_bytes, duration = self.get_audio_chunk_for_processing()
-            if duration < 0.4:
-                continue
+        input_bytes, duration = self.get_audio_chunk_for_processing()
 
-            try:
-                input_sample = input_bytes.copy()
-                logging.info(f"[WhisperTensorRT:] Processing audio with duration: {duration}")
-                self.transcribe_audio(input_sample)
+        try:
+            logging.info(f"[WhisperTensorRT:] Processing audio with duration: {duration}")
+            last_segment = self.transcribe_window(input_bytes)
+            if last_segment:
+                self.handle_transcription_output(last_segment, duration)
 
-            except Exception as e:
-                logging.error(f"[ERROR]: {e}")
+        except Exception as e:
+            logging.error(f"[ERROR]: {e}")
 
 
 class ServeClientFasterWhisper(ServeClientBase):
-    SINGLE_MODEL = None
-    SINGLE_MODEL_LOCK = threading.Lock()
+    SINGLE_MODEL_POOL = None
+    SINGLE_MODEL_SCHEDULER = None
+    MODEL_REGISTRY = ModelRegistry()
 
     def __init__(self, websocket, task="transcribe", device=None, language=None, client_uid=None, model="small.en",
-                 initial_prompt=None, vad_parameters=None, use_vad=True, single_model=False):
+                 initial_prompt=None, vad_parameters=None, use_vad=True, single_model=False, batch_inference=False,
+                 max_batch_size=8, min_new_audio=0.25, start_thread=True, local_agreement=False, num_workers=1,
+                 replicate_model=False, target_latency=None, audio_format=FLOAT32, protocol_version=1,
+                 message_encoding=JSON, max_update_rate=None, stage_timings=False):
         """
         Initialize a ServeClient instance.
         The Whisper model is initialized based on the client's language and device availability.
@@ -741,8 +1316,36 @@ class ServeClientFasterWhisper(ServeClientBase):
             model (str, optional): The whisper model size. Defaults to 'small.en'
             initial_prompt (str, optional): Prompt for whisper inference. Defaults to None.
             single_model (bool, optional): Whether to instantiate a new model for each client connection. Defaults to False.
-        """
-        super().__init__(client_uid, websocket)
+            batch_inference (bool, optional): Whether to transcribe through the batch scheduler shared by all
+                                              connections. Only used with single_model. Defaults to False.
+            max_batch_size (int, optional): The maximum batch size of the shared batch scheduler. Defaults to 8.
+            min_new_audio (float, optional): Seconds of new audio that trigger a new transcription. Defaults to 0.25.
+            start_thread (bool, optional): Whether to run `speech_to_text` in a dedicated thread. If False, the
+                                           server calls `process_audio_chunk` itself. Defaults to True.
+            local_agreement (bool, optional): Whether to commit words once two consecutive transcriptions agree on
+                                              them, instead of committing whole segments. Defaults to False.
+            num_workers (int, optional): The number of concurrent inference calls on the shared model, the one
+                                         of single_model or the one shared by name. Defaults to 1.
+            replicate_model (bool, optional): Whether to load `num_workers` replicas of the shared model instead of
+                                              one model with `num_workers` CTranslate2 workers. Defaults to False.
+            target_latency (float, optional): If set, the targeted delay of partial results in seconds, from which
+                                              an adaptive scheduler paces the transcription. Defaults to None.
+            audio_format (str, optional): The audio format negotiated with the client, reported in the
+                                          SERVER_READY message. Defaults to "float32".
+            protocol_version (int, optional): The version of the transcript messages negotiated with the client.
+                                              Version 2 only sends new or changed segments. Defaults to 1.
+            message_encoding (str, optional): The encoding of the transcript messages, "json" or "msgpack".
+                                              Defaults to "json".
+            max_update_rate (float, optional): If set, the most partial results sent to the client per second,
+                                               the latest one is sent when the rate allows. Defaults to None.
+            stage_timings (bool, optional): Whether to time the stages of every transcription and add their
+                                            totals to the session metrics. Not available with batch_inference.
+                                            Defaults to False.
+        """
+        super().__init__(client_uid, websocket, min_new_audio=min_new_audio, target_latency=target_latency,
+                         audio_format=audio_format, protocol_version=protocol_version,
+                         message_encoding=message_encoding, start_thread=start_thread,
+                         max_update_rate=max_update_rate)
         self.model_sizes = [
             "tiny", "tiny.en", "base", "base.en", "small", "small.en",
             "medium", "medium.en", "large-v2", "large-v3",
@@ -756,47 +1359,196 @@ class ServeClientFasterWhisper(ServeClientBase):
         self.initial_prompt = initial_prompt
         self.vad_parameters = vad_parameters or {"threshold": 0.5}
         self.no_speech_thresh = 0.45
+        self.hypothesis = HypothesisBuffer() if local_agreement else None
+        self.open_words = []  # committed words of the segment being spoken
+        self.committed_text = ''  # the end of the committed transcript, prompted to the model
+        self.stage_timings = StageTimings() if stage_timings else None
 
         device = "cuda" if torch.cuda.is_available() else "cpu"
 
+        self.model_pool = None
+        self.model_key = None
+        self.mel_cache = LogMelCache()
         if self.model_size_or_path is None:
             return
 
         if single_model:
-            if ServeClientFasterWhisper.SINGLE_MODEL is None:
-                self.create_model(device)
-                ServeClientFasterWhisper.SINGLE_MODEL = self.transcriber
-            else:
-                self.transcriber = ServeClientFasterWhisper.SINGLE_MODEL
+            if ServeClientFasterWhisper.SINGLE_MODEL_POOL is None:
+                ServeClientFasterWhisper.SINGLE_MODEL_POOL = self.create_model_pool(
+                    self.model_size_or_path, device, num_workers, replicate_model)
+            self.model_pool = ServeClientFasterWhisper.SINGLE_MODEL_POOL
+            if batch_inference and ServeClientFasterWhisper.SINGLE_MODEL_SCHEDULER is None:
+                ServeClientFasterWhisper.SINGLE_MODEL_SCHEDULER = TranscriptionBatchScheduler(
+                    self.model_pool,
+                    max_batch_size=max_batch_size,
+                )
         else:
-            self.create_model(device)
-
+            # connections asking for the same model share it through the process-wide registry
+            self.model_key = self.get_model_key(self.model_size_or_path, device)
+            self.model_pool = ServeClientFasterWhisper.MODEL_REGISTRY.acquire(
+                self.model_key,
+                functools.partial(self.load_shared_model, self.model_size_or_path, device, num_workers))
+
+        self.batch_scheduler = None
+        if single_model and batch_inference:
+            self.batch_scheduler = ServeClientFasterWhisper.SINGLE_MODEL_SCHEDULER
         self.use_vad = use_vad
 
         # threading
-        self.trans_thread = threading.Thread(target=self.speech_to_text)
-        self.trans_thread.start()
-        self.websocket.send(
-            json.dumps(
-                {
-                    "uid": self.client_uid,
-                    "message": self.SERVER_READY,
-                    "backend": "faster_whisper"
-                }
-            )
-        )
+        if start_thread:
+            self.trans_thread = threading.Thread(target=self.speech_to_text)
+            self.trans_thread.start()
+        self.send_server_ready("faster_whisper")
 
-    def create_model(self, device):
+    @staticmethod
+    def load_model(model_size_or_path, device, num_workers=1):
         """
-        Instantiates a new model, sets it as the transcriber.
+        Instantiates a new model.
+
+        Args:
+            model_size_or_path (str): The whisper model size, or the path to a converted model.
+            device (str): The device to load the model on.
+            num_workers (int, optional): The number of CTranslate2 workers of the model. Defaults to 1.
+
+        Returns:
+            WhisperModel: The model.
         """
-        self.transcriber = WhisperModel(
-            self.model_size_or_path,
+        return WhisperModel(
+            model_size_or_path,
             device=device,
-            compute_type="int8" if device == "cpu" else "float16",
+            compute_type=ServeClientFasterWhisper.get_compute_type(device),
+            num_workers=num_workers,
             local_files_only=False,
         )
 
+    @staticmethod
+    def get_compute_type(device):
+        return "int8" if device == "cpu" else "float16"
+
+    @classmethod
+    def get_model_key(cls, model_size_or_path, device):
+        return model_size_or_path, device, cls.get_compute_type(device)
+
+    @staticmethod
+    def get_model_size(transcriber):
+        """
+        Estimates the memory used by a model from the size of its weights on disk.
+
+        Args:
+            transcriber (WhisperModel): The loaded model.
+
+        Returns:
+            int: The size of the model weights in bytes, 0 if unknown.
+        """
+        weights = os.path.join(transcriber.model_path, "model.bin")
+        return os.path.getsize(weights) if os.path.isfile(weights) else 0
+
+    @classmethod
+    def load_shared_model(cls, model_size_or_path, device, num_workers=1):
+        """
+        Loads and warms up a model for `MODEL_REGISTRY`, in a pool running up to `num_workers` inference calls
+        of the connections using it at once.
+
+        Args:
+            model_size_or_path (str): The whisper model size, or the path to a converted model.
+            device (str): The device to load the model on.
+            num_workers (int, optional): The number of CTranslate2 workers of the model, and of pool slots.
+                                         Defaults to 1.
+
+        Returns:
+            tuple: The pool of the model, and the size of the model in bytes.
+        """
+        transcriber = cls.load_model(model_size_or_path, device, num_workers=num_workers)
+        cls.warmup_model(transcriber)
+        return ModelPool([transcriber] * num_workers), cls.get_model_size(transcriber)
+
+    @staticmethod
+    def warmup_model(transcriber):
+        """
+        Transcribes `assets/jfk.flac` once, so that the first client does not pay for the first, slower, inference.
+
+        Args:
+            transcriber (WhisperModel): The model to warm up.
+        """
+        logging.info("Warming up faster_whisper model..")
+        transcriber.transcribe("assets/jfk.flac")
+
+    @classmethod
+    def create_model_pool(cls, model_size_or_path, device, num_workers, replicate_model):
+        """
+        Instantiates and warms up the models shared by all connections.
+
+        Args:
+            model_size_or_path (str): The whisper model size, or the path to a converted model.
+            device (str): The device to load the models on.
+            num_workers (int): The number of inference calls which can run concurrently.
+            replicate_model (bool): If True, loads `num_workers` replicas of the model. Otherwise, loads the
+                                    model once with `num_workers` CTranslate2 workers, sharing its weights.
+
+        Returns:
+            ModelPool: The pool leasing the models to the connections.
+        """
+        if not replicate_model:
+            models = [cls.load_model(model_size_or_path, device, num_workers=num_workers)]
+        else:
+            models = [cls.load_model(model_size_or_path, device) for _ in range(num_workers)]
+        for model in models:
+            cls.warmup_model(model)
+        return ModelPool(models if replicate_model else models * num_workers)
+
+    @classmethod
+    def preload(cls, model_size_or_path, num_workers=1, replicate_model=False):
+        """
+        Loads and warms up the models shared by all connections in single model mode, before any client connects.
+
+        Args:
+            model_size_or_path (str): The whisper model size, or the path to a converted model.
+            num_workers (int, optional): The number of inference calls which can run concurrently. Defaults to 1.
+            replicate_model (bool, optional): Whether to load `num_workers` replicas of the model. Defaults to False.
+        """
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        cls.SINGLE_MODEL_POOL = cls.create_model_pool(model_size_or_path, device, num_workers, replicate_model)
+
+    @classmethod
+    def preload_shared(cls, model_size_or_path, num_workers=1):
+        """
+        Loads and warms up a model shared by name into `MODEL_REGISTRY`, before any client asks for it. The model
+        then stays loaded for the connections, unless unused models exceed the memory budget of the registry.
+
+        Args:
+            model_size_or_path (str): The whisper model size, or the path to a converted model.
+            num_workers (int, optional): The number of inference calls which can run concurrently. Defaults to 1.
+        """
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model_key = cls.get_model_key(model_size_or_path, device)
+        cls.MODEL_REGISTRY.acquire(
+            model_key, functools.partial(cls.load_shared_model, model_size_or_path, device, num_workers))
+        cls.MODEL_REGISTRY.release(model_key)
+
+    def cleanup(self):
+        """
+        Stops the transcription thread, logs the lease-wait metrics of the model pool, and releases the model
+        of the connection in the model registry.
+        """
+        super().cleanup()
+        if self.model_pool is not None:
+            logging.info(f"Model pool metrics: {self.model_pool.get_metrics()}")
+        logging.info(f"Mel cache: computed {self.mel_cache.computed} frames, reused {self.mel_cache.reused} frames")
+        if self.model_key is not None:
+            ServeClientFasterWhisper.MODEL_REGISTRY.release(self.model_key)
+            self.model_key = None
+
+    def get_metrics(self):
+        """
+        Returns:
+            dict: The metrics of `ServeClientBase.get_metrics`, with the time spent in every stage of the
+                transcriptions and the counts of decoded windows and temperature fallbacks if stage timings are on.
+        """
+        metrics = super().get_metrics()
+        if self.stage_timings is not None:
+            metrics["stage_timings"] = self.stage_timings.to_dict()
+        return metrics
+
     def check_valid_model(self, model_size):
         """
         Check if it's a valid whisper model size.
@@ -808,7 +1560,7 @@ class ServeClientFasterWhisper(ServeClientBase):
             str: The model size if valid, None otherwise.
         """
         if model_size not in self.model_sizes:
-            self.websocket.send(
+            self.send_message(
                 json.dumps(
                     {
                         "uid": self.client_uid,
@@ -833,7 +1585,7 @@ class ServeClientFasterWhisper(ServeClientBase):
         if info.language_probability > 0.5:
             self.language = info.language
             logging.info(f"Detected language {self.language} with probability {info.language_probability}")
-            self.websocket.send(json.dumps(
+            self.send_message(json.dumps(
                 {"uid": self.client_uid, "language": self.language, "language_prob": info.language_probability}))
 
     def transcribe_audio(self, input_sample):
@@ -841,10 +1593,11 @@ class ServeClientFasterWhisper(ServeClientBase):
         Transcribes the provided audio sample using the configured transcriber instance.
 
         If the language has not been set, it updates the session's language based on the transcription
-        information.
+        information. The features of the chunk are computed through the session's `mel_cache`, so only
+        the frames over audio which arrived since the previous chunk are computed.
 
         Args:
-            input_sample (np.array): The audio chunk to be transcribed. This should be a NumPy
+            input_sample (np.array): The audio chunk to be transcribed, starting at `processed_start`. This should be a NumPy
                                     array representing the audio data.
 
         Returns:
@@ -852,22 +1605,46 @@ class ServeClientFasterWhisper(ServeClientBase):
             depends on the implementation of the `transcriber.transcribe` method but typically
             includes the transcribed text.
         """
-        if ServeClientFasterWhisper.SINGLE_MODEL:
-            ServeClientFasterWhisper.SINGLE_MODEL_LOCK.acquire()
-        result, info = self.transcriber.transcribe(
-            input_sample,
-            initial_prompt=self.initial_prompt,
-            language=self.language,
-            task=self.task,
-            vad_filter=self.use_vad,
-            vad_parameters=self.vad_parameters if self.use_vad else None)
-        if ServeClientFasterWhisper.SINGLE_MODEL:
-            ServeClientFasterWhisper.SINGLE_MODEL_LOCK.release()
-
+        if self.batch_scheduler is not None:
+            # wait for the next batch of the shared scheduler
+            result, info = self.batch_scheduler.submit(TranscriptionRequest(
+                audio=input_sample,
+                language=self.language,
+                task=self.task,
+                initial_prompt=self.get_prompt(),
+                vad_filter=self.use_vad,
+                vad_parameters=self.vad_parameters if self.use_vad else None,
+                word_timestamps=self.hypothesis is not None,
+            )).result()
+        else:
+            with self.model_pool.lease() as transcriber:
+                result, info = transcriber.transcribe(
+                    input_sample,
+                    initial_prompt=self.get_prompt(),
+                    language=self.language,
+                    task=self.task,
+                    vad_filter=self.use_vad,
+                    vad_parameters=self.vad_parameters if self.use_vad else None,
+                    word_timestamps=self.hypothesis is not None,
+                    mel_cache=self.mel_cache,
+                    audio_offset=self.processed_start,
+                    stage_timings=self.stage_timings is not None)
+
+        if self.stage_timings is not None and info is not None and info.stage_timings is not None:
+            self.stage_timings.merge(info.stage_timings)
         if self.language is None and info is not None:
             self.set_language(info)
         return result
 
+    def get_prompt(self):
+        """
+        Returns the prompt of the next transcription: the end of the committed transcript with the
+        local agreement policy, the initial prompt of the client otherwise.
+        """
+        if self.hypothesis is not None and self.committed_text:
+            return self.committed_text
+        return self.initial_prompt
+
     def get_previous_output(self):
         """
         Retrieves previously generated transcription outputs if no new transcription is available
@@ -906,7 +1683,10 @@ class ServeClientFasterWhisper(ServeClientBase):
         segments = []
         if len(result):
             self.t_start = None
-            last_segment = self.update_segments(result, duration)
+            if self.hypothesis is not None:
+                last_segment = self.update_words(result, duration)
+            else:
+                last_segment = self.update_segments(result, duration)
             segments = self.prepare_segments(last_segment)
         else:
             # show previous output if there is pause i.e. no output from whisper
@@ -933,31 +1713,33 @@ class ServeClientFasterWhisper(ServeClientBase):
 
         """
         while True:
-            if self.exit:
+            if not self.wait_for_audio():
                 logging.info("Exiting speech to text thread")
                 break
 
-            if self.frames_np is None:
-                continue
+            self.process_audio_chunk()
 
-            self.clip_audio_if_no_valid_segment()
+    def process_audio_chunk(self):
+        """
+        Transcribes the pending audio chunk once and sends the result to the client.
+        """
+        self.clip_audio_if_no_valid_segment()
 
-            input_bytes, duration = self.get_audio_chunk_for_processing()
-            if duration < 1.0:
-                continue
-            try:
-                input_sample = input_bytes.copy()
-                result = self.transcribe_audio(input_sample)
+        input_bytes, duration = self.get_audio_chunk_for_processing()
+        try:
+            result = self.transcribe_window(input_bytes)
 
-                if result is None or self.language is None:
-                    self.timestamp_offset += duration
-                    time.sleep(0.25)  # wait for voice activity, result is None when no voice activity
-                    continue
-                self.handle_transcription_output(result, duration)
+            if result is None or self.language is None:
+                # no voice activity, wait for new audio
+                self.timestamp_offset += duration
+                if self.hypothesis is not None:
+                    self.hypothesis.clear()
+                    self.close_open_segment()
+                return
+            self.handle_transcription_output(result, duration)
 
-            except Exception as e:
-                logging.error(f"[ERROR]: Failed to transcribe audio chunk: {e}")
-                time.sleep(0.01)
+        except Exception as e:
+            logging.error(f"[ERROR]: Failed to transcribe audio chunk: {e}")
 
     def format_segment(self, start, end, text):
         """
@@ -1051,3 +1833,60 @@ class ServeClientFasterWhisper(ServeClientBase):
             self.timestamp_offset += offset
 
         return last_segment
+
+    def update_words(self, segments, duration):
+        """
+        Processes the segments from whisper with the local agreement policy.
+
+        The words of the segments are compared with the previous transcription of the window, and the words
+        both agree on are committed. The timestamp offset moves to the end of the last committed word, so
+        the next transcription only decodes the uncommitted audio. Committed words are grouped into transcript
+        segments ending at sentence boundaries.
+
+        Args:
+            segments(list) : list of segments as returned by whisper, with word timestamps
+            duration(float): duration of the current chunk
+
+        Returns:
+            dict or None: The segment being spoken, made of its committed words followed by the
+                uncommitted words of the transcription. None if there are no such words.
+        """
+        words = [
+            word._replace(start=self.timestamp_offset + word.start,
+                          end=self.timestamp_offset + min(duration, word.end))
+            for s in segments if s.no_speech_prob <= self.no_speech_thresh
+            for word in s.words or []
+        ]
+        for word in self.hypothesis.insert(words):
+            self.commit_word(word)
+
+        # drop the committed audio from the window
+        self.timestamp_offset = max(self.timestamp_offset, self.hypothesis.committed_end)
+
+        words = self.open_words + self.hypothesis.pending
+        if not words:
+            return None
+        return self.format_segment(words[0].start, words[-1].end, "".join(w.word for w in words))
+
+    def commit_word(self, word):
+        """
+        Adds a committed word to the segment being spoken, and ends the segment after a sentence.
+
+        Args:
+            word (Word): The committed word, with absolute timestamps.
+        """
+        self.open_words.append(word)
+        self.committed_text = (self.committed_text + word.word)[-200:]
+        if word.word.rstrip().endswith((".", "?", "!")):
+            self.close_open_segment()
+
+    def close_open_segment(self):
+        """
+        Appends the committed words of the segment being spoken to the transcript.
+        """
+        if not self.open_words:
+            return
+        text = "".join(w.word for w in self.open_words)
+        self.text.append(text)
+        self.transcript.append(self.format_segment(self.open_words[0].start, self.open_words[-1].end, text))
+        self.open_words = []
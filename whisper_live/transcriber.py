@@ -1,9 +1,11 @@
 # original https://github.com/guillaumekln/faster-whisper/blob/master/faster_whisper/transcribe.py
 
+import contextlib
 import itertools
 import json
 import logging
 import os
+import time
 import zlib
 
 from inspect import signature
@@ -24,6 +26,8 @@ from faster_whisper.vad import (
     get_speech_timestamps,
 )
 
+from whisper_live.mel_cache import LogMelCache
+
 
 class Word(NamedTuple):
     start: float
@@ -71,6 +75,48 @@ class TranscriptionOptions(NamedTuple):
     max_new_tokens: Optional[int]
     clip_timestamps: Union[str, List[float]]
     hallucination_silence_threshold: Optional[float]
+    parallel_fallback: bool = False
+
+
+class StageTimings:
+    """Seconds spent in every stage of `WhisperModel.transcribe`, and counters of the work done.
+
+    The stages are the VAD (`get_speech_timestamps`), the feature extraction, the encoder, the
+    decoding with its temperature fallbacks (`generate_with_fallback`), and the word timestamps
+    (`add_word_timestamps`). Timings of several calls can be summed up with `merge`.
+    """
+
+    STAGES = ("vad", "features", "encode", "generate", "word_timestamps")
+    COUNTERS = ("calls", "windows", "generate_calls", "fallbacks")
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(self.STAGES, 0.0)
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+
+    @contextlib.contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - start
+
+    def merge(self, other: "StageTimings") -> None:
+        for stage, seconds in other.seconds.items():
+            self.seconds[stage] += seconds
+        for counter, count in other.counts.items():
+            self.counts[counter] += count
+
+    def to_dict(self) -> dict:
+        return {"seconds": dict(self.seconds), **self.counts}
+
+
+_NO_TIMER = contextlib.nullcontext()
+
+
+def stage_timer(timings: Optional[StageTimings], stage: str):
+    """Returns a context manager timing `stage` into `timings`, doing nothing if timings are off."""
+    return _NO_TIMER if timings is None else timings.measure(stage)
 
 
 class TranscriptionInfo(NamedTuple):
@@ -81,6 +127,7 @@ class TranscriptionInfo(NamedTuple):
     all_language_probs: Optional[List[Tuple[str, float]]]
     transcription_options: TranscriptionOptions
     vad_options: VadOptions
+    stage_timings: Optional[StageTimings] = None
 
 
 class WhisperModel:
@@ -132,6 +179,7 @@ class WhisperModel:
                 cache_dir=download_root,
             )
 
+        self.model_path = model_path
         self.model = ctranslate2.models.Whisper(
             model_path,
             device=device,
@@ -222,6 +270,10 @@ class WhisperModel:
         chunk_length: Optional[int] = None,
         clip_timestamps: Union[str, List[float]] = "0",
         hallucination_silence_threshold: Optional[float] = None,
+        parallel_fallback: bool = False,
+        mel_cache: Optional[LogMelCache] = None,
+        audio_offset: int = 0,
+        stage_timings: bool = False,
     ) -> Tuple[Iterable[Segment], TranscriptionInfo]:
         """Transcribes an input file.
 
@@ -283,6 +335,18 @@ class WhisperModel:
           hallucination_silence_threshold: Optional[float]
             When word_timestamps is True, skip silent periods longer than this threshold
              (in seconds) when a possible hallucination is detected
+          parallel_fallback: When the first temperature fails, decode all the fallback
+            temperatures at once with concurrent generate calls on the same encoder output,
+            instead of one after the other. Decoding then takes about two rounds at worst when
+            the model has enough workers, but every fallback temperature gets decoded.
+          mel_cache: Optional LogMelCache of the audio stream the audio waveform is taken from,
+            to only compute the features of new audio. Not used with chunk_length, or when the
+            VAD filter keeps more than one speech chunk. The start of the audio is moved onto
+            the frame grid of the stream by less than a frame, see LogMelCache.align_chunk.
+          audio_offset: Position of the first sample of the audio waveform in the audio stream
+            of mel_cache.
+          stage_timings: Time the stages of the transcription and count the decoded windows and
+            temperature fallbacks, returned as the stage_timings of TranscriptionInfo.
 
         Returns:
           A tuple with:
@@ -291,6 +355,9 @@ class WhisperModel:
             - an instance of TranscriptionInfo
         """
         sampling_rate = self.feature_extractor.sampling_rate
+        timings = StageTimings() if stage_timings else None
+        if timings is not None:
+            timings.counts["calls"] += 1
 
         if not isinstance(audio, np.ndarray):
             audio = decode_audio(audio, sampling_rate=sampling_rate)
@@ -302,13 +369,15 @@ class WhisperModel:
             "Processing audio with duration %s", format_timestamp(duration)
         )
 
+        window = audio
         if vad_filter:
             if vad_parameters is None:
                 vad_parameters = VadOptions()
             elif isinstance(vad_parameters, dict):
                 vad_parameters = VadOptions(**vad_parameters)
-            speech_chunks = get_speech_timestamps(audio, vad_parameters)
-            audio = collect_chunks(audio, speech_chunks)
+            with stage_timer(timings, "vad"):
+                speech_chunks = get_speech_timestamps(audio, vad_parameters)
+                audio = collect_chunks(audio, speech_chunks)
             duration_after_vad = audio.shape[0] / sampling_rate
 
             self.logger.info(
@@ -332,10 +401,35 @@ class WhisperModel:
         else:
             speech_chunks = None
 
+        use_mel_cache = (
+            mel_cache is not None
+            and chunk_length is None
+            and (speech_chunks is None or len(speech_chunks) == 1)
+        )
+        if use_mel_cache and audio.shape[0] > 0:
+            # the audio is still a contiguous part of the stream: start it on the frame grid of the
+            # stream, so that the cached frames match, and map the timestamps back with the chunk
+            chunk = speech_chunks[0] if speech_chunks else {"start": 0, "end": window.shape[0]}
+            start = mel_cache.align_chunk(
+                chunk["start"],
+                chunk["end"],
+                audio_offset,
+                self.feature_extractor.hop_length,
+            )
+            if start != chunk["start"]:
+                speech_chunks = [{"start": start, "end": chunk["end"]}]
+                audio = window[start : chunk["end"]]
+            audio_offset += start
+
         if audio.shape[0] == 0:
             return None, None
 
-        features = self.feature_extractor(audio, chunk_length=chunk_length)
+        if use_mel_cache:
+            with stage_timer(timings, "features"):
+                features = mel_cache(self.feature_extractor, audio, audio_offset)
+        else:
+            with stage_timer(timings, "features"):
+                features = self.feature_extractor(audio, chunk_length=chunk_length)
 
         encoder_output = None
         all_language_probs = None
@@ -346,7 +440,8 @@ class WhisperModel:
                 language_probability = 1
             else:
                 segment = features[:, : self.feature_extractor.nb_max_frames]
-                encoder_output = self.encode(segment)
+                with stage_timer(timings, "encode"):
+                    encoder_output = self.encode(segment)
                 # results is a list of tuple[str, float] with language names and
                 # probabilities.
                 results = self.model.detect_language(encoder_output)[0]
@@ -404,9 +499,10 @@ class WhisperModel:
             max_new_tokens=max_new_tokens,
             clip_timestamps=clip_timestamps,
             hallucination_silence_threshold=hallucination_silence_threshold,
+            parallel_fallback=parallel_fallback,
         )
 
-        segments = self.generate_segments(features, tokenizer, options, encoder_output)
+        segments = self.generate_segments(features, tokenizer, options, encoder_output, timings)
 
         if speech_chunks:
             segments = restore_speech_timestamps(segments, speech_chunks, sampling_rate)
@@ -419,6 +515,7 @@ class WhisperModel:
             transcription_options=options,
             vad_options=vad_parameters,
             all_language_probs=all_language_probs,
+            stage_timings=timings,
         )
 
         return segments, info
@@ -429,6 +526,7 @@ class WhisperModel:
         tokenizer: Tokenizer,
         options: TranscriptionOptions,
         encoder_output: Optional[ctranslate2.StorageView] = None,
+        timings: Optional[StageTimings] = None,
     ) -> Iterable[Segment]:
         content_frames = features.shape[-1] - self.feature_extractor.nb_max_frames
         content_duration = float(content_frames * self.feature_extractor.time_per_frame)
@@ -514,14 +612,18 @@ class WhisperModel:
             )
 
             if seek > 0 or encoder_output is None:
-                encoder_output = self.encode(segment)
+                with stage_timer(timings, "encode"):
+                    encoder_output = self.encode(segment)
 
-            (
-                result,
-                avg_logprob,
-                temperature,
-                compression_ratio,
-            ) = self.generate_with_fallback(encoder_output, prompt, tokenizer, options)
+            with stage_timer(timings, "generate"):
+                (
+                    result,
+                    avg_logprob,
+                    temperature,
+                    compression_ratio,
+                ) = self.generate_with_fallback(encoder_output, prompt, tokenizer, options, timings)
+            if timings is not None:
+                timings.counts["windows"] += 1
 
             if options.no_speech_threshold is not None:
                 # no voice activity check
@@ -548,7 +650,6 @@ class WhisperModel:
             tokens = result.sequences_ids[0]
 
             previous_seek = seek
-            current_segments = []
 
             # anomalous words are very long/short/improbable
             def word_anomaly_score(word: dict) -> float:
@@ -574,90 +675,26 @@ class WhisperModel:
             def next_words_segment(segments: List[dict]) -> Optional[dict]:
                 return next((s for s in segments if s["words"]), None)
 
-            single_timestamp_ending = (
-                len(tokens) >= 2
-                and tokens[-2] < tokenizer.timestamp_begin <= tokens[-1]
+            current_segments, seek, single_timestamp_ending = self.split_segments_by_timestamps(
+                tokenizer=tokenizer,
+                tokens=tokens,
+                time_offset=time_offset,
+                seek=seek,
+                segment_size=segment_size,
+                segment_duration=segment_duration,
             )
 
-            consecutive_timestamps = [
-                i
-                for i in range(len(tokens))
-                if i > 0
-                and tokens[i] >= tokenizer.timestamp_begin
-                and tokens[i - 1] >= tokenizer.timestamp_begin
-            ]
-
-            if len(consecutive_timestamps) > 0:
-                slices = list(consecutive_timestamps)
-                if single_timestamp_ending:
-                    slices.append(len(tokens))
-
-                last_slice = 0
-                for current_slice in slices:
-                    sliced_tokens = tokens[last_slice:current_slice]
-                    start_timestamp_position = (
-                        sliced_tokens[0] - tokenizer.timestamp_begin
-                    )
-                    end_timestamp_position = (
-                        sliced_tokens[-1] - tokenizer.timestamp_begin
-                    )
-                    start_time = (
-                        time_offset + start_timestamp_position * self.time_precision
-                    )
-                    end_time = (
-                        time_offset + end_timestamp_position * self.time_precision
-                    )
-
-                    current_segments.append(
-                        dict(
-                            seek=seek,
-                            start=start_time,
-                            end=end_time,
-                            tokens=sliced_tokens,
-                        )
-                    )
-                    last_slice = current_slice
-
-                if single_timestamp_ending:
-                    # single timestamp at the end means no speech after the last timestamp.
-                    seek += segment_size
-                else:
-                    # otherwise, ignore the unfinished segment and seek to the last timestamp
-                    last_timestamp_position = (
-                        tokens[last_slice - 1] - tokenizer.timestamp_begin
-                    )
-                    seek += last_timestamp_position * self.input_stride
-
-            else:
-                duration = segment_duration
-                timestamps = [
-                    token for token in tokens if token >= tokenizer.timestamp_begin
-                ]
-                if len(timestamps) > 0 and timestamps[-1] != tokenizer.timestamp_begin:
-                    last_timestamp_position = timestamps[-1] - tokenizer.timestamp_begin
-                    duration = last_timestamp_position * self.time_precision
-
-                current_segments.append(
-                    dict(
-                        seek=seek,
-                        start=time_offset,
-                        end=time_offset + duration,
-                        tokens=tokens,
-                    )
-                )
-
-                seek += segment_size
-
             if options.word_timestamps:
-                self.add_word_timestamps(
-                    current_segments,
-                    tokenizer,
-                    encoder_output,
-                    segment_size,
-                    options.prepend_punctuations,
-                    options.append_punctuations,
-                    last_speech_timestamp=last_speech_timestamp,
-                )
+                with stage_timer(timings, "word_timestamps"):
+                    self.add_word_timestamps(
+                        current_segments,
+                        tokenizer,
+                        encoder_output,
+                        segment_size,
+                        options.prepend_punctuations,
+                        options.append_punctuations,
+                        last_speech_timestamp=last_speech_timestamp,
+                    )
 
                 if not single_timestamp_ending:
                     last_word_end = get_end(current_segments)
@@ -758,145 +795,787 @@ class WhisperModel:
                 prompt_reset_since = len(all_tokens)
         return all_segments
 
+    def transcribe_batch(                                                   # noqa: C901
+        self,
+        audios: List[np.ndarray],
+        language: Union[Optional[str], List[Optional[str]]] = None,
+        task: Union[str, List[str]] = "transcribe",
+        beam_size: int = 5,
+        best_of: int = 5,
+        patience: float = 1,
+        length_penalty: float = 1,
+        repetition_penalty: float = 1,
+        no_repeat_ngram_size: int = 0,
+        temperature: Union[float, List[float], Tuple[float, ...]] = [
+            0.0,
+            0.2,
+            0.4,
+            0.6,
+            0.8,
+            1.0,
+        ],
+        compression_ratio_threshold: Optional[float] = 2.4,
+        log_prob_threshold: Optional[float] = -1.0,
+        no_speech_threshold: Optional[float] = 0.6,
+        condition_on_previous_text: bool = True,
+        prompt_reset_on_temperature: float = 0.5,
+        initial_prompt: Union[
+            Optional[Union[str, Iterable[int]]], List[Optional[Union[str, Iterable[int]]]]
+        ] = None,
+        suppress_blank: bool = True,
+        suppress_tokens: Optional[List[int]] = [-1],
+        without_timestamps: bool = False,
+        max_initial_timestamp: float = 1.0,
+        word_timestamps: bool = False,
+        prepend_punctuations: str = "\"'“¿([{-",
+        append_punctuations: str = "\"'.。,，!！?？:：”)]}、",
+        vad_filter: Union[bool, List[bool]] = False,
+        vad_parameters: Optional[
+            Union[dict, VadOptions, List[Optional[Union[dict, VadOptions]]]]
+        ] = None,
+        max_new_tokens: Optional[int] = None,
+    ) -> List[Tuple[Optional[List[Segment]], Optional[TranscriptionInfo]]]:
+        """Transcribes several waveforms with batched encoder and decoder calls.
+
+        The decoding options are shared by the whole batch. `language`, `task`,
+        `initial_prompt`, `vad_filter` and `vad_parameters` can also be given as lists
+        with one value per waveform, while a list of token ids given as `initial_prompt`
+        is shared by the whole batch. Long waveforms are processed window by window, one
+        window of every waveform per model call.
+
+        Arguments:
+          audios: The audio waveforms, sampled at the feature extractor sampling rate.
+          See `transcribe` for the other arguments.
+
+        Returns:
+          A list with one (segments, info) tuple per waveform, in the same order as `audios`.
+          Both items are None when no audio is left after the VAD filter, like `transcribe`.
+        """
+        sampling_rate = self.feature_extractor.sampling_rate
+        num_audios = len(audios)
+        languages = _expand_batch_argument(language, num_audios, str)
+        tasks = _expand_batch_argument(task, num_audios, str)
+        # a list of token ids is a single prompt, shared by the batch
+        initial_prompts = _expand_batch_argument(initial_prompt, num_audios, (str, list))
+        vad_filters = _expand_batch_argument(vad_filter, num_audios, bool)
+        all_vad_parameters = _expand_batch_argument(
+            vad_parameters, num_audios, (dict, VadOptions)
+        )
+
+        results = [(None, None)] * num_audios
+        indices = []
+        features = []
+        all_speech_chunks = []
+        durations = []
+
+        for i, audio in enumerate(audios):
+            duration = audio.shape[0] / sampling_rate
+            duration_after_vad = duration
+            speech_chunks = None
+
+            if vad_filters[i]:
+                if all_vad_parameters[i] is None:
+                    all_vad_parameters[i] = VadOptions()
+                elif isinstance(all_vad_parameters[i], dict):
+                    all_vad_parameters[i] = VadOptions(**all_vad_parameters[i])
+                speech_chunks = get_speech_timestamps(audio, all_vad_parameters[i])
+                audio = collect_chunks(audio, speech_chunks)
+                duration_after_vad = audio.shape[0] / sampling_rate
+
+            if audio.shape[0] == 0:
+                continue
+
+            indices.append(i)
+            features.append(self.feature_extractor(audio))
+            all_speech_chunks.append(speech_chunks)
+            durations.append((duration, duration_after_vad))
+
+        if not indices:
+            return results
+
+        self.logger.debug("Processing a batch of %d audio inputs", len(indices))
+
+        encoder_output = None
+        detected_languages = {}
+        if any(languages[i] is None for i in indices) and self.model.is_multilingual:
+            windows = np.stack([self.get_first_window(f) for f in features])
+            encoder_output = self.encode(windows)
+            for i, results_ in zip(indices, self.model.detect_language(encoder_output)):
+                all_language_probs = [(token[2:-2], prob) for (token, prob) in results_]
+                detected_languages[i] = all_language_probs
+
+        tokenizers = []
+        all_options = []
+        languages_info = []
+        for i in indices:
+            item_language = languages[i]
+            all_language_probs = None
+            if item_language is None:
+                if not self.model.is_multilingual:
+                    item_language = "en"
+                    language_probability = 1
+                else:
+                    all_language_probs = detected_languages[i]
+                    item_language, language_probability = all_language_probs[0]
+            else:
+                if not self.model.is_multilingual and item_language != "en":
+                    self.logger.warning(
+                        "The current model is English-only but the language parameter is set to '%s'; "
+                        "using 'en' instead." % item_language
+                    )
+                    item_language = "en"
+                language_probability = 1
+
+            tokenizer = Tokenizer(
+                self.hf_tokenizer,
+                self.model.is_multilingual,
+                task=tasks[i],
+                language=item_language,
+            )
+            tokenizers.append(tokenizer)
+            languages_info.append((item_language, language_probability, all_language_probs))
+            all_options.append(TranscriptionOptions(
+                beam_size=beam_size,
+                best_of=best_of,
+                patience=patience,
+                length_penalty=length_penalty,
+                repetition_penalty=repetition_penalty,
+                no_repeat_ngram_size=no_repeat_ngram_size,
+                log_prob_threshold=log_prob_threshold,
+                no_speech_threshold=no_speech_threshold,
+                compression_ratio_threshold=compression_ratio_threshold,
+                condition_on_previous_text=condition_on_previous_text,
+                prompt_reset_on_temperature=prompt_reset_on_temperature,
+                temperatures=(
+                    temperature if isinstance(temperature, (list, tuple)) else [temperature]
+                ),
+                initial_prompt=initial_prompts[i],
+                prefix=None,
+                suppress_blank=suppress_blank,
+                suppress_tokens=get_suppressed_tokens(tokenizer, suppress_tokens),
+                without_timestamps=without_timestamps,
+                max_initial_timestamp=max_initial_timestamp,
+                word_timestamps=word_timestamps,
+                prepend_punctuations=prepend_punctuations,
+                append_punctuations=append_punctuations,
+                max_new_tokens=max_new_tokens,
+                clip_timestamps="0",
+                hallucination_silence_threshold=None,
+            ))
+
+        all_segments = self.generate_segments_batch(
+            features, tokenizers, all_options, encoder_output
+        )
+
+        for n, i in enumerate(indices):
+            segments = all_segments[n]
+            if all_speech_chunks[n]:
+                segments = restore_speech_timestamps(
+                    segments, all_speech_chunks[n], sampling_rate
+                )
+            item_language, language_probability, all_language_probs = languages_info[n]
+            info = TranscriptionInfo(
+                language=item_language,
+                language_probability=language_probability,
+                duration=durations[n][0],
+                duration_after_vad=durations[n][1],
+                transcription_options=all_options[n],
+                vad_options=all_vad_parameters[i],
+                all_language_probs=all_language_probs,
+            )
+            results[i] = (segments, info)
+
+        return results
+
+    def transcribe_long(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        batch_size: int = 8,
+        vad_parameters: Optional[Union[dict, VadOptions]] = None,
+        **kwargs,
+    ) -> Tuple[List[Segment], Optional[TranscriptionInfo]]:
+        """Transcribes a long input file with batched model calls.
+
+        The speech chunks found by the VAD are packed into windows of at most
+        `chunk_length` seconds, and `batch_size` windows are transcribed per model call
+        with `transcribe_batch`, instead of one window after the other. The windows are
+        transcribed independently, so the text of a window is not conditioned on the
+        previous one, and the language is detected for every window when it is not set.
+
+        Arguments:
+          audio: Path to the input file (or a file-like object), or the audio waveform.
+          batch_size: The number of windows per model call.
+          vad_parameters: Dictionary of Silero VAD parameters or VadOptions class. Speech
+            chunks are split to fit in a window.
+          kwargs: The decoding options of `transcribe_batch`.
+
+        Returns:
+          A tuple with the list of transcribed segments, with timestamps in the input
+          audio, and the TranscriptionInfo of the first window (None if there is no speech).
+        """
+        sampling_rate = self.feature_extractor.sampling_rate
+        if not isinstance(audio, np.ndarray):
+            audio = decode_audio(audio, sampling_rate=sampling_rate)
+        duration = audio.shape[0] / sampling_rate
+
+        if vad_parameters is None:
+            vad_parameters = VadOptions()
+        elif isinstance(vad_parameters, dict):
+            vad_parameters = VadOptions(**vad_parameters)
+        chunk_length = self.feature_extractor.chunk_length
+        if vad_parameters.max_speech_duration_s > chunk_length:
+            vad_parameters = vad_parameters._replace(max_speech_duration_s=chunk_length)
+        speech_chunks = get_speech_timestamps(audio, vad_parameters)
+        windows = pack_speech_chunks(speech_chunks, self.feature_extractor.n_samples)
+
+        self.logger.info(
+            "Processing audio with duration %s in %d windows",
+            format_timestamp(duration),
+            len(windows),
+        )
+
+        all_segments = []
+        info = None
+        for start in range(0, len(windows), batch_size):
+            batch = windows[start:start + batch_size]
+            results = self.transcribe_batch(
+                [collect_chunks(audio, chunks) for chunks in batch], vad_filter=False, **kwargs
+            )
+            for chunks, (segments, window_info) in zip(batch, results):
+                if segments is None:
+                    continue
+                if info is None:
+                    info = window_info
+                all_segments.extend(restore_speech_timestamps(segments, chunks, sampling_rate))
+
+        all_segments = [
+            segment._replace(id=i + 1) for i, segment in enumerate(all_segments)
+        ]
+        if info is not None:
+            info = info._replace(
+                duration=duration,
+                duration_after_vad=sum(c["end"] - c["start"] for c in speech_chunks) / sampling_rate,
+                vad_options=vad_parameters,
+            )
+        return all_segments, info
+
+    def get_first_window(self, features: np.ndarray) -> np.ndarray:
+        content_frames = features.shape[-1] - self.feature_extractor.nb_max_frames
+        segment_size = min(self.feature_extractor.nb_max_frames, content_frames)
+        return pad_or_trim(
+            features[:, :segment_size], self.feature_extractor.nb_max_frames
+        )
+
+    def generate_segments_batch(                                            # noqa: C901
+        self,
+        features: List[np.ndarray],
+        tokenizers: List[Tokenizer],
+        options: List[TranscriptionOptions],
+        encoder_output: Optional[ctranslate2.StorageView] = None,
+    ) -> List[List[Segment]]:
+        """Batched counterpart of `generate_segments`.
+
+        Every model call processes the next 30 seconds window of all the inputs which have
+        content left. The decoding parameters are taken from the first options: items may
+        only differ in their tokenizer and initial prompt. `clip_timestamps` and
+        `hallucination_silence_threshold` are not supported. `encoder_output`, if given,
+        must be the encoding of the first window of every input.
+        """
+        nb_max_frames = self.feature_extractor.nb_max_frames
+        time_per_frame = self.feature_extractor.time_per_frame
+        batch_options = options[0]
+        num_items = len(features)
+
+        content_frames = [f.shape[-1] - nb_max_frames for f in features]
+        seeks = [0] * num_items
+        all_tokens = []
+        prompt_reset_since = [0] * num_items
+        last_speech_timestamps = [0.0] * num_items
+        all_segments = [[] for _ in range(num_items)]
+
+        for tokenizer, item_options in zip(tokenizers, options):
+            tokens = []
+            if item_options.initial_prompt is not None:
+                if isinstance(item_options.initial_prompt, str):
+                    initial_prompt = " " + item_options.initial_prompt.strip()
+                    tokens.extend(tokenizer.encode(initial_prompt))
+                else:
+                    tokens.extend(item_options.initial_prompt)
+            all_tokens.append(tokens)
+
+        while True:
+            active = [i for i in range(num_items) if seeks[i] < content_frames[i]]
+            if not active:
+                break
+
+            segment_sizes = [min(nb_max_frames, content_frames[i] - seeks[i]) for i in active]
+            windows = np.stack([
+                pad_or_trim(features[i][:, seeks[i]:seeks[i] + size], nb_max_frames)
+                for i, size in zip(active, segment_sizes)
+            ])
+            prompts = [
+                self.get_prompt(
+                    tokenizers[i],
+                    all_tokens[i][prompt_reset_since[i]:],
+                    without_timestamps=batch_options.without_timestamps,
+                    prefix=options[i].prefix if seeks[i] == 0 else None,
+                )
+                for i in active
+            ]
+
+            if encoder_output is None or len(active) != encoder_output.shape[0]:
+                encoder_output = self.encode(windows)
+
+            decode_results = self.generate_batch_with_fallback(
+                encoder_output,
+                windows,
+                prompts,
+                [tokenizers[i] for i in active],
+                batch_options,
+            )
+
+            for n, i in enumerate(active):
+                tokenizer = tokenizers[i]
+                segment_size = segment_sizes[n]
+                result, avg_logprob, temperature, compression_ratio = decode_results[n]
+
+                if batch_options.no_speech_threshold is not None:
+                    # no voice activity check
+                    should_skip = result.no_speech_prob > batch_options.no_speech_threshold
+                    if (
+                        batch_options.log_prob_threshold is not None
+                        and avg_logprob > batch_options.log_prob_threshold
+                    ):
+                        # don't skip if the logprob is high enough, despite the no_speech_prob
+                        should_skip = False
+
+                    if should_skip:
+                        # fast-forward to the next segment boundary
+                        seeks[i] += segment_size
+                        continue
+
+                time_offset = seeks[i] * time_per_frame
+                current_segments, seeks[i], single_timestamp_ending = self.split_segments_by_timestamps(
+                    tokenizer=tokenizer,
+                    tokens=result.sequences_ids[0],
+                    time_offset=time_offset,
+                    seek=seeks[i],
+                    segment_size=segment_size,
+                    segment_duration=segment_size * time_per_frame,
+                )
+
+                if batch_options.word_timestamps:
+                    self.add_word_timestamps(
+                        current_segments,
+                        tokenizer,
+                        self.select_encoder_output(encoder_output, windows, [n]),
+                        segment_size,
+                        batch_options.prepend_punctuations,
+                        batch_options.append_punctuations,
+                        last_speech_timestamp=last_speech_timestamps[i],
+                    )
+
+                    last_word_end = get_end(current_segments)
+                    if not single_timestamp_ending:
+                        if last_word_end is not None and last_word_end > time_offset:
+                            seeks[i] = round(last_word_end * self.frames_per_second)
+                    if last_word_end is not None:
+                        last_speech_timestamps[i] = last_word_end
+
+                for segment in current_segments:
+                    tokens = segment["tokens"]
+                    text = tokenizer.decode(tokens)
+
+                    if segment["start"] == segment["end"] or not text.strip():
+                        continue
+
+                    all_tokens[i].extend(tokens)
+
+                    all_segments[i].append(Segment(
+                        id=len(all_segments[i]) + 1,
+                        seek=seeks[i],
+                        start=segment["start"],
+                        end=segment["end"],
+                        text=text,
+                        tokens=tokens,
+                        temperature=temperature,
+                        avg_logprob=avg_logprob,
+                        compression_ratio=compression_ratio,
+                        no_speech_prob=result.no_speech_prob,
+                        words=(
+                            [Word(**word) for word in segment["words"]]
+                            if batch_options.word_timestamps
+                            else None
+                        ),
+                    ))
+
+                if (
+                    not batch_options.condition_on_previous_text
+                    or temperature > batch_options.prompt_reset_on_temperature
+                ):
+                    prompt_reset_since[i] = len(all_tokens[i])
+
+            encoder_output = None
+
+        return all_segments
+
+    def generate_batch_with_fallback(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        features: np.ndarray,
+        prompts: List[List[int]],
+        tokenizers: List[Tokenizer],
+        options: TranscriptionOptions,
+    ) -> List[Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float]]:
+        """Batched counterpart of `generate_with_fallback`.
+
+        Items that need a fallback are decoded again together at the next temperature.
+        """
+        num_items = len(prompts)
+        decode_results = [None] * num_items
+        all_results = [[] for _ in range(num_items)]
+        below_cr_threshold_results = [[] for _ in range(num_items)]
+        pending = list(range(num_items))
+
+        max_length = self.get_max_length(prompts, options)
+
+        for temperature in options.temperatures:
+            results = self.model.generate(
+                self.select_encoder_output(encoder_output, features, pending),
+                [prompts[i] for i in pending],
+                **self.get_generate_kwargs(options, temperature, max_length),
+            )
+
+            still_pending = []
+            for i, result in zip(pending, results):
+                decode_result, needs_fallback, below_cr_threshold = self.evaluate_generation_result(
+                    result, tokenizers[i], options, temperature
+                )
+                all_results[i].append(decode_result)
+                if below_cr_threshold:
+                    below_cr_threshold_results[i].append(decode_result)
+                if needs_fallback:
+                    still_pending.append(i)
+                else:
+                    decode_results[i] = decode_result
+
+            pending = still_pending
+            if not pending:
+                break
+
+        for i in pending:
+            decode_results[i] = select_fallback_result(
+                all_results[i], below_cr_threshold_results[i], temperature
+            )
+
+        return decode_results
+
+    def split_segments_by_timestamps(
+        self,
+        tokenizer: Tokenizer,
+        tokens: List[int],
+        time_offset: float,
+        seek: int,
+        segment_size: int,
+        segment_duration: float,
+    ) -> Tuple[List[dict], int, bool]:
+        current_segments = []
+        single_timestamp_ending = (
+            len(tokens) >= 2
+            and tokens[-2] < tokenizer.timestamp_begin <= tokens[-1]
+        )
+
+        consecutive_timestamps = [
+            i
+            for i in range(len(tokens))
+            if i > 0
+            and tokens[i] >= tokenizer.timestamp_begin
+            and tokens[i - 1] >= tokenizer.timestamp_begin
+        ]
+
+        if len(consecutive_timestamps) > 0:
+            slices = list(consecutive_timestamps)
+            if single_timestamp_ending:
+                slices.append(len(tokens))
+
+            last_slice = 0
+            for current_slice in slices:
+                sliced_tokens = tokens[last_slice:current_slice]
+                start_timestamp_position = (
+                    sliced_tokens[0] - tokenizer.timestamp_begin
+                )
+                end_timestamp_position = (
+                    sliced_tokens[-1] - tokenizer.timestamp_begin
+                )
+                start_time = (
+                    time_offset + start_timestamp_position * self.time_precision
+                )
+                end_time = (
+                    time_offset + end_timestamp_position * self.time_precision
+                )
+
+                current_segments.append(
+                    dict(
+                        seek=seek,
+                        start=start_time,
+                        end=end_time,
+                        tokens=sliced_tokens,
+                    )
+                )
+                last_slice = current_slice
+
+            if single_timestamp_ending:
+                # single timestamp at the end means no speech after the last timestamp.
+                seek += segment_size
+            else:
+                # otherwise, ignore the unfinished segment and seek to the last timestamp
+                last_timestamp_position = (
+                    tokens[last_slice - 1] - tokenizer.timestamp_begin
+                )
+                seek += last_timestamp_position * self.input_stride
+
+        else:
+            duration = segment_duration
+            timestamps = [
+                token for token in tokens if token >= tokenizer.timestamp_begin
+            ]
+            if len(timestamps) > 0 and timestamps[-1] != tokenizer.timestamp_begin:
+                last_timestamp_position = timestamps[-1] - tokenizer.timestamp_begin
+                duration = last_timestamp_position * self.time_precision
+
+            current_segments.append(
+                dict(
+                    seek=seek,
+                    start=time_offset,
+                    end=time_offset + duration,
+                    tokens=tokens,
+                )
+            )
+
+            seek += segment_size
+
+        return current_segments, seek, single_timestamp_ending
+
     def encode(self, features: np.ndarray) -> ctranslate2.StorageView:
         # When the model is running on multiple GPUs, the encoder output should be moved
         # to the CPU since we don't know which GPU will handle the next job.
         to_cpu = self.model.device == "cuda" and len(self.model.device_index) > 1
 
-        features = np.expand_dims(features, 0)
+        if features.ndim == 2:
+            features = np.expand_dims(features, 0)
         features = get_ctranslate2_storage(features)
 
         return self.model.encode(features, to_cpu=to_cpu)
 
+    def select_encoder_output(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        features: np.ndarray,
+        indices: List[int],
+    ) -> ctranslate2.StorageView:
+        """Returns the encoder output of the batch items at `indices`.
+
+        CPU storages are sliced directly, otherwise the selected features are encoded again.
+        """
+        if len(indices) == features.shape[0]:
+            return encoder_output
+        if encoder_output.device == "cpu":
+            return get_ctranslate2_storage(np.asarray(encoder_output)[indices])
+        return self.encode(features[indices])
+
     def generate_with_fallback(
         self,
         encoder_output: ctranslate2.StorageView,
         prompt: List[int],
         tokenizer: Tokenizer,
         options: TranscriptionOptions,
+        timings: Optional[StageTimings] = None,
     ) -> Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float]:
         decode_result = None
         all_results = []
         below_cr_threshold_results = []
 
-        max_initial_timestamp_index = int(
-            round(options.max_initial_timestamp / self.time_precision)
-        )
+        max_length = self.get_max_length([prompt], options)
+
+        for temperature, result in self.generate_temperatures(
+            encoder_output, prompt, options, max_length
+        ):
+            decode_result, needs_fallback, below_cr_threshold = self.evaluate_generation_result(
+                result, tokenizer, options, temperature
+            )
+            all_results.append(decode_result)
+            if below_cr_threshold:
+                below_cr_threshold_results.append(decode_result)
+
+            if not needs_fallback:
+                break
+        else:
+            decode_result = select_fallback_result(
+                all_results, below_cr_threshold_results, temperature
+            )
+
+        if timings is not None:
+            # parallel fallbacks decode all the fallback temperatures at once
+            parallel = options.parallel_fallback and len(all_results) > 1
+            timings.counts["generate_calls"] += len(options.temperatures) if parallel else len(all_results)
+            timings.counts["fallbacks"] += len(all_results) - 1
+        return decode_result
+
+    def generate_temperatures(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        prompt: List[int],
+        options: TranscriptionOptions,
+        max_length: int,
+    ) -> Iterable[Tuple[float, ctranslate2.models.WhisperGenerationResult]]:
+        """Yields the temperatures with their generation result, in order.
+
+        A result is only generated once the previous one was consumed, i.e. needed a fallback.
+        With `parallel_fallback`, all the fallback temperatures are submitted at once as
+        asynchronous generate calls on the same encoder output, which run concurrently on the
+        workers of the model, and are yielded in order as they complete.
+        """
+        first_temperature, *fallback_temperatures = options.temperatures
+        yield first_temperature, self.model.generate(
+            encoder_output,
+            [prompt],
+            **self.get_generate_kwargs(options, first_temperature, max_length),
+        )[0]
+
+        if options.parallel_fallback:
+            async_results = [
+                self.model.generate(
+                    encoder_output,
+                    [prompt],
+                    asynchronous=True,
+                    **self.get_generate_kwargs(options, temperature, max_length),
+                )[0]
+                for temperature in fallback_temperatures
+            ]
+            for temperature, async_result in zip(fallback_temperatures, async_results):
+                yield temperature, async_result.result()
+        else:
+            for temperature in fallback_temperatures:
+                yield temperature, self.model.generate(
+                    encoder_output,
+                    [prompt],
+                    **self.get_generate_kwargs(options, temperature, max_length),
+                )[0]
+
+    def get_max_length(
+        self, prompts: List[List[int]], options: TranscriptionOptions
+    ) -> int:
+        prompt_length = max(len(prompt) for prompt in prompts)
         if options.max_new_tokens is not None:
-            max_length = len(prompt) + options.max_new_tokens
+            max_length = prompt_length + options.max_new_tokens
         else:
             max_length = self.max_length
 
         if max_length > self.max_length:
             raise ValueError(
-                f"The length of the prompt is {len(prompt)}, and the `max_new_tokens` "
-                f"{max_length - len(prompt)}. Thus, the combined length of the prompt "
+                f"The length of the prompt is {prompt_length}, and the `max_new_tokens` "
+                f"{max_length - prompt_length}. Thus, the combined length of the prompt "
                 f"and `max_new_tokens` is: {max_length}. This exceeds the "
                 f"`max_length` of the Whisper model: {self.max_length}. "
                 "You should either reduce the length of your prompt, or "
                 "reduce the value of `max_new_tokens`, "
                 f"so that their combined length is less that {self.max_length}."
             )
+        return max_length
+
+    def get_generate_kwargs(
+        self, options: TranscriptionOptions, temperature: float, max_length: int
+    ) -> dict:
+        if temperature > 0:
+            kwargs = {
+                "beam_size": 1,
+                "num_hypotheses": options.best_of,
+                "sampling_topk": 0,
+                "sampling_temperature": temperature,
+            }
+        else:
+            kwargs = {
+                "beam_size": options.beam_size,
+                "patience": options.patience,
+            }
+
+        return dict(
+            length_penalty=options.length_penalty,
+            repetition_penalty=options.repetition_penalty,
+            no_repeat_ngram_size=options.no_repeat_ngram_size,
+            max_length=max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=options.suppress_blank,
+            suppress_tokens=options.suppress_tokens,
+            max_initial_timestamp_index=int(
+                round(options.max_initial_timestamp / self.time_precision)
+            ),
+            **kwargs,
+        )
 
-        for temperature in options.temperatures:
-            if temperature > 0:
-                kwargs = {
-                    "beam_size": 1,
-                    "num_hypotheses": options.best_of,
-                    "sampling_topk": 0,
-                    "sampling_temperature": temperature,
-                }
-            else:
-                kwargs = {
-                    "beam_size": options.beam_size,
-                    "patience": options.patience,
-                }
-
-            result = self.model.generate(
-                encoder_output,
-                [prompt],
-                length_penalty=options.length_penalty,
-                repetition_penalty=options.repetition_penalty,
-                no_repeat_ngram_size=options.no_repeat_ngram_size,
-                max_length=max_length,
-                return_scores=True,
-                return_no_speech_prob=True,
-                suppress_blank=options.suppress_blank,
-                suppress_tokens=options.suppress_tokens,
-                max_initial_timestamp_index=max_initial_timestamp_index,
-                **kwargs,
-            )[0]
-
-            tokens = result.sequences_ids[0]
-
-            # Recover the average log prob from the returned score.
-            seq_len = len(tokens)
-            cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
-            avg_logprob = cum_logprob / (seq_len + 1)
-
-            text = tokenizer.decode(tokens).strip()
-            compression_ratio = get_compression_ratio(text)
-
-            decode_result = (
-                result,
-                avg_logprob,
-                temperature,
-                compression_ratio,
-            )
-            all_results.append(decode_result)
-
-            needs_fallback = False
-
-            if options.compression_ratio_threshold is not None:
-                if compression_ratio > options.compression_ratio_threshold:
-                    needs_fallback = True  # too repetitive
+    def evaluate_generation_result(
+        self,
+        result: ctranslate2.models.WhisperGenerationResult,
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        temperature: float,
+    ) -> Tuple[Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float], bool, bool]:
+        tokens = result.sequences_ids[0]
+
+        # Recover the average log prob from the returned score.
+        seq_len = len(tokens)
+        cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
+        avg_logprob = cum_logprob / (seq_len + 1)
+
+        text = tokenizer.decode(tokens).strip()
+        compression_ratio = get_compression_ratio(text)
+
+        decode_result = (
+            result,
+            avg_logprob,
+            temperature,
+            compression_ratio,
+        )
 
-                    self.logger.debug(
-                        "Compression ratio threshold is not met with temperature %.1f (%f > %f)",
-                        temperature,
-                        compression_ratio,
-                        options.compression_ratio_threshold,
-                    )
-                else:
-                    below_cr_threshold_results.append(decode_result)
+        needs_fallback = False
+        below_cr_threshold = False
 
-            if (
-                options.log_prob_threshold is not None
-                and avg_logprob < options.log_prob_threshold
-            ):
-                needs_fallback = True  # average log probability is too low
+        if options.compression_ratio_threshold is not None:
+            if compression_ratio > options.compression_ratio_threshold:
+                needs_fallback = True  # too repetitive
 
                 self.logger.debug(
-                    "Log probability threshold is not met with temperature %.1f (%f < %f)",
+                    "Compression ratio threshold is not met with temperature %.1f (%f > %f)",
                     temperature,
-                    avg_logprob,
-                    options.log_prob_threshold,
+                    compression_ratio,
+                    options.compression_ratio_threshold,
                 )
+            else:
+                below_cr_threshold = True
 
-            if (
-                options.no_speech_threshold is not None
-                and result.no_speech_prob > options.no_speech_threshold
-                and options.log_prob_threshold is not None
-                and avg_logprob < options.log_prob_threshold
-            ):
-                needs_fallback = False  # silence
+        if (
+            options.log_prob_threshold is not None
+            and avg_logprob < options.log_prob_threshold
+        ):
+            needs_fallback = True  # average log probability is too low
 
-            if not needs_fallback:
-                break
-        else:
-            # all failed, select the result with the highest average log probability
-            decode_result = max(
-                below_cr_threshold_results or all_results, key=lambda x: x[1]
-            )
-            # to pass final temperature for prompt_reset_on_temperature
-            decode_result = (
-                decode_result[0],
-                decode_result[1],
+            self.logger.debug(
+                "Log probability threshold is not met with temperature %.1f (%f < %f)",
                 temperature,
-                decode_result[3],
+                avg_logprob,
+                options.log_prob_threshold,
             )
 
-        return decode_result
+        if (
+            options.no_speech_threshold is not None
+            and result.no_speech_prob > options.no_speech_threshold
+            and options.log_prob_threshold is not None
+            and avg_logprob < options.log_prob_threshold
+        ):
+            needs_fallback = False  # silence
+
+        return decode_result, needs_fallback, below_cr_threshold
 
     def get_prompt(
         self,
@@ -1110,6 +1789,7 @@ def restore_speech_timestamps(
 ) -> Iterable[Segment]:
     ts_map = SpeechTimestampsMap(speech_chunks, sampling_rate)
 
+    restored_segments = []
     for segment in segments:
         if segment.words:
             words = []
@@ -1134,8 +1814,51 @@ def restore_speech_timestamps(
                 start=ts_map.get_original_time(segment.start),
                 end=ts_map.get_original_time(segment.end),
             )
-
-    return segments
+        restored_segments.append(segment)
+
+    return restored_segments
+
+
+def pack_speech_chunks(speech_chunks: List[dict], max_samples: int) -> List[List[dict]]:
+    """Packs consecutive speech chunks into windows of at most `max_samples` samples of speech."""
+    windows = []
+    window_samples = 0
+    for chunk in speech_chunks:
+        samples = chunk["end"] - chunk["start"]
+        if not windows or window_samples + samples > max_samples:
+            windows.append([])
+            window_samples = 0
+        windows[-1].append(chunk)
+        window_samples += samples
+    return windows
+
+
+def _expand_batch_argument(value, batch_size: int, item_types) -> list:
+    # a list holds one value per input only when it has one item per input, each of them
+    # None or of the type of a single value; any other value is shared by the whole batch
+    if (
+        isinstance(value, list)
+        and len(value) == batch_size
+        and all(item is None or isinstance(item, item_types) for item in value)
+    ):
+        return list(value)
+    return [value] * batch_size
+
+
+def select_fallback_result(
+    all_results: List[tuple],
+    below_cr_threshold_results: List[tuple],
+    temperature: float,
+) -> tuple:
+    # all failed, select the result with the highest average log probability
+    decode_result = max(below_cr_threshold_results or all_results, key=lambda x: x[1])
+    # to pass final temperature for prompt_reset_on_temperature
+    return (
+        decode_result[0],
+        decode_result[1],
+        temperature,
+        decode_result[3],
+    )
 
 
 def get_ctranslate2_storage(segment: np.ndarray) -> ctranslate2.StorageView:
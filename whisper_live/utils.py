@@ -33,7 +33,8 @@ def format_time(s):
 
 
 def create_srt_file(segments, output_file):
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    if os.path.dirname(output_file):
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
     with open(output_file, 'w', encoding='utf-8') as srt_file:
         segment_number = 1
         for segment in segments:
@@ -136,6 +137,150 @@ def get_hallucinations_list(language_code):
         return d[language_code]
 
 
+class StreamingResampler:
+    """
+    Converts a stream of interleaved int16 chunks to float32 mono audio at another sample rate.
+
+    Resamples with a polyphase low-pass filter, the one `scipy.signal.resample_poly` uses, and keeps the filter
+    history across chunks, so the output has no artifacts at the chunk boundaries and matches resampling the
+    whole stream at once. The channel mix-down, int16 to float conversion and filtering reuse the same buffers
+    on every call.
+    """
+    def __init__(self, old_rate: int, new_rate: int = 16000, num_channels: int = 1, chunk_size: int = 4096):
+        """
+        Args:
+            old_rate (int): The sample rate of the input audio.
+            new_rate (int, optional): The sample rate of the output audio. Defaults to 16000.
+            num_channels (int, optional): The number of interleaved channels of the input audio. Defaults to 1.
+            chunk_size (int, optional): The expected number of frames per chunk, used to size the buffers.
+                Larger chunks grow the buffers. Defaults to 4096.
+        """
+        gcd = np.gcd(old_rate, new_rate)
+        self.up = new_rate // gcd
+        self.down = old_rate // gcd
+        self.num_channels = num_channels
+
+        max_rate = max(self.up, self.down)
+        if max_rate == 1:
+            # same rate, only mix down and convert
+            self.half_len = 0
+            h = np.ones(1)
+        else:
+            self.half_len = 10 * max_rate
+            h = scipy.signal.firwin(2 * self.half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * self.up
+        self.n_taps = -(-len(h) // self.up)
+        phases = np.zeros(self.up * self.n_taps)
+        phases[:len(h)] = h
+        # phases[p] holds the taps applied to the input for output phase p, oldest sample first
+        phases = phases.reshape(self.n_taps, self.up).T[:, ::-1].astype(np.float32)
+        # the phases repeat every `up` outputs, so the taps of consecutive outputs are a slice of the tiled cycle
+        self.phase_cycle = phases[(np.arange(self.up) * self.down + self.half_len) % self.up]
+        self.phase_table = self.phase_cycle
+
+        self.n_history = self.n_taps - 1
+        self.buffer = np.zeros(2 * self.n_history + chunk_size, dtype=np.float32)
+        self.output = np.zeros(chunk_size * self.up // self.down + 2, dtype=np.float32)
+        self.reset()
+
+    def allocate(self, n_frames):
+        """Grows the buffers for chunks of `n_frames` frames, keeping the filter history."""
+        buffer = np.zeros(2 * self.n_history + n_frames, dtype=np.float32)
+        buffer[:self.n_history_samples] = self.buffer[:self.n_history_samples]
+        self.buffer = buffer
+        self.output = np.zeros(n_frames * self.up // self.down + 2, dtype=np.float32)
+
+    def reset(self):
+        """Forgets the previous chunks, as when a new stream starts."""
+        # the stream is preceded by silence, so the first outputs are filtered like any other
+        self.buffer[:self.n_history] = 0.0
+        self.n_history_samples = self.n_history
+        self.buffer_start = -self.n_history
+        self.n_input = 0
+        self.n_output = 0
+
+    def __call__(self, data):
+        """
+        Resamples the next chunk of the stream.
+
+        Args:
+            data (bytes): Interleaved int16 frames.
+
+        Returns:
+            np.ndarray: The float32 mono samples, normalized between -1 and 1, that the new frames complete. The
+                array is a view on a buffer that the next call overwrites.
+        """
+        frames = np.frombuffer(data, dtype=np.int16)
+        n_frames = len(frames) // self.num_channels
+        if len(self.buffer) < self.n_history_samples + n_frames:
+            self.allocate(n_frames)
+
+        # mix down and convert straight into the buffer, after the filter history
+        mono = self.buffer[self.n_history_samples:self.n_history_samples + n_frames]
+        if self.num_channels > 1:
+            np.sum(frames[:n_frames * self.num_channels].reshape(-1, self.num_channels), axis=1, out=mono)
+        else:
+            mono[:] = frames
+        mono *= 1.0 / (32768.0 * self.num_channels)
+        self.n_input += n_frames
+        return self.filter(self.n_history_samples + n_frames)
+
+    def flush(self):
+        """
+        Ends the stream.
+
+        Returns:
+            np.ndarray: The last float32 samples, which needed the audio following the end of the stream.
+        """
+        n_expected = -(-self.n_input * self.up // self.down)
+        n_samples = self.n_history_samples
+        output = np.zeros(0, dtype=np.float32)
+        while self.n_output < n_expected:
+            n_frames = self.half_len // self.up + 1
+            if len(self.buffer) < n_samples + n_frames:
+                self.allocate(n_frames)
+            self.buffer[n_samples:n_samples + n_frames] = 0.0
+            output = np.concatenate([output, self.filter(n_samples + n_frames)])
+            n_samples = self.n_history_samples
+        output = output[:len(output) - (self.n_output - n_expected)]
+        self.reset()
+        return output
+
+    def filter(self, n_samples):
+        """
+        Computes every output sample whose input is in the first `n_samples` samples of the buffer.
+
+        Output sample `n` is centered on the input at `n * down / up`, the filter taps for it are selected by
+        the phase of `n * down + half_len` in the upsampled stream.
+        """
+        last = self.buffer_start + n_samples - 1
+        n_last = ((last + 1) * self.up - self.half_len - 1) // self.down
+        count = max(n_last - self.n_output + 1, 0)
+        if len(self.output) < count:
+            self.output = np.zeros(count, dtype=np.float32)
+        output = self.output[:count]
+        if count:
+            positions = np.arange(self.n_output, self.n_output + count) * self.down + self.half_len
+            starts = positions // self.up - self.n_taps + 1 - self.buffer_start
+            windows = np.lib.stride_tricks.sliding_window_view(self.buffer[:n_samples], self.n_taps)
+            if self.up == 1:
+                np.dot(windows[starts], self.phase_cycle[0], out=output)
+            else:
+                first_phase = self.n_output % self.up
+                if len(self.phase_table) < first_phase + count:
+                    self.phase_table = np.tile(self.phase_cycle, (-(-count // self.up) + 1, 1))
+                taps = self.phase_table[first_phase:first_phase + count]
+                np.einsum("ij,ij->i", windows[starts], taps, out=output)
+            self.n_output += count
+
+        # keep the samples the next outputs still need
+        next_start = (self.n_output * self.down + self.half_len) // self.up - self.n_taps + 1
+        keep_from = min(max(next_start - self.buffer_start, 0), n_samples)
+        self.n_history_samples = n_samples - keep_from
+        self.buffer[:self.n_history_samples] = self.buffer[keep_from:n_samples]
+        self.buffer_start += keep_from
+        return output
+
+
 def resample_stream(data, old_rate: int, new_rate: int = 16000, num_channels: int = 1):
     """
     Open an audio stream and read as mono waveform, resampling as necessary,
@@ -150,26 +295,11 @@ def resample_stream(data, old_rate: int, new_rate: int = 16000, num_channels: in
         resampled_file: The resampled audio stream
     """
     try:
-        numpy_data = np.frombuffer(data, dtype=np.int16)
-
-        # Check if the data has more than 1 channel
-        if num_channels > 1:
-            # Reshape the data into a 2D array and take the mean of the channels to convert to mono
-            numpy_data = numpy_data.reshape(-1, num_channels)
-            mono_data = np.mean(numpy_data, axis=1)
-        else:
-            # If the data is already mono, no need to take the mean
-            mono_data = numpy_data
-
-        resample_ratio = new_rate / old_rate
-
-        # Ensure the new length is a multiple of 2
-        new_length = int(len(mono_data) * resample_ratio)
-        if new_length % 2 != 0:
-            new_length += 1
-
-        resampled_data = scipy.signal.resample(mono_data, new_length)
-        return resampled_data.astype(np.int16).tobytes()
+        # a single chunk, so the end of the stream is flushed too
+        resampler = StreamingResampler(old_rate, new_rate, num_channels, chunk_size=len(data) // 2)
+        resampled_data = resampler(data).copy()
+        resampled_data = np.concatenate([resampled_data, resampler.flush()])
+        return (resampled_data * 32768.0).clip(-32768, 32767).astype(np.int16).tobytes()
 
     except Exception as e:
         raise RuntimeError(f"Failed to resample audio") from e
@@ -2,6 +2,7 @@
 
 import os
 import subprocess
+import threading
 import torch
 import numpy as np
 import onnxruntime
@@ -64,9 +65,7 @@ class VoiceActivityDetection():
             self.reset_states(batch_size)
 
         if sr in [8000, 16000]:
-            ort_inputs = {'input': x.numpy(), 'h': self._h, 'c': self._c, 'sr': np.array(sr, dtype='int64')}
-            ort_outs = self.session.run(None, ort_inputs)
-            out, self._h, self._c = ort_outs
+            out, self._h, self._c = self.forward(x.numpy(), self._h, self._c, sr)
         else:
             raise ValueError()
 
@@ -76,6 +75,24 @@ class VoiceActivityDetection():
         out = torch.tensor(out)
         return out
 
+    def forward(self, x, h, c, sr: int):
+        """
+        Runs the model on a batch of audio chunks with explicit LSTM states, without touching the states
+        kept by `__call__`.
+
+        Args:
+            x (np.ndarray): The audio chunks, of shape (batch_size, num_samples).
+            h (np.ndarray): The hidden states, of shape (2, batch_size, 64).
+            c (np.ndarray): The cell states, of shape (2, batch_size, 64).
+            sr (int): The sample rate, 8000 or 16000.
+
+        Returns:
+            tuple: The speech probabilities of shape (batch_size, 1), and the updated hidden and cell states.
+        """
+        ort_inputs = {'input': x, 'h': h, 'c': c, 'sr': np.array(sr, dtype='int64')}
+        out, h, c = self.session.run(None, ort_inputs)
+        return out, h, c
+
     def audio_forward(self, x, sr: int, num_samples: int = 512):
         outs = []
         x, sr = self._validate_input(x, sr)
@@ -140,3 +157,135 @@ class VoiceActivityDetector:
         """
         speech_prob = self.model(torch.from_numpy(audio_frame), self.frame_rate).item()
         return speech_prob > self.threshold
+
+
+class BatchVoiceActivityDetector:
+    """
+    Voice activity detector shared by many audio streams.
+
+    The LSTM states of all streams are kept in one array, in which every stream owns a slot, so that
+    frames of many streams go through a single batched model run while each stream keeps its own state.
+    """
+    def __init__(self, threshold=0.5, frame_rate=16000, num_slots=16):
+        """
+        Args:
+            threshold (float, optional): The probability threshold for detecting voice activity. Defaults to 0.5.
+            frame_rate (int, optional): The sample rate of the audio. Defaults to 16000.
+            num_slots (int, optional): The initial number of state slots, grown as needed. Defaults to 16.
+        """
+        self.model = VoiceActivityDetection()
+        self.threshold = threshold
+        self.frame_rate = frame_rate
+        self.h = np.zeros((2, num_slots, 64), dtype=np.float32)
+        self.c = np.zeros((2, num_slots, 64), dtype=np.float32)
+        self.free_slots = list(range(num_slots - 1, -1, -1))
+        self.lock = threading.Lock()
+
+    def allocate_slot(self):
+        """
+        Reserves a state slot for a new audio stream.
+
+        Returns:
+            int: The slot index to pass to `detect_batch`.
+        """
+        with self.lock:
+            if not self.free_slots:
+                num_slots = self.h.shape[1]
+                self.h = np.concatenate([self.h, np.zeros_like(self.h)], axis=1)
+                self.c = np.concatenate([self.c, np.zeros_like(self.c)], axis=1)
+                self.free_slots = list(range(2 * num_slots - 1, num_slots - 1, -1))
+            return self.free_slots.pop()
+
+    def release_slot(self, slot):
+        """
+        Resets the state of a slot and makes it available to other streams.
+
+        Args:
+            slot (int): The slot index returned by `allocate_slot`.
+        """
+        with self.lock:
+            self.h[:, slot] = 0
+            self.c[:, slot] = 0
+            self.free_slots.append(slot)
+
+    def forward_batch(self, slots, audio_frames):
+        """
+        Computes the speech probability of audio frames of many streams with a single model run.
+
+        Args:
+            slots (list): The state slot of the stream of every frame. A slot may appear only once.
+            audio_frames (list): The audio frames, as NumPy arrays of the same length.
+
+        Returns:
+            np.ndarray: The speech probability of every frame.
+        """
+        x = np.stack(audio_frames).astype(np.float32, copy=False)
+        with self.lock:
+            out, h, c = self.model.forward(x, self.h[:, slots], self.c[:, slots], self.frame_rate)
+            self.h[:, slots] = h
+            self.c[:, slots] = c
+        return out[:, 0]
+
+    def detect_batch(self, slots, audio_frames):
+        """
+        Determines which audio frames of many streams contain speech, with a single model run.
+
+        Args:
+            slots (list): The state slot of the stream of every frame. A slot may appear only once.
+            audio_frames (list): The audio frames, as NumPy arrays of the same length.
+
+        Returns:
+            list: One bool per frame, True if its speech probability exceeds the threshold.
+        """
+        return [bool(speech_prob > self.threshold) for speech_prob in self.forward_batch(slots, audio_frames)]
+
+
+class VoiceActivityEndpointer:
+    """
+    Tracks whether an audio stream is in speech or in silence from the speech probability of its frames.
+
+    The two states are separated with hysteresis: the stream goes into speech as soon as a frame is above
+    `threshold`, and back into silence only after `min_silence_frames` consecutive frames below `neg_threshold`.
+    Frames in between the two thresholds keep the current state, so short dips in the speech probability
+    within an utterance do not end it.
+
+    The stream starts in the speech state, like sessions start with their end-of-speech flag unset, so that
+    leading silence also ends with an end-of-speech event.
+    """
+    def __init__(self, threshold=0.5, neg_threshold=None, min_silence_frames=4):
+        """
+        Args:
+            threshold (float, optional): The speech probability above which a frame starts speech. Defaults to 0.5.
+            neg_threshold (float, optional): The speech probability below which a frame counts as silence.
+                                             Defaults to `threshold - 0.15`.
+            min_silence_frames (int, optional): The number of consecutive silent frames that end speech.
+                                                Defaults to 4.
+        """
+        self.threshold = threshold
+        self.neg_threshold = neg_threshold if neg_threshold is not None else max(threshold - 0.15, 0.01)
+        self.min_silence_frames = min_silence_frames
+        self.speech = True
+        self.silent_frames = 0
+
+    def update(self, speech_prob):
+        """
+        Updates the state with the speech probability of the next frame.
+
+        Args:
+            speech_prob (float): The speech probability of the frame.
+
+        Returns:
+            bool or None: False when speech starts, True when it ends (i.e. the new end-of-speech flag), None if
+                the state did not change.
+        """
+        if speech_prob >= self.threshold:
+            self.silent_frames = 0
+            if not self.speech:
+                self.speech = True
+                return False
+        elif speech_prob < self.neg_threshold:
+            self.silent_frames += 1
+            if self.speech and self.silent_frames >= self.min_silence_frames:
+                self.speech = False
+                return True
+        return None